@@ -0,0 +1,66 @@
+"""
+Benchmark combined `like` dispatch against evaluating branch conditions in turn.
+
+Uses the branch lists of scripts/10086.script, whose branches test the customer's
+answer against several literal patterns each.
+
+Usage:
+    PYTHONPATH=src python bench/bench_dispatch.py
+"""
+
+import timeit
+from pathlib import Path
+from server.loader import load_file
+from server.language import Default, StringValue
+
+SCRIPT = Path(__file__).resolve().parent.parent / "scripts" / "10086.script"
+
+ANSWERS: list[str] = [
+    "帮助",
+    "我想查一下话费余额",
+    "4",
+    "网络有故障需要报修",
+    "随便聊聊",
+]
+
+
+def sequential(procedure):
+    """
+    Builds a selector that evaluates each compiled branch condition in turn.
+    """
+    branches = [
+        (None if isinstance(branch, Default) else branch.bexpr.compiled, branch.target)
+        for branch in procedure.branches
+    ]
+
+    def select(table):
+        for condition, target in branches:
+            if condition is None or condition(table):
+                return target
+        return None
+
+    return select
+
+
+def main() -> None:
+    program = load_file(str(SCRIPT))
+    number: int = 50000
+    print(f"{'procedure':<8} {'answer':<20} {'in turn ns':>10} {'combined ns':>12}")
+    for name in ("问候", "询问后续"):
+        procedure = next(p for p in program.procedures if p.name == name)
+        naive = sequential(procedure)
+        combined = procedure.compiled
+        for answer in ANSWERS:
+            frame = [None] * program.frame_size
+            frame[program.variables.index("${答复}")] = StringValue(answer)
+            assert naive(frame) is combined(frame)
+            slow = min(timeit.repeat(lambda: naive(frame), number=number, repeat=3))
+            fast = min(timeit.repeat(lambda: combined(frame), number=number, repeat=3))
+            print(
+                f"{name:<8} {answer:<20} {slow / number * 1e9:>10.0f} "
+                f"{fast / number * 1e9:>12.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark compiled expressions against the tree-walking `get_value`.
+
+The expressions are taken from the bundled scripts: arithmetic and templated
+output from sort.script and fibonacci.script, and the comparison and `like`
+conditions of their branches.
+
+Usage:
+    PYTHONPATH=src python bench/bench_expression.py
+"""
+
+import timeit
+from server.lexer import Lexer
+from server.parser import Parser
+from server.language import IntegerValue, StringValue
+
+TABLE = {
+    "${a1}": IntegerValue(122),
+    "${a2}": IntegerValue(999),
+    "${n}": IntegerValue(10),
+    "${下标}": IntegerValue(3),
+    "${数组大小}": IntegerValue(5),
+    "${答复}": StringValue("我想查一下话费"),
+}
+
+EXPRESSIONS: list[str] = [
+    "${a1} + ${a2}",
+    "${n} - 1",
+    '"请您输入第 " + (cast ${下标} to string) + " 个数"',
+    '"第 1 小的数字是 " + (cast ${a1} to string)',
+]
+
+CONDITIONS: list[str] = [
+    "${下标} == ${数组大小}",
+    "${数组大小} < 0 or ${数组大小} > 9",
+    '${答复} like "话费" or ${答复} like "余额" or ${答复} like "2"',
+]
+
+
+def main() -> None:
+    lexer = Lexer()
+    parser = Parser(lexer)
+    number: int = 100000
+    print(f"{'expression':<60} {'walk ns':>8} {'compiled ns':>12} {'speedup':>8}")
+    cases: list = []
+    for text in EXPRESSIONS:
+        program = parser.parse(f"procedure p\n    output {text}\n")
+        cases.append((text, program.procedures[0].statements[0].expr))
+    for text in CONDITIONS:
+        program = parser.parse(f"procedure p\n    branch p when {text}\n")
+        cases.append((text, program.procedures[0].branches[0].bexpr))
+    for text, node in cases:
+        walk: float = min(
+            timeit.repeat(lambda: node.get_value(TABLE), number=number, repeat=3)
+        )
+        compiled = node.compiled
+        fast: float = min(
+            timeit.repeat(lambda: compiled(TABLE), number=number, repeat=3)
+        )
+        print(
+            f"{text:<60} {walk / number * 1e9:>8.0f} {fast / number * 1e9:>12.0f} "
+            f"{walk / fast:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark the hand-written `Scanner` against the PLY `Lexer` on large scripts.
+
+The script is a chain of generated procedures in the style of the bundled ones,
+each with a templated output, an assignment, an input and conditional branches.
+Each tokenizer reads the whole script, then the parser parses it with each.
+
+Usage:
+    PYTHONPATH=src python bench/bench_lexer.py [procedures]
+"""
+
+import sys
+import timeit
+from server.lexer import Lexer
+from server.parser import Parser
+from server.scanner import Scanner
+
+
+def generate(procedures: int) -> str:
+    """
+    Returns a script of the given number of procedures, each one 8 lines long.
+    """
+    parts: list[str] = ["need ${n}\n"]
+    for index in range(procedures):
+        parts.append(
+            f"\nprocedure 步骤{index}  # step {index}\n"
+            f'    output "第 " + (cast ${{n}} to string) + " 步，共 {procedures} 步"\n'
+            f"    let ${{n}} = ${{n}} * 2 + {index} % 7\n"
+            f"    input ${{答复}}\n"
+            f'    branch 步骤{(index + 1) % procedures} when ${{答复}} like "下一步"\n'
+            f"    branch 步骤{index} when ${{n}} >= 100 and ${{n}} != {index}\n"
+            f"    default 步骤0\n"
+        )
+    return "".join(parts)
+
+
+def tokenize(lexer: Lexer | Scanner, source: str) -> int:
+    """
+    Reads every token of the source and returns how many there are.
+    """
+    lexer.input(source)
+    count: int = 0
+    while lexer.token() is not None:
+        count += 1
+    return count
+
+
+def main(procedures: int) -> None:
+    source: str = generate(procedures)
+    lines: int = source.count("\n")
+    count: int = tokenize(Lexer(), source)
+    assert tokenize(Scanner(), source) == count
+    print(f"{lines} lines, {count} tokens")
+    print(f"{'':<10} {'ply ms':>8} {'scanner ms':>11} {'speedup':>8}")
+    for label, run in (
+        ("tokenize", lambda lexer: tokenize(lexer, source)),
+        ("parse", lambda lexer: Parser(lexer).parse(source)),
+    ):
+        ply: float = min(timeit.repeat(lambda: run(Lexer()), number=1, repeat=5))
+        scanner: float = min(timeit.repeat(lambda: run(Scanner()), number=1, repeat=5))
+        print(
+            f"{label:<10} {ply * 1e3:>8.1f} {scanner * 1e3:>11.1f}"
+            f" {ply / scanner:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,99 @@
+"""
+Measure the memory taken by the syntax tree of a program and by its sessions.
+
+For each bundled script, reports the number of syntax tree nodes (literals,
+variables, expressions, statements, branches and procedures), the bytes retained
+per node after parsing, and the bytes retained per session paused at its first
+input point.
+
+Usage:
+    PYTHONPATH=src python bench/bench_memory.py
+"""
+
+import gc
+import tracemalloc
+from pathlib import Path
+from server.lexer import Lexer
+from server.parser import Parser
+from server.language import (
+    Literal,
+    Variable,
+    Expression,
+    BooleanExpression,
+    LetStatement,
+    OutputStatement,
+    Branch,
+    Program,
+)
+from server.session import Session
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SCRIPTS: list[str] = ["sort", "fibonacci", "10086", "phone", "electronic-commerce"]
+
+SESSIONS: int = 1000
+
+
+def count_nodes(program: Program) -> int:
+    """
+    Counts the nodes of the syntax tree of a program.
+    """
+
+    def count(word) -> int:
+        if isinstance(word, (Expression, BooleanExpression)):
+            return 1 + sum(count(child) for child in word.words)
+        return 1 if isinstance(word, (Literal, Variable)) else 0
+
+    nodes: int = len(program.needs)
+    for procedure in program.procedures:
+        nodes += 1
+        for statement in procedure.statements:
+            nodes += 1
+            if isinstance(statement, (LetStatement, OutputStatement)):
+                nodes += count(statement.expr)
+        for branch in procedure.branches:
+            nodes += 1
+            if isinstance(branch, Branch):
+                nodes += count(branch.bexpr)
+    return nodes
+
+
+def retained(build) -> tuple[object, int]:
+    """
+    Calls `build` and returns its result with the number of bytes it retains.
+    """
+    gc.collect()
+    tracemalloc.start()
+    before: int = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main() -> None:
+    parser: Parser = Parser(Lexer())
+    print(f"{'script':<20} {'nodes':>6} {'bytes/node':>11} {'bytes/session':>14}")
+    for name in SCRIPTS:
+        source: str = (ROOT / "scripts" / f"{name}.script").read_text(encoding="utf-8")
+        program, tree = retained(lambda: parser.parse(source))
+        program.link()
+        program.compile()
+        nodes: int = count_nodes(program)
+
+        def sessions() -> list[Session]:
+            paused: list[Session] = [Session(program) for _ in range(SESSIONS)]
+            for session in paused:
+                session.start()
+            return paused
+
+        _, session_bytes = retained(sessions)
+        print(
+            f"{name:<20} {nodes:>6} {tree / nodes:>11.1f} "
+            f"{session_bytes / SESSIONS:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Measure how parsing scales with the length of a script.
+
+Two shapes of synthetic script are parsed at 1k, 10k and 100k lines: one with a
+procedure every 10 lines, and one with a single procedure holding every
+statement. The time per line should stay flat as the scripts grow. With
+`--workers`, the first shape is also parsed in a pool of that many processes,
+see `server.parallel`; the wall-clock time is reported.
+
+Usage:
+    PYTHONPATH=src python bench/bench_parser.py [lines ...] [--workers N]
+"""
+
+import argparse
+import time
+from server.lexer import Lexer
+from server.parallel import parse_parallel
+from server.parser import Parser
+
+
+def many_procedures(lines: int) -> str:
+    """
+    Returns a script of procedures of 10 lines each, chained by branches.
+    """
+    count: int = max(lines // 10, 1)
+    parts: list[str] = ["need ${n}\n"]
+    for index in range(count):
+        parts.append(
+            f"procedure p{index}\n"
+            f'    output "step " + (cast ${{n}} to string)\n'
+            f"    let ${{n}} = ${{n}} + {index}\n"
+            f"    input ${{reply}}\n"
+            f'    let ${{reply}} = ${{reply}} + "!"\n'
+            f"    output ${{reply}}\n"
+            f'    branch p{(index + 1) % count} when ${{reply}} like "next"\n'
+            f"    branch p{index} when ${{n}} < 100\n"
+            f'    branch p0 when ${{reply}} == "again"\n'
+            f"    default p{index}\n"
+        )
+    return "".join(parts)
+
+
+def one_procedure(lines: int) -> str:
+    """
+    Returns a script of a single procedure with one statement per line.
+    """
+    parts: list[str] = ["procedure main\n"]
+    for index in range(lines - 2):
+        parts.append(f"    let ${{n}} = ${{n}} + {index}\n")
+    parts.append("    default main\n")
+    return "".join(parts)
+
+
+def main(sizes: list[int], workers: int) -> None:
+    parser: Parser = Parser(Lexer())
+    print(f"{'script':<16} {'lines':>7} {'ms':>9} {'us/line':>8}")
+    for generate in (many_procedures, one_procedure):
+        for lines in sizes:
+            source: str = generate(lines)
+            start: float = time.process_time()
+            parser.parse(source)
+            elapsed: float = time.process_time() - start
+            count: int = source.count("\n")
+            print(
+                f"{generate.__name__:<16} {count:>7} {elapsed * 1e3:>9.1f}"
+                f" {elapsed / count * 1e6:>8.1f}"
+            )
+    if workers > 0:
+        print(f"parallel parsing in {workers} processes, wall-clock")
+        for lines in sizes:
+            source = many_procedures(lines)
+            timings: list[float] = []
+            for run in (parser.parse, lambda text: parse_parallel(text, workers)):
+                start = time.perf_counter()
+                run(source)
+                timings.append(time.perf_counter() - start)
+            print(
+                f"{'many_procedures':<16} {lines:>7} serial {timings[0] * 1e3:>9.1f} ms"
+                f"   parallel {timings[1] * 1e3:>9.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("lines", type=int, nargs="*", default=[1000, 10000, 100000])
+    arg_parser.add_argument("--workers", type=int, default=0)
+    args = arg_parser.parse_args()
+    main(args.lines, args.workers)
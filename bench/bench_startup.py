@@ -0,0 +1,108 @@
+"""
+Measure the time from starting a server to its first accepted connection.
+
+Starts the server on a bundled script, connects as soon as it listens and waits
+for the first bytes of the first prompt, which the server sends as soon as it
+accepts a connection. The server is started from the script's source, and again
+from a fresh `.dslc` artifact of it, see `server.artifact`. The time to start a
+bare Python interpreter is reported alongside as the floor, and each median is
+checked against the goal of `GOAL` seconds.
+
+The modules are compiled to bytecode first, as an installed package would be, so
+that a run with PYTHONDONTWRITEBYTECODE set does not time the compiler.
+
+Usage:
+    PYTHONPATH=src python bench/bench_startup.py [script] [--runs N]
+"""
+
+import argparse
+import compileall
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from server.artifact import write_artifact
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PORT: int = 10300
+
+GOAL: float = 0.1
+"""The longest acceptable median time to ready, in seconds."""
+
+
+def time_to_ready(script: str, port: int) -> float:
+    """
+    Starts a server and returns the seconds until a first connection is served.
+    """
+    start: float = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, str(ROOT / "src" / "server" / "main.py")]
+        + ["--port", str(port), script],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            try:
+                sock = socket.create_connection(("localhost", port))
+                break
+            except ConnectionRefusedError:
+                time.sleep(0.001)
+        with sock:
+            assert sock.recv(1)
+        return time.perf_counter() - start
+    finally:
+        process.kill()
+        process.wait()
+
+
+def time_interpreter() -> float:
+    """
+    Returns the seconds it takes to start and exit a bare Python interpreter.
+    """
+    start: float = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return time.perf_counter() - start
+
+
+def main(name: str, runs: int) -> None:
+    compileall.compile_dir(ROOT / "src", quiet=1)
+    with tempfile.TemporaryDirectory() as directory:
+        source: str = os.path.join(directory, f"{name}.script")
+        shutil.copy(ROOT / "scripts" / f"{name}.script", source)
+        cached: str = os.path.join(directory, "cached", f"{name}.script")
+        os.mkdir(os.path.dirname(cached))
+        shutil.copy(source, cached)
+        write_artifact(cached)
+
+        samples: dict[str, list[float]] = {"python": [], "source": [], "artifact": []}
+        port: int = PORT
+        for _ in range(runs):
+            samples["python"].append(time_interpreter())
+            for label, script in (("source", source), ("artifact", cached)):
+                samples[label].append(time_to_ready(script, port))
+                port += 1
+
+    print(f"{name}: time to the first accepted connection over {runs} runs")
+    for label, times in samples.items():
+        median: float = statistics.median(times)
+        verdict: str = ""
+        if label != "python":
+            verdict = "   goal met" if median < GOAL else "   goal missed"
+        print(
+            f"  {label:<10} median {median * 1e3:7.1f} ms"
+            f"   min {min(times) * 1e3:7.1f} ms{verdict}"
+        )
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("script", nargs="?", default="10086")
+    arg_parser.add_argument("--runs", type=int, default=10)
+    args = arg_parser.parse_args()
+    main(args.script, args.runs)
@@ -0,0 +1,87 @@
+"""
+Benchmark the cost of moving from one procedure to the next.
+
+Generates chain scripts in which procedure i defaults to procedure i + 1 and times a
+session walking the whole chain. With linked programs the time per hop stays flat as
+the script grows; the name scan used before linking is timed alongside for
+comparison.
+
+Usage:
+    PYTHONPATH=src python bench/bench_transition.py
+"""
+
+import time
+from server.loader import load
+from server.language import Program
+from server.session import Session
+
+
+def chain_script(size: int) -> str:
+    """
+    Generates a script of `size` procedures, each defaulting to the next one.
+
+    Args:
+        size: The number of procedures.
+
+    Returns:
+        str: The source of the script.
+    """
+    lines: list[str] = []
+    for i in range(size - 1):
+        lines.append(f"procedure p{i}\n    default p{i + 1}\n")
+    lines.append(f"procedure p{size - 1}\n")
+    return "\n".join(lines)
+
+
+def time_linked(program: Program, repeat: int) -> float:
+    """
+    Times sessions walking the chain through linked targets.
+
+    Returns:
+        float: The best time in seconds for one walk of the chain.
+    """
+    best: float = float("inf")
+    for _ in range(repeat):
+        begin: float = time.perf_counter()
+        Session(program).start()
+        best = min(best, time.perf_counter() - begin)
+    return best
+
+
+def time_scan(program: Program, repeat: int) -> float:
+    """
+    Times walking the chain by scanning the procedure list for every target name.
+
+    Returns:
+        float: The best time in seconds for one walk of the chain.
+    """
+    best: float = float("inf")
+    for _ in range(repeat):
+        begin: float = time.perf_counter()
+        current = program.procedures[0]
+        while current is not None:
+            next_proc_name = None
+            for branch in current.branches:
+                next_proc_name = branch.proc_name
+                break
+            current = None
+            for proc in program.procedures:
+                if proc.name == next_proc_name:
+                    current = proc
+                    break
+        best = min(best, time.perf_counter() - begin)
+    return best
+
+
+def main() -> None:
+    print(f"{'procedures':>10} {'linked ns/hop':>14} {'scan ns/hop':>12}")
+    for size in (10, 100, 1000, 5000):
+        program: Program = load(chain_script(size))
+        repeat: int = max(3, 20000 // size)
+        linked: float = time_linked(program, repeat) / size * 1e9
+        scan: float = time_scan(program, min(repeat, 5)) / size * 1e9
+        print(f"{size:>10} {linked:>14.0f} {scan:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
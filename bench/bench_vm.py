@@ -0,0 +1,75 @@
+"""
+Benchmark the bytecode virtual machine against the tree-walking session.
+
+Replays whole conversations of the bundled scripts through `Session`, once walking
+the syntax tree and once running the program compiled by `server.vm`: the sort and
+fibonacci test transcripts, a long fibonacci computation, and a tour of the
+10086.script menu.
+
+Usage:
+    PYTHONPATH=src python bench/bench_vm.py
+"""
+
+import timeit
+from pathlib import Path
+from server.loader import load_file
+from server.session import Session
+from server.vm import compile_program
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def transcript(name: str, case: int) -> list[str]:
+    """
+    Reads the inputs of a test transcript.
+    """
+    path: Path = ROOT / "test" / f"test_{name}" / f"input{case}.txt"
+    return path.read_text(encoding="utf-8").splitlines()
+
+
+CASES: list[tuple[str, str, list[str]]] = [
+    ("sort input1", "sort", transcript("sort", 1)),
+    ("sort input2", "sort", transcript("sort", 2)),
+    ("fibonacci input1", "fibonacci", transcript("fibonacci", 1)),
+    ("fibonacci 2000", "fibonacci", ["2000"]),
+    ("10086 menu", "10086", ["帮助", "话费", "1", "余额", "2", "套餐", "再见"]),
+]
+
+
+def converse(session: Session, inputs: list[str]) -> None:
+    """
+    Runs a session to its end, or until the inputs run out.
+    """
+    session.start()
+    for text in inputs:
+        if session.finished:
+            return
+        session.feed(text)
+
+
+def main() -> None:
+    print(f"{'conversation':<20} {'tree us':>9} {'vm us':>9} {'speedup':>8}")
+    for label, name, inputs in CASES:
+        program = load_file(ROOT / "scripts" / f"{name}.script")
+        code = compile_program(program)
+        number: int = 200
+        tree: float = min(
+            timeit.repeat(
+                lambda: converse(Session(program), inputs), number=number, repeat=7
+            )
+        )
+        vm: float = min(
+            timeit.repeat(
+                lambda: converse(Session(program, code), inputs),
+                number=number,
+                repeat=7,
+            )
+        )
+        print(
+            f"{label:<20} {tree / number * 1e6:>9.1f} {vm / number * 1e6:>9.1f} "
+            f"{tree / vm:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
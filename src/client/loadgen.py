@@ -0,0 +1,384 @@
+"""
+Replay transcripts against a server from many concurrent simulated clients.
+"""
+
+__all__: list[str] = [
+    "Transcript",
+    "LoadReport",
+    "run_session",
+    "run_load",
+    "percentile",
+]
+
+import argparse
+import json
+import math
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+import config
+from protocol import (
+    PROMPT,
+    EXIT,
+    INPUT,
+    encode_frame,
+    encode_upgrade,
+    FrameReader,
+)
+from client.main import read_turn
+
+
+@dataclass
+class Transcript:
+    """
+    The inputs of one recorded conversation, one line per turn.
+    """
+
+    name: str
+    inputs: list[str]
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> "Transcript":
+        """
+        Reads a transcript such as `test/test_sort/input1.txt`.
+
+        Args:
+            path: The path to the file, holding one input per line.
+
+        Returns:
+            Transcript: The transcript named after the file.
+        """
+        text: str = Path(path).read_text(encoding="utf-8")
+        return cls(name=str(path), inputs=text.splitlines())
+
+
+@dataclass
+class LoadReport:
+    """
+    Collects the results of the simulated sessions of one load run.
+    """
+
+    sessions: int = 0
+    errors: dict[str, int] = field(default_factory=dict)
+    connects: list[float] = field(default_factory=list)
+    latencies: list[float] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add_session(self, connect: float, latencies: list[float]) -> None:
+        """
+        Records a session that ran to the end of the conversation.
+
+        Args:
+            connect: The time it took to connect, in seconds.
+            latencies: The latency of every turn of the session, in seconds.
+        """
+        with self.lock:
+            self.sessions += 1
+            self.connects.append(connect)
+            self.latencies.extend(latencies)
+
+    def add_error(self, error: Exception) -> None:
+        """
+        Records a session that failed.
+
+        Args:
+            error: The exception that ended the session.
+        """
+        with self.lock:
+            name: str = type(error).__name__
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def summary(self, elapsed: float) -> dict:
+        """
+        Summarizes the run.
+
+        Args:
+            elapsed: The wall-clock duration of the run, in seconds.
+
+        Returns:
+            dict: The session and turn counts, the session throughput, the
+                percentiles in milliseconds of the turn latency and, apart from
+                it, of the connection time, and the error counts by type.
+        """
+        with self.lock:
+            connects: list[float] = sorted(self.connects)
+            latencies: list[float] = sorted(self.latencies)
+            return {
+                "sessions": self.sessions,
+                "errors": sum(self.errors.values()),
+                "error_types": dict(self.errors),
+                "turns": len(latencies),
+                "elapsed": round(elapsed, 3),
+                "sessions_per_second": (
+                    round(self.sessions / elapsed, 3) if elapsed > 0 else 0.0
+                ),
+                "connect_ms": _percentiles(connects),
+                "turn_latency_ms": _percentiles(latencies),
+            }
+
+
+def _percentiles(values: list[float]) -> dict[str, float]:
+    """
+    Returns the percentiles a report shows of sorted durations.
+
+    Args:
+        values: The durations, in seconds, sorted in ascending order.
+
+    Returns:
+        dict[str, float]: The p50, p95, p99 and max, in milliseconds.
+    """
+    return {
+        name: round(percentile(values, q) * 1000, 3)
+        for name, q in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))
+    }
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    Returns the q-th percentile of sorted values, by the nearest-rank method.
+
+    Args:
+        values: The values, sorted in ascending order.
+        q: The percentile, from 0 to 100.
+
+    Returns:
+        float: The percentile, or 0.0 if there are no values.
+    """
+    if not values:
+        return 0.0
+    rank: int = max(1, math.ceil(len(values) * q / 100))
+    return values[rank - 1]
+
+
+def run_session(
+    host: str,
+    port: int,
+    transcript: Transcript,
+    protocol: str = "framed",
+    think_time: float = 0,
+) -> tuple[float, list[float]]:
+    """
+    Replays one transcript as a client, the way `client/main.py` would.
+
+    A turn's latency runs from sending an input (or from being connected, for the
+    first turn) to receiving the server's complete reply. The time it takes to
+    connect is returned apart, so that the latencies only measure the server's
+    turns.
+
+    Args:
+        host: The host to connect to.
+        port: The port to connect to.
+        transcript: The inputs to send, one per turn.
+        protocol: "framed" to switch to the framed protocol after the first
+            prompt, or "legacy".
+        think_time: The number of seconds to wait before sending each input.
+
+    Returns:
+        tuple[float, list[float]]: The time it took to connect, and the latency
+        of every turn, in seconds.
+
+    Raises:
+        ConnectionError: If the server closes the connection or breaks the
+            protocol; ConnectionRefusedError if it is too busy to take it.
+        EOFError: If the server asks for more inputs than the transcript has.
+    """
+    busy_reply: str = config.busy_message + "\n"
+    latencies: list[float] = []
+    inputs = iter(transcript.inputs)
+    sent: float = time.perf_counter()
+    with socket.create_connection((host, port)) as client_socket:
+        client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connected: float = time.perf_counter()
+        connect: float = connected - sent
+        sent = connected
+        # every conversation starts in the delimiter protocol
+        framed: bool = False
+        excess_data: bytes = b""
+        frames: FrameReader | None = None
+        while True:
+            if framed:
+                kind, _ = frames.read()
+                if kind not in (PROMPT, EXIT):
+                    raise ConnectionError(f"unexpected frame {kind!r}")
+                finished: bool = kind == EXIT
+            else:
+                finished, output, excess_data = read_turn(client_socket, excess_data)
+                if finished and not latencies and output == busy_reply:
+                    raise ConnectionRefusedError(config.busy_message)
+            latencies.append(time.perf_counter() - sent)
+            if finished:
+                return connect, latencies
+
+            user_input: str | None = next(inputs, None)
+            if user_input is None:
+                raise EOFError(f"{transcript.name} has no input left")
+            if think_time > 0:
+                time.sleep(think_time)
+            sent = time.perf_counter()
+            if framed:
+                client_socket.sendall(encode_frame(INPUT, user_input))
+            elif protocol == "framed":
+                client_socket.sendall(encode_upgrade(INPUT, user_input))
+                framed = True
+                frames = FrameReader(client_socket)
+            else:
+                client_socket.sendall(user_input.encode() + config.delimiter)
+
+
+def run_load(
+    host: str,
+    port: int,
+    transcripts: list[Transcript],
+    clients: int = 1,
+    sessions: int = 0,
+    duration: float = 0,
+    ramp_up: float = 0,
+    think_time: float = 0,
+    rate: float = 0,
+    protocol: str = "framed",
+) -> dict:
+    """
+    Replays transcripts from concurrent clients and reports the results.
+
+    Every client runs sessions back to back, cycling through the transcripts, until
+    the session budget or the duration is used up.
+
+    Args:
+        host: The host to connect to.
+        port: The port to connect to.
+        transcripts: The transcripts to replay.
+        clients: The number of concurrent simulated clients.
+        sessions: The total number of sessions to run, or 0 for no limit.
+        duration: The number of seconds after which no new session starts, or 0
+            for no limit.
+        ramp_up: The number of seconds over which the clients are started evenly.
+        think_time: The number of seconds each client waits before every input.
+        rate: The target number of sessions started per second across all
+            clients, or 0 to start them as fast as the clients allow.
+        protocol: "framed" to switch to the framed protocol after the first
+            prompt, or "legacy".
+
+    Returns:
+        dict: The summary of the run, see `LoadReport.summary`.
+
+    Raises:
+        ValueError: If neither a session budget nor a duration is given.
+    """
+    if sessions <= 0 and duration <= 0:
+        raise ValueError("either sessions or duration must be positive")
+
+    report: LoadReport = LoadReport()
+    lock: threading.Lock = threading.Lock()
+    started: int = 0
+    start: float = time.perf_counter()
+
+    def next_session() -> int | None:
+        nonlocal started
+        with lock:
+            if sessions > 0 and started >= sessions:
+                return None
+            if duration > 0 and time.perf_counter() - start >= duration:
+                return None
+            index: int = started
+            started += 1
+        if rate > 0:
+            delay: float = start + index / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        return index
+
+    def client(number: int) -> None:
+        if ramp_up > 0:
+            time.sleep(ramp_up * number / clients)
+        while (index := next_session()) is not None:
+            transcript: Transcript = transcripts[index % len(transcripts)]
+            try:
+                connect, latencies = run_session(
+                    host, port, transcript, protocol, think_time
+                )
+            except (OSError, EOFError) as error:
+                report.add_error(error)
+            else:
+                report.add_session(connect, latencies)
+
+    threads: list[threading.Thread] = [
+        threading.Thread(target=client, args=(number,), daemon=True)
+        for number in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return report.summary(time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay transcripts against a server from concurrent clients."
+    )
+    parser.add_argument(
+        "transcripts", nargs="+", help="Files holding one client input per line."
+    )
+    parser.add_argument("--host", default="localhost", help="The host to connect to.")
+    parser.add_argument(
+        "--port", type=int, default=config.default_port, help="The port to connect to."
+    )
+    parser.add_argument(
+        "--clients", type=int, default=1, help="The number of concurrent clients."
+    )
+    parser.add_argument(
+        "--sessions",
+        type=int,
+        default=0,
+        help="The total number of sessions to run (0 for no limit).",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=0,
+        help="Stop starting sessions after this many seconds (0 for no limit).",
+    )
+    parser.add_argument(
+        "--ramp-up",
+        type=float,
+        default=0,
+        help="Start the clients evenly over this many seconds.",
+    )
+    parser.add_argument(
+        "--think-time",
+        type=float,
+        default=0,
+        help="Wait this many seconds before sending each input.",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=0,
+        help="The target number of sessions started per second (0 for no limit).",
+    )
+    parser.add_argument(
+        "--protocol",
+        choices=("framed", "legacy"),
+        default="framed",
+        help="Switch to framed messages after the first prompt, or use the "
+        "delimiter protocol only.",
+    )
+    args = parser.parse_args()
+    if args.sessions <= 0 and args.duration <= 0:
+        parser.error("one of --sessions or --duration must be positive")
+
+    result: dict = run_load(
+        host=args.host,
+        port=args.port,
+        transcripts=[Transcript.from_file(path) for path in args.transcripts],
+        clients=args.clients,
+        sessions=args.sessions,
+        duration=args.duration,
+        ramp_up=args.ramp_up,
+        think_time=args.think_time,
+        rate=args.rate,
+        protocol=args.protocol,
+    )
+    print(json.dumps(result, ensure_ascii=False, indent=4))
@@ -5,9 +5,20 @@ Run the client.
 import socket
 import argparse
 import config
+from protocol import (
+    PROMPT,
+    EXIT,
+    INPUT,
+    SCRIPT,
+    encode_frame,
+    encode_upgrade,
+    FrameReader,
+)
 
 
-def main(host: str, port: int) -> None:
+def main(
+    host: str, port: int, protocol: str = "framed", script: str | None = None
+) -> None:
     """
     Runs the client.
 
@@ -16,6 +27,11 @@ def main(host: str, port: int) -> None:
 
     :param host: The host to connect to.
     :param port: The port to connect to.
+    :param protocol: "framed" to switch to the framed protocol after the first
+        prompt, or "legacy" to keep to the delimiter protocol, e.g. with servers
+        that predate framing.
+    :param script: The script to run, on a server hosting a directory of scripts;
+        without it, or over the delimiter protocol, the server asks for one.
     :return: None
     """
 
@@ -24,25 +40,78 @@ def main(host: str, port: int) -> None:
 
     excess_data = b""
     while True:
-        data = excess_data
-        while True:
-            chunk = client_socket.recv(1024)
-            data += chunk
-            if config.delimiter in data:
-                break
-            if config.exit_signal in data:
-                output = data.split(config.exit_signal, maxsplit=1)[0]
-                print(f"对方：{output.decode()}")
-                print("对方已终止通信")
-                client_socket.close()
-                return
-        output, excess_data = data.split(config.delimiter, 1)
+        finished, output, excess_data = read_turn(client_socket, excess_data)
+        if finished:
+            print(f"对方：{output}")
+            print("对方已终止通信")
+            client_socket.close()
+            return
+        if protocol == "framed" and script is not None:
+            # the server sends its prompt again if it was not asking for a script
+            client_socket.sendall(encode_upgrade(SCRIPT, script))
+            run_framed(client_socket)
+            return
         print("对方：")
-        print(f"{output.decode()}")
+        print(f"{output}")
 
         user_input = input("输入 > ")
-        client_socket.sendall(user_input.encode())
-        client_socket.sendall(config.delimiter)
+        if protocol == "framed":
+            client_socket.sendall(encode_upgrade(INPUT, user_input))
+            print()
+            run_framed(client_socket)
+            return
+        client_socket.sendall(user_input.encode() + config.delimiter)
+        print()
+
+
+def read_turn(
+    client_socket: socket.socket, excess_data: bytes
+) -> tuple[bool, str, bytes]:
+    """
+    Reads the server's outputs for one turn of the delimiter protocol.
+
+    :param client_socket: The connected socket.
+    :param excess_data: Bytes received after the end of the previous turn.
+    :return: Whether the server ended the conversation, the outputs of the turn,
+        and the bytes received after them.
+    :raises ConnectionError: If the server closes the connection mid-turn.
+    """
+    data = excess_data
+    while True:
+        if config.delimiter in data:
+            output, excess_data = data.split(config.delimiter, 1)
+            return False, output.decode(), excess_data
+        if config.exit_signal in data:
+            output = data.split(config.exit_signal, maxsplit=1)[0]
+            return True, output.decode(), b""
+        chunk = client_socket.recv(1024)
+        if not chunk:
+            raise ConnectionError("connection closed by the server")
+        data += chunk
+
+
+def run_framed(client_socket: socket.socket) -> None:
+    """
+    Runs the conversation loop over the framed protocol.
+
+    :param client_socket: The connected socket, after switching protocols.
+    :return: None
+    """
+    frames = FrameReader(client_socket)
+    while True:
+        kind, output = frames.read()
+        if kind == EXIT:
+            print(f"对方：{output}")
+            print("对方已终止通信")
+            client_socket.close()
+            return
+        if kind != PROMPT:
+            raise ConnectionError(f"unexpected frame {kind!r}")
+        print("对方：")
+        print(f"{output}")
+
+        user_input = input("输入 > ")
+        client_socket.sendall(encode_frame(INPUT, user_input))
         print()
 
 
@@ -52,7 +121,17 @@ if __name__ == "__main__":
     parser.add_argument(
         "--port", type=int, default=config.default_port, help="The port to connect to."
     )
+    parser.add_argument(
+        "--protocol",
+        choices=("framed", "legacy"),
+        default="framed",
+        help="Switch to framed messages after the first prompt, or use the "
+        "delimiter protocol only.",
+    )
+    parser.add_argument(
+        "--script", help="The script to run, on a server hosting several."
+    )
     args = parser.parse_args()
-    main(host=args.host, port=args.port)
+    main(host=args.host, port=args.port, protocol=args.protocol, script=args.script)
 
     print("客户端已退出")
@@ -2,8 +2,18 @@ __all__: list[str] = [
     "delimiter",
     "exit_signal",
     "default_port",
+    "frame_magic",
+    "max_frame_size",
+    "busy_message",
 ]
 
 delimiter: bytes = b"hello;__2022212720__;world"
 exit_signal: bytes = b"goodbye;__2022212720__;world"
 default_port: int = 10001
+
+# length-prefixed framing, see protocol.py
+frame_magic: bytes = b"frame;__2022212720__;world"
+max_frame_size: int = 1 << 20
+
+# the last output of a connection turned away by a full worker pool, see server/pool.py
+busy_message: str = "server busy"
@@ -0,0 +1,215 @@
+"""
+The length-prefixed framing protocol shared by the client and the server.
+
+The original protocol marks the end of every message with `config.delimiter` and
+the end of a conversation with `config.exit_signal`, so both sides have to scan
+everything they receive for those markers and the markers can never appear in
+user text. The framed protocol sends each message as one frame instead:
+
+    +------+----------------------+-------------------+
+    | kind | length (4 bytes, BE) | payload (UTF-8)   |
+    +------+----------------------+-------------------+
+
+The server sends a PROMPT frame carrying the outputs of a turn when it waits for
+input, and an EXIT frame carrying the last outputs when the conversation ends.
+The client answers every PROMPT with an INPUT frame.
+
+Every conversation starts in the delimiter protocol, so that clients predating
+framing keep working and no side ever waits to find out which protocol the
+other speaks. A client switches to the framed protocol by answering the first
+prompt with `config.frame_magic` followed by a frame, see `encode_upgrade`, and
+every message after that is a frame. The frame is either the INPUT answering
+the prompt, or a SCRIPT frame naming the script to run on a server hosting
+several, see `server.registry`; a server not asking for a script ignores it and
+sends the prompt again as a frame. A server predating framing would take the
+answer for input, so clients talking to one keep to the delimiter protocol.
+"""
+
+__all__: list[str] = [
+    "PROMPT",
+    "EXIT",
+    "INPUT",
+    "SCRIPT",
+    "HEADER_SIZE",
+    "encode_frame",
+    "decode_header",
+    "FrameReader",
+    "encode_upgrade",
+    "accept_upgrade",
+]
+
+import socket
+import struct
+import config
+
+PROMPT: bytes = b"P"
+EXIT: bytes = b"E"
+INPUT: bytes = b"I"
+SCRIPT: bytes = b"S"
+
+_HEADER: struct.Struct = struct.Struct("!cI")
+HEADER_SIZE: int = _HEADER.size
+
+
+def encode_frame(kind: bytes, payload: str) -> bytes:
+    """
+    Encodes a frame.
+
+    Args:
+        kind: The frame kind, one of PROMPT, EXIT, INPUT or SCRIPT.
+        payload: The text carried by the frame.
+
+    Returns:
+        bytes: The header followed by the UTF-8 encoded payload.
+    """
+    data: bytes = payload.encode()
+    return _HEADER.pack(kind, len(data)) + data
+
+
+def decode_header(header: bytes | bytearray, offset: int = 0) -> tuple[bytes, int]:
+    """
+    Decodes a frame header.
+
+    Args:
+        header: A buffer holding the header.
+        offset: The position of the header in the buffer.
+
+    Returns:
+        tuple[bytes, int]: The kind of the frame and the length of its payload.
+
+    Raises:
+        ConnectionError: If the payload is larger than `config.max_frame_size`.
+    """
+    kind, length = _HEADER.unpack_from(header, offset)
+    if length > config.max_frame_size:
+        raise ConnectionError(f"frame of {length} bytes is too large")
+    return kind, length
+
+
+class FrameReader:
+    """
+    Reads frames from a blocking socket into one reusable buffer.
+
+    Bytes are received with `recv_into` directly into a preallocated `bytearray`
+    and payloads are decoded straight from a `memoryview` of it, so a message is
+    never accumulated by concatenation or scanned for a delimiter.
+    """
+
+    def __init__(self, conn: socket.socket, size: int = 4096) -> None:
+        """
+        Initializes a FrameReader instance.
+
+        Args:
+            conn: The socket to read from.
+            size: The initial capacity of the receive buffer in bytes.
+        """
+        self._conn: socket.socket = conn
+        self._buffer: bytearray = bytearray(size)
+        self._view: memoryview = memoryview(self._buffer)
+        self._start: int = 0
+        self._end: int = 0
+
+    def read(self) -> tuple[bytes, str]:
+        """
+        Reads the next frame.
+
+        Returns:
+            tuple[bytes, str]: The kind and the decoded payload of the frame.
+
+        Raises:
+            ConnectionError: If the peer closes the connection or sends a frame
+                larger than `config.max_frame_size`.
+        """
+        self._fill(HEADER_SIZE)
+        kind, length = decode_header(self._buffer, self._start)
+        self._fill(HEADER_SIZE + length)
+        begin: int = self._start + HEADER_SIZE
+        payload: str = str(self._view[begin : begin + length], "utf-8")
+        self._start = begin + length
+        return kind, payload
+
+    def _fill(self, size: int) -> None:
+        """
+        Receives until at least `size` unread bytes are buffered.
+
+        Args:
+            size: The number of unread bytes needed.
+
+        Raises:
+            ConnectionError: If the peer closes the connection.
+        """
+        if self._end - self._start >= size:
+            return
+        if self._start == self._end:
+            self._start = self._end = 0
+        if self._start + size > len(self._buffer):
+            self._compact(size)
+        while self._end - self._start < size:
+            received: int = self._conn.recv_into(self._view[self._end :])
+            if received == 0:
+                raise ConnectionError("connection closed by peer")
+            self._end += received
+
+    def _compact(self, size: int) -> None:
+        """
+        Moves the unread bytes to the front of the buffer, growing it if it cannot
+        hold `size` bytes.
+
+        Args:
+            size: The number of bytes the buffer must be able to hold.
+        """
+        unread: int = self._end - self._start
+        if size > len(self._buffer):
+            self._view.release()
+            grown: bytearray = bytearray(max(size, 2 * len(self._buffer)))
+            grown[:unread] = self._buffer[self._start : self._end]
+            self._buffer = grown
+            self._view = memoryview(self._buffer)
+        else:
+            self._buffer[:unread] = self._buffer[self._start : self._end]
+        self._start, self._end = 0, unread
+
+
+def encode_upgrade(kind: bytes, payload: str) -> bytes:
+    """
+    Encodes the answer to the first prompt that switches to the framed protocol.
+
+    Args:
+        kind: The kind of the frame, INPUT or SCRIPT.
+        payload: The text carried by the frame.
+
+    Returns:
+        bytes: `config.frame_magic` followed by the frame.
+    """
+    return config.frame_magic + encode_frame(kind, payload)
+
+
+def accept_upgrade(conn: socket.socket) -> tuple[bool, bytes]:
+    """
+    Reads the start of the client's first message, to tell which protocol it
+    speaks.
+
+    No more bytes than `config.frame_magic` holds are received, so that the
+    frame following it is left for a `FrameReader`. The bytes of an input in
+    the delimiter protocol stop matching the magic at the latest with its
+    delimiter, so this never waits for more than the client sends.
+
+    Args:
+        conn: The client socket, after the first prompt was sent.
+
+    Returns:
+        tuple[bool, bytes]: Whether the client switched to the framed protocol,
+        and the bytes received otherwise, which start its input.
+
+    Raises:
+        ConnectionError: If the client closes the connection.
+    """
+    data: bytes = b""
+    while len(data) < len(config.frame_magic) and config.frame_magic.startswith(data):
+        chunk: bytes = conn.recv(len(config.frame_magic) - len(data))
+        if not chunk:
+            raise ConnectionError("connection closed by peer")
+        data += chunk
+    if data == config.frame_magic:
+        return True, b""
+    return False, data
@@ -0,0 +1,316 @@
+"""
+Serving sessions from an asyncio event loop.
+
+This module is only imported when the server runs in the "asyncio" mode:
+importing asyncio takes longer than everything else a server does before it
+accepts its first connection in the "thread" mode.
+"""
+
+__all__: list[str] = [
+    "AsyncInterpreter",
+    "serve_asyncio",
+]
+
+import asyncio
+import socket
+from config import delimiter
+from config import exit_signal
+from config import frame_magic
+from protocol import (
+    PROMPT,
+    EXIT,
+    INPUT,
+    SCRIPT,
+    HEADER_SIZE,
+    encode_frame,
+    decode_header,
+)
+from server.interpreter import Interpreter
+from server.language import (
+    Value,
+    Program,
+)
+from server.session import Session
+from server.vm import Code
+from server.metrics import metrics
+from server.registry import SCRIPT_PROMPT, Registry
+from server.reload import Reloader
+
+
+class AsyncInterpreter:
+    """
+    Interpreter for the language, driven by an asyncio event loop.
+
+    It serves one Session over asyncio streams and waits for client input with
+    `await` instead of a blocking `recv`, so an idle session costs a coroutine
+    rather than an OS thread. Like `Interpreter`, it switches from the delimiter
+    protocol to the framed protocol if the client answers the first prompt with
+    a frame, and lets the client select the script to run from a registry.
+    """
+
+    def __init__(
+        self,
+        program: Program | None,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        addr,
+        code: Code | None = None,
+        registry: Registry | None = None,
+    ) -> None:
+        """
+        Initializes an AsyncInterpreter instance.
+
+        Args:
+            program: The Program object representing the program to run, or None
+                to run the script the client selects from the registry.
+            reader: The stream to read client input from.
+            writer: The stream to write responses to.
+            addr: The address of the client.
+            code: The program compiled to bytecode, to run it on the virtual
+                machine instead of walking its syntax tree.
+            registry: The scripts the client selects from, if no program is given.
+        """
+        self._session: Session | None = (
+            Session(program, code) if program is not None else None
+        )
+        self._registry: Registry | None = registry
+        self._reader: asyncio.StreamReader = reader
+        self._writer: asyncio.StreamWriter = writer
+        self._addr = addr
+        self._excess_data: bytes = b""
+        self._framed: bool = False
+        self._negotiated: bool = False
+
+    async def run(self) -> None:
+        """
+        Runs the program until it ends, then sends the exit signal to the client.
+
+        Raises:
+            asyncio.IncompleteReadError: If the client disconnects while input is
+                expected.
+        """
+        if self._session is None:
+            error: str | None = await self._select()
+            if error is not None:
+                self._finish([error])
+                await self._writer.drain()
+                return
+
+        outputs: list[str] = self._session.start()
+        while not self._session.finished:
+            outputs = self._session.feed(await self._prompt(outputs))
+        self._finish(outputs)
+        await self._writer.drain()
+
+    def get_vartable(self) -> dict[str, Value]:
+        """
+        Returns a dictionary mapping variable ids to their values.
+
+        :return: A dictionary mapping variable ids to their values.
+        """
+        return self._session.get_vartable()
+
+    async def _select(self) -> str | None:
+        """
+        Creates the session of the script the client names.
+
+        The name is asked for with a prompt, which a client switching to the
+        framed protocol may answer with a SCRIPT frame. A script that is not
+        cached is loaded in a thread, so that the event loop keeps serving the
+        other sessions meanwhile.
+
+        Returns:
+            str | None: Why the session could not be created, for the client, or
+            None if it was.
+
+        Raises:
+            ConnectionError: If the client breaks the protocol.
+        """
+        name: str = await self._prompt([SCRIPT_PROMPT], script=True)
+        version: tuple[Program, Code | None] | None = self._registry.get_cached(name)
+        if version is None:
+            try:
+                version = await asyncio.to_thread(self._registry.get, name)
+            except KeyError as error:
+                return error.args[0]
+        self._session = Session(*version)
+        return None
+
+    async def _prompt(self, outputs: list[str], script: bool = False) -> str:
+        """
+        Sends the outputs of a turn, then waits for the client's input.
+
+        Args:
+            outputs: The strings to be sent to the client.
+            script: Whether the prompt asks for a script, see `Interpreter._prompt`.
+
+        Returns:
+            str: The input received from the client.
+
+        Raises:
+            ConnectionError: If the client breaks the protocol.
+        """
+        metrics.increment("turns")
+        if self._framed:
+            self._send(encode_frame(PROMPT, "".join(o + "\n" for o in outputs)))
+            await self._writer.drain()
+        else:
+            self._send(Interpreter._encode(outputs) + delimiter)
+            await self._writer.drain()
+            if not await self._upgrade():
+                return await self._input()
+        header: bytes = await self._reader.readexactly(HEADER_SIZE)
+        kind, length = decode_header(header)
+        payload: bytes = await self._reader.readexactly(length)
+        if kind == SCRIPT and not script:
+            return await self._prompt(outputs)
+        if kind not in (INPUT, SCRIPT):
+            raise ConnectionError(f"unexpected frame {kind!r} from {self._addr}")
+        return payload.decode()
+
+    async def _upgrade(self) -> bool:
+        """
+        Tells whether the answer to the first prompt switches to the framed protocol.
+
+        Like `protocol.accept_upgrade`, it reads no more than the magic, and keeps
+        the bytes of an input in the delimiter protocol for `_input`.
+
+        Returns:
+            bool: Whether the client switched just now.
+
+        Raises:
+            asyncio.IncompleteReadError: If the client disconnects.
+        """
+        if self._negotiated:
+            return False
+        self._negotiated = True
+        data: bytes = b""
+        while len(data) < len(frame_magic) and frame_magic.startswith(data):
+            chunk: bytes = await self._reader.read(len(frame_magic) - len(data))
+            if not chunk:
+                raise asyncio.IncompleteReadError(data, None)
+            data += chunk
+        self._framed = data == frame_magic
+        if not self._framed:
+            self._excess_data = data
+        return self._framed
+
+    def _finish(self, outputs: list[str]) -> None:
+        """
+        Queues the last outputs and the end-of-conversation signal.
+
+        Args:
+            outputs: The strings to be sent to the client.
+        """
+        metrics.increment("turns")
+        if not self._framed:
+            self._send(Interpreter._encode(outputs) + exit_signal)
+            return
+        self._send(encode_frame(EXIT, "".join(o + "\n" for o in outputs)))
+
+    async def _input(self) -> str:
+        """
+        Waits for client input up to the delimiter.
+
+        An input longer than the limit of the stream is gathered chunk by chunk,
+        as `Interpreter._input` does, so that it is accepted rather than failing
+        the connection.
+
+        Returns:
+            str: The input data received from the client up to the delimiter.
+
+        Raises:
+            asyncio.IncompleteReadError: If the client disconnects before sending
+                the delimiter.
+        """
+        if not self._excess_data:
+            try:
+                data: bytes = await self._reader.readuntil(delimiter)
+                return data[: -len(delimiter)].decode()
+            except asyncio.LimitOverrunError:
+                # the bytes are left in the stream's buffer and read below
+                pass
+        buffer: bytearray = bytearray(self._excess_data)
+        index: int = buffer.find(delimiter)
+        while index < 0:
+            searched: int = max(0, len(buffer) - len(delimiter) + 1)
+            chunk: bytes = await self._reader.read(1 << 16)
+            if not chunk:
+                raise asyncio.IncompleteReadError(bytes(buffer), None)
+            buffer += chunk
+            index = buffer.find(delimiter, searched)
+        self._excess_data = bytes(buffer[index + len(delimiter) :])
+        return buffer[:index].decode()
+
+    def _send(self, data: bytes) -> None:
+        """
+        Queues everything for one turn as a single write.
+
+        Args:
+            data: The bytes to be sent to the client.
+        """
+        self._writer.write(data)
+        metrics.increment("writes")
+
+
+async def serve_asyncio(
+    program: Program | None,
+    host: str,
+    port: int,
+    reuse_port: bool = False,
+    code: Code | None = None,
+    reloader: Reloader | None = None,
+    registry: Registry | None = None,
+    backlog: int = 128,
+) -> None:
+    """
+    Serves the program from a single asyncio event loop.
+
+    Every connection is a coroutine, so a session waiting for the client to type
+    does not hold an OS thread.
+
+    Args:
+        program: The parsed program to run for every connection, or None with a
+            registry.
+        host: The host to listen on.
+        port: The port to listen on.
+        reuse_port: Whether to bind with SO_REUSEPORT.
+        code: The program compiled to bytecode, to run it on the virtual machine.
+        reloader: The reloader whose current version of the program every new
+            connection runs instead, if the script is hot reloaded.
+        registry: The scripts every connection selects from instead, if the
+            server hosts a directory of scripts.
+        backlog: The maximum number of connections waiting to be accepted.
+    """
+
+    async def handle_connection(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        addr = writer.get_extra_info("peername")
+        writer.get_extra_info("socket").setsockopt(
+            socket.IPPROTO_TCP, socket.TCP_NODELAY, 1
+        )
+        print(f"Connected by {addr}")
+        # a session runs the version current when it starts until it ends
+        current, current_code = (
+            (program, code) if reloader is None else reloader.current
+        )
+        interpreter: AsyncInterpreter = AsyncInterpreter(
+            current, reader, writer, addr, current_code, registry
+        )
+        try:
+            await interpreter.run()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+        print(f"Disconnected by {addr}")
+
+    server = await asyncio.start_server(
+        handle_connection, host, port, reuse_port=reuse_port or None, backlog=backlog
+    )
+
+    print(f"Server is listening on {host}:{port}")
+
+    async with server:
+        await server.serve_forever()
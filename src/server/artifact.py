@@ -0,0 +1,238 @@
+"""
+Ahead-of-time compiled programs, cached on disk next to their scripts.
+
+`write_artifact` prepares a script, see `server.loader.prepare`, and pickles the
+resulting program into a `.dslc` file. `load_cached` loads that file instead of
+parsing the script when it is fresh, that is when it was written:
+
+- from a script with the same SHA-256 hash as the current one;
+- by the same engine, as identified by the hash of the modules that build and
+  pickle programs;
+- with the same optimize setting.
+
+Any other artifact, or one that cannot be read, is ignored and the script is
+parsed as usual. Loading a fresh artifact does not import the lexer, the parser
+or PLY at all, which is most of the time a cold start would otherwise take.
+Artifacts are pickles, so they must only be loaded from trusted
+directories, like the scripts themselves.
+"""
+
+__all__: list[str] = [
+    "ARTIFACT_SUFFIX",
+    "FORMAT_VERSION",
+    "artifact_path",
+    "engine_version",
+    "decode_source",
+    "write_artifact",
+    "read_artifact",
+    "load_cached",
+]
+
+import functools
+import hashlib
+import os
+import pickle
+from server.language import Program
+from server.loader import load, prepare
+
+ARTIFACT_SUFFIX: str = ".dslc"
+
+FORMAT_VERSION: int = 1
+"""The version of the layout of an artifact file."""
+
+_MAGIC: bytes = b"DSLC"
+
+_ENGINE_MODULES: tuple[str, ...] = (
+    "language.py",
+    "lexer.py",
+    "parser.py",
+    "scanner.py",
+    "optimizer.py",
+    "inference.py",
+    "loader.py",
+    "artifact.py",
+)
+
+
+def artifact_path(filename: str) -> str:
+    """
+    Returns the default path of the artifact of a script.
+
+    Args:
+        filename: The path to the script.
+
+    Returns:
+        str: The path with its suffix replaced by `ARTIFACT_SUFFIX`.
+    """
+    return os.path.splitext(filename)[0] + ARTIFACT_SUFFIX
+
+
+@functools.cache
+def engine_version() -> str:
+    """
+    Returns an identifier of the engine that builds and pickles programs.
+
+    It changes whenever the source of one of the modules that define the syntax
+    tree, or build and annotate it, changes, so that an artifact written by
+    another version of the server is never loaded.
+
+    Returns:
+        str: The SHA-256 hash of those modules, in hexadecimal.
+    """
+    digest = hashlib.sha256()
+    directory: str = os.path.dirname(os.path.abspath(__file__))
+    for name in _ENGINE_MODULES:
+        with open(file=os.path.join(directory, name), mode="rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def decode_source(source: bytes) -> str:
+    """
+    Decodes a script read as bytes, as reading it in text mode would.
+
+    Args:
+        source: The source of the script, as read from its file.
+
+    Returns:
+        str: The source with universal newlines.
+    """
+    return source.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _header(source: bytes, optimize: bool) -> dict[str, object]:
+    """
+    Returns the header identifying an artifact of a source.
+
+    Args:
+        source: The source of the script, as read from its file.
+        optimize: Whether the program is optimized.
+
+    Returns:
+        dict[str, object]: The format version, engine version, source hash and
+        optimize setting.
+    """
+    return {
+        "format": FORMAT_VERSION,
+        "engine": engine_version(),
+        "source": hashlib.sha256(source).hexdigest(),
+        "optimize": optimize,
+    }
+
+
+def write_artifact(
+    filename: str, output: str | None = None, optimize: bool = True
+) -> str:
+    """
+    Prepares a script and writes its program to an artifact file.
+
+    The file is written under a temporary name and then renamed, so a server
+    starting at the same time reads either the old artifact or the new one.
+
+    Args:
+        filename: The path to the script.
+        output: The path to write to, by default `artifact_path(filename)`.
+        optimize: Whether to fold constants and remove unreachable code.
+
+    Returns:
+        str: The path of the written artifact.
+
+    Raises:
+        SyntaxError: If the script cannot be loaded.
+    """
+    with open(file=filename, mode="rb") as file:
+        source: bytes = file.read()
+    program: Program = prepare(decode_source(source), optimize)
+    path: str = output if output is not None else artifact_path(filename)
+    temporary: str = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(file=temporary, mode="wb") as file:
+            file.write(_MAGIC)
+            pickle.dump(_header(source, optimize), file, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(program, file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+    return path
+
+
+def read_artifact(path: str, source: bytes, optimize: bool = True) -> Program | None:
+    """
+    Reads the program of an artifact, if it is fresh for the given source.
+
+    Args:
+        path: The path of the artifact.
+        source: The current source of the script, as read from its file.
+        optimize: Whether the program should be optimized.
+
+    Returns:
+        Program | None: The linked, annotated and compiled program, or None if the
+        artifact is missing, stale or unreadable.
+    """
+    try:
+        with open(file=path, mode="rb") as file:
+            if file.read(len(_MAGIC)) != _MAGIC:
+                return None
+            if pickle.load(file) != _header(source, optimize):
+                return None
+            program = pickle.load(file)
+            if not isinstance(program, Program):
+                return None
+            program.compile()
+    except Exception:
+        # a damaged file fails to unpickle, or unpickles into a tree that fails
+        # to compile, in too many ways to list; either way it is not fresh
+        return None
+    return program
+
+
+def load_cached(
+    filename: str, optimize: bool = True, lexer: str = "ply", parse_workers: int = 0
+) -> Program:
+    """
+    Loads a script from its artifact if it is fresh, or else from its source.
+
+    A stale artifact is left as it is; `write_artifact` replaces it.
+
+    Args:
+        filename: The path to the script.
+        optimize: Whether to fold constants and remove unreachable code.
+        lexer: The tokenizer for the source, either "ply" or "scanner", see
+            `server.loader.prepare`.
+        parse_workers: The number of processes to parse the source in, see
+            `server.loader.prepare`.
+
+    Returns:
+        Program: The linked and compiled program.
+
+    Raises:
+        SyntaxError: If the artifact is not fresh and the script cannot be loaded.
+    """
+    with open(file=filename, mode="rb") as file:
+        source: bytes = file.read()
+    program: Program | None = read_artifact(artifact_path(filename), source, optimize)
+    if program is None:
+        program = load(decode_source(source), optimize, lexer, parse_workers)
+    return program
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(
+        description="Compile a script ahead of time into an artifact file."
+    )
+    arg_parser.add_argument("filename", help="The path to the source file.")
+    arg_parser.add_argument(
+        "-o", "--output", help="The path of the artifact (default: <script>.dslc)."
+    )
+    arg_parser.add_argument(
+        "--no-optimize",
+        action="store_true",
+        help="Do not fold constants or remove unreachable code.",
+    )
+    args = arg_parser.parse_args()
+
+    written: str = write_artifact(args.filename, args.output, not args.no_optimize)
+    print(f"wrote {written} ({os.path.getsize(written)} bytes)")
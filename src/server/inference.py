@@ -0,0 +1,234 @@
+"""
+A load-time type inference pass.
+
+Every variable is given the type of all the values assigned to it anywhere in the
+program: `need` and `input` always store strings, and a `let` stores the type of
+its expression. The types of expressions follow from those of their operands,
+literals and casts. Since a variable's type covers every assignment, it holds at
+every point of every session, and the engine may rely on it:
+
+- an expression known to be "integer" or "string" always evaluates to a value of
+  that class, or fails for another reason (an unset variable, a division by zero,
+  a string that is not a number);
+- an operation that could only ever fail with a type error, such as subtracting
+  from a string or comparing an integer with a string, is reported at load time.
+"""
+
+__all__: list[str] = [
+    "INTEGER",
+    "STRING",
+    "UNKNOWN",
+    "infer_types",
+]
+
+from server.language import (
+    Literal,
+    Variable,
+    Expression,
+    BooleanExpression,
+    LetStatement,
+    InputStatement,
+    OutputStatement,
+    Branch,
+    Program,
+)
+
+INTEGER: str = "integer"
+STRING: str = "string"
+UNKNOWN: str = "unknown"
+"""The type of a variable assigned both integers and strings."""
+
+_ORDERINGS: frozenset[str] = frozenset(("<", "<=", ">", ">="))
+
+
+def infer_types(program: Program) -> dict[str, str | None]:
+    """
+    Infers the type of every variable and expression of a program.
+
+    Expressions and variables are annotated with their types, see
+    `Expression.type`, which `compile` uses to pick specialized closures. The
+    program must therefore be annotated before it is compiled.
+
+    Args:
+        program: The linked program.
+
+    Returns:
+        dict[str, str | None]: The type of every variable: INTEGER, STRING,
+        UNKNOWN, or None for a variable that is read but never assigned.
+
+    Raises:
+        RuntimeError: If the program has not been linked.
+        SyntaxError: If an expression or condition can only fail with a type error.
+    """
+    if not program.linked:
+        raise RuntimeError("program must be linked before its types are inferred")
+    types: dict[str, str | None] = {name: None for name in program.variables}
+    for need in program.needs:
+        types[need.var_id] = STRING
+    lets: list[LetStatement] = []
+    for procedure in program.procedures:
+        for statement in procedure.statements:
+            if isinstance(statement, InputStatement):
+                types[statement.var_id] = STRING
+            elif isinstance(statement, LetStatement):
+                lets.append(statement)
+
+    # each variable can only move from None to a type and then to UNKNOWN, so this
+    # settles after a few rounds
+    changed: bool = True
+    while changed:
+        changed = False
+        for let in lets:
+            joined = _join(types[let.var_id], _type_of(let.expr, types, None))
+            if joined != types[let.var_id]:
+                types[let.var_id] = joined
+                changed = True
+
+    errors: list[str] = []
+    for procedure in program.procedures:
+        context: str = f"procedure {procedure.name!r}"
+        for statement in procedure.statements:
+            if isinstance(statement, (LetStatement, OutputStatement)):
+                _type_of(statement.expr, types, errors, context)
+        for branch in procedure.branches:
+            if isinstance(branch, Branch):
+                _check_condition(branch.bexpr, types, errors, context)
+    if errors:
+        raise SyntaxError("\n".join(errors))
+    return types
+
+
+def _join(lef: str | None, rig: str | None) -> str | None:
+    """
+    Returns the type of a variable assigned values of both given types.
+
+    Args:
+        lef: A type, or None for no value.
+        rig: A type, or None for no value.
+
+    Returns:
+        str | None: The common type, UNKNOWN if they differ.
+    """
+    if lef is None or lef == rig:
+        return rig
+    if rig is None:
+        return lef
+    return UNKNOWN
+
+
+def _known(type_name: str | None) -> str | None:
+    """
+    Returns the annotation for an inferred type.
+
+    Args:
+        type_name: An inferred type.
+
+    Returns:
+        str | None: INTEGER or STRING, or None if the type is not definite.
+    """
+    return type_name if type_name in (INTEGER, STRING) else None
+
+
+def _type_of(
+    word,
+    types: dict[str, str | None],
+    errors: list[str] | None,
+    context: str = "",
+) -> str | None:
+    """
+    Infers the type of a literal, variable or expression.
+
+    Args:
+        word: The node to infer the type of.
+        types: The types of the variables inferred so far.
+        errors: The list to append type errors to and annotate the nodes, or None
+            to only compute the type.
+        context: Where the node is, for error messages.
+
+    Returns:
+        str | None: The type of the node, or None if it never produces a value.
+    """
+    if isinstance(word, Literal):
+        return word.type
+    if isinstance(word, Variable):
+        type_name: str | None = types.get(word.name)
+        if errors is not None:
+            word.annotate(_known(type_name))
+        return type_name
+
+    words: tuple = word.words
+    operands: list[str | None] = [
+        _type_of(child, types, errors, context)
+        for child in words
+        if isinstance(child, (Literal, Variable, Expression))
+    ]
+    if len(words) == 1:
+        result: str | None = operands[0]
+    elif None in operands:
+        result = None
+    elif len(words) == 3 and words[1] == "to":
+        result = words[2]
+    elif len(words) == 3 and words[1] == "+":
+        if INTEGER in operands and STRING in operands:
+            _report(errors, context, f"cannot add {operands[0]} and {operands[1]}")
+            result = None
+        elif INTEGER in operands:
+            result = INTEGER
+        elif STRING in operands:
+            result = STRING
+        else:
+            result = UNKNOWN
+    else:
+        if STRING in operands:
+            operator: str = words[0] if len(words) == 2 else words[1]
+            _report(errors, context, f"cannot apply {operator!r} to a string")
+            result = None
+        else:
+            result = INTEGER
+    if errors is not None:
+        word.annotate(_known(result))
+    return result
+
+
+def _check_condition(
+    bexpr: BooleanExpression,
+    types: dict[str, str | None],
+    errors: list[str],
+    context: str,
+) -> None:
+    """
+    Annotates the operands of a branch condition and reports its type errors.
+
+    Args:
+        bexpr: The condition.
+        types: The types of the variables.
+        errors: The list to append type errors to.
+        context: Where the condition is, for error messages.
+    """
+    words: tuple = bexpr.words
+    if len(words) == 2:
+        _check_condition(words[1], types, errors, context)
+        return
+    if words[1] in ("and", "or"):
+        _check_condition(words[0], types, errors, context)
+        _check_condition(words[2], types, errors, context)
+        return
+    lef: str | None = _type_of(words[0], types, errors, context)
+    rig: str | None = _type_of(words[2], types, errors, context)
+    if words[1] in _ORDERINGS and {lef, rig} == {INTEGER, STRING}:
+        _report(errors, context, f"cannot compare {lef} {words[1]} {rig}")
+    elif words[1] == "like" and INTEGER in (lef, rig):
+        _report(errors, context, "like needs a string and a string pattern")
+
+
+def _report(errors: list[str] | None, context: str, message: str) -> None:
+    """
+    Records a type error, unless only types are being computed.
+
+    Args:
+        errors: The list of errors, or None.
+        context: Where the error is.
+        message: What the error is.
+    """
+    if errors is not None:
+        errors.append(f"type error in {context}: {message}")
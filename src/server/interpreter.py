@@ -8,73 +8,86 @@ __all__: list[str] = [
 
 from config import delimiter
 from config import exit_signal
+from protocol import (
+    PROMPT,
+    EXIT,
+    INPUT,
+    SCRIPT,
+    encode_frame,
+    FrameReader,
+    accept_upgrade,
+)
 from server.language import (
-    StringValue,
     Value,
-    Expression,
-    BooleanExpression,
-    Need,
-    InputStatement,
-    OutputStatement,
-    LetStatement,
-    Procedure,
-    Branch,
-    Default,
     Program,
 )
-from server.interface import (
-    process_natrual_language,
-    generate_multimedia_response,
-)
+from server.session import Session
+from server.vm import Code
+from server.metrics import metrics
+from server.registry import SCRIPT_PROMPT, Registry
 
 
 class Interpreter:
     """
     Interpreter for the language.
+
+    It serves one Session over a blocking socket connection, starting in the
+    delimiter protocol and switching to the framed protocol if the client answers
+    the first prompt with a frame, see `protocol`. With a registry, the client
+    first selects the script to run, see `server.registry`.
     """
 
-    def __init__(self, program: Program, conn, addr) -> None:
+    def __init__(
+        self,
+        program: Program | None,
+        conn,
+        addr,
+        code: Code | None = None,
+        registry: Registry | None = None,
+    ) -> None:
         """
         Initializes an Interpreter instance.
 
         Args:
-            program: The Program object representing the program to run.
+            program: The Program object representing the program to run, or None
+                to run the script the client selects from the registry.
             conn: The socket object representing the connection to the client.
             addr: The address of the client.
-        """
-        self._program: Program = program
+            code: The program compiled to bytecode, to run it on the virtual
+                machine instead of walking its syntax tree.
+            registry: The scripts the client selects from, if no program is given.
+        """
+        self._session: Session | None = (
+            Session(program, code) if program is not None else None
+        )
+        self._registry: Registry | None = registry
         self._conn = conn
         self._addr = addr
         self._excess_data: bytes = b""
-        self._vartable: dict[str, Value] = {}
+        self._framed: bool = False
+        self._frames: FrameReader | None = None
+        self._negotiated: bool = False
 
     def run(self) -> None:
         """
         Runs the program.
 
-        This method executes the procedures in the program from top to bottom. For each
-        procedure, it executes the statements in the procedure from top to bottom. If a
-        branch statement is encountered, it branches to the specified procedure. If a
-        default statement is encountered, it branches to the specified procedure. If the
-        end of the program is reached, it sends a special exit signal to the client and
-        terminates the connection.
+        This method starts the session and sends its outputs to the client. Whenever the session waits for input, it reads a line from the
+        client and feeds it to the session. If the end of the program is reached, it
+        sends a special exit signal to the client and terminates the connection.
 
         :return: None
         """
-        for need in self._program.needs:
-            self._execute_need(need)
-
-        current_procedure = self._program.procedures[0]
-
-        while current_procedure is not None:
-            next_proc_name = self._execute_procedure(current_procedure)
-            current_procedure = None
-            for proc in self._program.procedures:
-                if proc.name == next_proc_name:
-                    current_procedure = proc
-                    break
+        if self._session is None:
+            error: str | None = self._select()
+            if error is not None:
+                self._finish([error])
+                return
 
-        self._conn.sendall(exit_signal)
+        outputs: list[str] = self._session.start()
+        while not self._session.finished:
+            outputs = self._session.feed(self._prompt(outputs))
+        self._finish(outputs)
 
     def get_vartable(self) -> dict[str, Value]:
         """
@@ -82,151 +95,139 @@ class Interpreter:
 
         :return: A dictionary mapping variable ids to their values.
         """
-        return self._vartable
+        return self._session.get_vartable()
 
-    def _calculate(self, expression: Expression) -> Value:
+    def _select(self) -> str | None:
         """
-        Calculates the value of the given expression.
+        Creates the session of the script the client names.
 
-        Args:
-            expression: The expression to be calculated.
+        The name is asked for with a prompt, which a client switching to the
+        framed protocol may answer with a SCRIPT frame.
 
         Returns:
-            Value: The value of the expression.
-        """
-        return expression.get_value(self._vartable)
+            str | None: Why the session could not be created, for the client, or
+            None if it was.
+
+        Raises:
+            ConnectionError: If the client closes the connection or breaks the
+                protocol.
+        """
+        name: str = self._prompt([SCRIPT_PROMPT], script=True)
+        try:
+            program, code = self._registry.get(name)
+        except KeyError as error:
+            return error.args[0]
+        self._session = Session(program, code)
+        return None
 
-    def _check_condition(self, bexpr: BooleanExpression) -> bool:
+    def _prompt(self, outputs: list[str], script: bool = False) -> str:
         """
-        Checks the condition of the given boolean expression.
+        Sends the outputs of a turn, then waits for the client's input.
 
         Args:
-            bexpr: The boolean expression to be checked.
+            outputs: The strings to be sent to the client.
+            script: Whether the prompt asks for a script, which a SCRIPT frame
+                then answers; otherwise a SCRIPT frame is ignored and the outputs
+                are sent again.
 
         Returns:
-            bool: The result of the condition check.
-        """
-        return bexpr.get_value(self._vartable)
+            str: The input received from the client.
 
-    def _execute_need(self, need: Need) -> None:
+        Raises:
+            ConnectionError: If the client closes the connection or breaks the
+                protocol.
         """
-        Executes a need statement by prompting the client for input for a required variable.
-
-        Args:
-            need: The Need instance containing the variable id to be prompted for input.
+        metrics.increment("turns")
+        if self._framed:
+            self._send(encode_frame(PROMPT, "".join(o + "\n" for o in outputs)))
+        else:
+            self._send(self._encode(outputs) + delimiter)
+            if not self._upgrade():
+                return self._input()
+        kind, payload = self._frames.read()
+        if kind == SCRIPT and not script:
+            return self._prompt(outputs)
+        if kind not in (INPUT, SCRIPT):
+            raise ConnectionError(f"unexpected frame {kind!r} from {self._addr}")
+        return payload
 
-        This method outputs a message indicating the required variable, reads the input
-        from the client, and stores the input as a StringValue in the variable table.
+    def _upgrade(self) -> bool:
         """
-        var_id: str = need.var_id
-        self._output(output=f"{var_id} required: ")
-        result: str = self._input()
-        self._vartable[var_id] = StringValue(result)
+        Tells whether the answer to the first prompt switches to the framed protocol.
 
-    def _execute_let(self, var_id: str, expr: Expression) -> None:
-        """
-        Executes a let statement by calculating the given expression and
-        storing the result in the given variable id.
+        Returns:
+            bool: Whether the client switched just now.
 
-        Args:
-            var_id: The variable id to store the result of the expression in.
-            expr: The expression to be evaluated and stored in the variable.
+        Raises:
+            ConnectionError: If the client closes the connection.
         """
-        self._vartable[var_id] = self._calculate(expr)
+        if self._negotiated:
+            return False
+        self._negotiated = True
+        self._framed, self._excess_data = accept_upgrade(self._conn)
+        if self._framed:
+            self._frames = FrameReader(self._conn)
+        return self._framed
 
-    def _execute_input(self, var_id: str) -> None:
+    def _finish(self, outputs: list[str]) -> None:
         """
-        Executes an input statement by reading a line of input from the
-        connection and storing the result in the given variable id.
+        Sends the last outputs and signals the end of the conversation.
 
         Args:
-            var_id: The variable id to store the result of the input in.
+            outputs: The strings to be sent to the client.
         """
-        text: str = self._input()
-        result: str = process_natrual_language(text)
-        self._vartable[var_id] = StringValue(result)
+        metrics.increment("turns")
+        if not self._framed:
+            self._send(self._encode(outputs) + exit_signal)
+            return
+        self._send(encode_frame(EXIT, "".join(o + "\n" for o in outputs)))
 
-    def _execute_output(self, expr: Expression) -> None:
-        """
-        Executes an output statement by evaluating the given expression and
-        sending the result to the client.
-
-        Args:
-            expr: The expression to be evaluated and sent to the client.
+    def _input(self) -> str:
         """
-        value = self._calculate(expr)
-        self._output(output=value.value)
+        Reads input from the connection until a delimiter is encountered.
 
-    def _execute_statement(self, statement) -> None:
-        """
-        Executes a statement by delegating to the appropriate method.
+        Continuously receives data in chunks until the delimiter is found, searching
+        only the bytes that have not been searched yet. Stores the data after the
+        delimiter for future reads, and returns the decoded string of the data up to
+        the delimiter.
 
-        Args:
-            statement: The statement to be executed.
+        Returns:
+            str: The input data received from the client up to the delimiter.
 
         Raises:
-            RuntimeError: If the statement is unknown.
-        """
-        if isinstance(statement, LetStatement):
-            self._execute_let(statement.var_id, statement.expr)
-        elif isinstance(statement, InputStatement):
-            self._execute_input(statement.var_id)
-        elif isinstance(statement, OutputStatement):
-            self._execute_output(statement.expr)
-        else:
-            raise RuntimeError(f"unknown statement type: {statement}")
+            ConnectionError: If the client closes the connection.
+        """
+        data: bytearray = bytearray(self._excess_data)
+        index: int = data.find(delimiter)
+        while index < 0:
+            searched: int = max(0, len(data) - len(delimiter) + 1)
+            chunk = self._conn.recv(4096)
+            if not chunk:
+                raise ConnectionError(f"connection closed by {self._addr}")
+            data += chunk
+            index = data.find(delimiter, searched)
+        self._excess_data = bytes(data[index + len(delimiter) :])
+        return data[:index].decode()
 
-    def _execute_procedure(self, procedure: Procedure) -> str | None:
+    def _send(self, data: bytes) -> None:
         """
-        Executes a procedure by executing its statements and evaluating its branches.
+        Sends everything for one turn to the client in a single write.
 
         Args:
-            procedure: The Procedure instance to be executed.
-
-        Returns:
-            str | None: The id of the procedure to call next if a branch evaluates to
-                True, or None if no branch evaluates to True.
-        """
-        for statement in procedure.statements:
-            self._execute_statement(statement)
-        for branch in procedure.branches:
-            if isinstance(branch, Branch):
-                if self._check_condition(branch.bexpr):
-                    return branch.proc_name
-            elif isinstance(branch, Default):
-                return branch.proc_name
-        return None
-
-    def _input(self) -> str:
+            data: The bytes to be sent to the client.
         """
-        Reads input from the connection until a delimiter is encountered.
+        self._conn.sendall(data)
+        metrics.increment("writes")
 
-        Sends a delimiter to the client to signal readiness to receive data.
-        Continuously receives data in chunks and appends it until the delimiter
-        is found. Splits the data at the delimiter, stores excess data for future
-        reads, and returns the decoded string of the data up to the delimiter.
-
-        Returns:
-            str: The input data received from the client up to the delimiter.
+    @staticmethod
+    def _encode(outputs: list[str]) -> bytes:
         """
-        self._conn.sendall(delimiter)
-        data = self._excess_data
-        while True:
-            chunk = self._conn.recv(1024)
-            data += chunk
-            if delimiter in data:
-                break
-        excess_data: bytes = data.split(delimiter, 1)[1]
-        data: bytes = data.split(delimiter, 1)[0]
-        self._excess_data: bytes = excess_data
-        return data.decode()
-
-    def _output(self, output: str) -> None:
-        """
-        Sends the given output string to the client, followed by a newline.
+        Encodes output strings for the delimiter protocol, each followed by a newline.
 
         Args:
-            output: The string to be sent to the client.
+            outputs: The strings to be sent to the client.
+
+        Returns:
+            bytes: The encoded outputs.
         """
-        response = generate_multimedia_response(output)
-        self._conn.sendall((response + "\n").encode())
+        return "".join(output + "\n" for output in outputs).encode()
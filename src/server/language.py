@@ -6,6 +6,8 @@ __all__: tuple[str] = (
     "IntegerValue",
     "StringValue",
     "Value",
+    "integer_value",
+    "string_value",
     "Literal",
     "Variable",
     "Expression",
@@ -21,13 +23,22 @@ __all__: tuple[str] = (
 )
 
 import re
+import sys
+import functools
+from collections.abc import Callable
+from operator import eq, ne, lt, le, gt, ge, itemgetter
 
 
 class Value:
     """
-    A base class representing a value.
+    A base class representing an immutable value.
+
+    Values never change once created, so one instance can be shared by every
+    literal, session and variable that holds it.
     """
 
+    __slots__ = ("_value",)
+
     def __init__(self, value: object) -> None:
         """
         Initializes a Value instance.
@@ -35,7 +46,16 @@ class Value:
         Args:
             value: An object to be stored in the Value instance.
         """
-        self._value: object = value
+        _set_value(self, value)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        """
+        Refuses to modify the Value instance.
+
+        Raises:
+            AttributeError: Always, since values are immutable.
+        """
+        raise AttributeError(f"{type(self).__name__} is immutable")
 
     def __repr__(self) -> str:
         """
@@ -71,12 +91,35 @@ class Value:
             return self.value == other.value
         return False
 
+    def __hash__(self) -> int:
+        """
+        Returns the hash of the stored object, consistent with `__eq__`.
+
+        Returns:
+            int: The hash of the value stored in the instance.
+        """
+        return hash(self._value)
+
+    def __reduce__(self) -> tuple:
+        """
+        Pickles the Value instance by its constructor, since it refuses `setattr`.
+
+        Returns:
+            tuple: The class and the arguments to recreate the instance.
+        """
+        return type(self), (self._value,)
+
+
+_set_value = Value._value.__set__
+
 
 class IntegerValue(Value):
     """
     A class representing an integer value.
     """
 
+    __slots__ = ()
+
     def __init__(self, value: int) -> None:
         """
         Initializes an IntegerValue instance.
@@ -99,12 +142,24 @@ class IntegerValue(Value):
         """
         return self.value
 
+    def __reduce__(self) -> tuple:
+        """
+        Pickles the IntegerValue instance by `integer_value`, so that unpickled small
+        integers are the shared instances.
+
+        Returns:
+            tuple: The function and the arguments to recreate the instance.
+        """
+        return integer_value, (self._value,)
+
 
 class StringValue(Value):
     """
     A class representing a string value.
     """
 
+    __slots__ = ()
+
     def __init__(self, value: str) -> None:
         """
         Initializes a StringValue instance.
@@ -127,6 +182,56 @@ class StringValue(Value):
         """
         return self.value
 
+    def __reduce__(self) -> tuple:
+        """
+        Pickles the StringValue instance by `string_value`, so that unpickled strings
+        are interned like the literals the lexer builds.
+
+        Returns:
+            tuple: The function and the arguments to recreate the instance.
+        """
+        return string_value, (self._value,)
+
+
+_SMALL_INTEGERS: tuple[IntegerValue, ...] = tuple(
+    IntegerValue(value) for value in range(-5, 257)
+)
+
+
+def integer_value(value: int) -> IntegerValue:
+    """
+    Returns an IntegerValue holding the given integer, shared for small integers.
+
+    Like CPython's own small-integer cache, the values from -5 to 256 are created
+    once, so loop counters and indexes do not allocate on every operation.
+
+    Args:
+        value: The integer to hold.
+
+    Returns:
+        IntegerValue: The shared instance for a small integer, or a new one.
+    """
+    if -5 <= value <= 256:
+        return _SMALL_INTEGERS[value + 5]
+    return IntegerValue(value)
+
+
+@functools.lru_cache(maxsize=4096)
+def string_value(value: str) -> StringValue:
+    """
+    Returns an interned StringValue holding the given string.
+
+    Used for string literals, so that a literal repeated across a program, or
+    across the programs loaded by one server, is a single object.
+
+    Args:
+        value: The string to hold.
+
+    Returns:
+        StringValue: The shared instance for the string.
+    """
+    return StringValue(sys.intern(value))
+
 
 def positive(val: Value) -> Value:
     """
@@ -142,7 +247,7 @@ def positive(val: Value) -> Value:
         RuntimeError: If the input value is not an IntegerValue.
     """
     if isinstance(val, IntegerValue):
-        return IntegerValue(+val.value)
+        return integer_value(+val.value)
     raise RuntimeError(f"Unable to calculate positive({val})")
 
 
@@ -160,7 +265,7 @@ def negative(val: Value) -> Value:
         RuntimeError: If the input value is not an IntegerValue.
     """
     if isinstance(val, IntegerValue):
-        return IntegerValue(-val.value)
+        return integer_value(-val.value)
     raise RuntimeError(f"Unable to calculate negative({val})")
 
 
@@ -179,7 +284,7 @@ def add(lhs: Value, rhs: Value) -> Value:
         RuntimeError: If the input value is not an IntegerValue or a StringValue.
     """
     if isinstance(lhs, IntegerValue) and isinstance(rhs, IntegerValue):
-        return IntegerValue(lhs.value + rhs.value)
+        return integer_value(lhs.value + rhs.value)
     if isinstance(lhs, StringValue) and isinstance(rhs, StringValue):
         return StringValue(lhs.value + rhs.value)
     raise RuntimeError(f"Unable to calculate add({lhs}, {rhs})")
@@ -200,7 +305,7 @@ def sub(lhs: Value, rhs: Value) -> Value:
         RuntimeError: If the input value is not an IntegerValue.
     """
     if isinstance(lhs, IntegerValue) and isinstance(rhs, IntegerValue):
-        return IntegerValue(lhs.value - rhs.value)
+        return integer_value(lhs.value - rhs.value)
     raise RuntimeError(f"Unable to calculate sub({lhs}, {rhs})")
 
 
@@ -219,7 +324,7 @@ def mul(lhs: Value, rhs: Value) -> Value:
         RuntimeError: If the input value is not an IntegerValue.
     """
     if isinstance(lhs, IntegerValue) and isinstance(rhs, IntegerValue):
-        return IntegerValue(lhs.value * rhs.value)
+        return integer_value(lhs.value * rhs.value)
     raise RuntimeError(f"Unable to calculate mul({lhs}, {rhs})")
 
 
@@ -238,7 +343,7 @@ def div(lhs: Value, rhs: Value) -> Value:
         RuntimeError: If the input value is not an IntegerValue.
     """
     if isinstance(lhs, IntegerValue) and isinstance(rhs, IntegerValue):
-        return IntegerValue(lhs.value // rhs.value)
+        return integer_value(lhs.value // rhs.value)
     raise RuntimeError(f"Unable to calculate div({lhs}, {rhs})")
 
 
@@ -257,7 +362,7 @@ def mod(lhs: Value, rhs: Value) -> Value:
         RuntimeError: If the input value is not an IntegerValue.
     """
     if isinstance(lhs, IntegerValue) and isinstance(rhs, IntegerValue):
-        return IntegerValue(lhs.value % rhs.value)
+        return integer_value(lhs.value % rhs.value)
     raise RuntimeError(f"Unable to calculate mod({lhs}, {rhs})")
 
 
@@ -277,17 +382,49 @@ def cast(val: Value, cast_type: str) -> Value:
     """
 
     if cast_type == "integer":
-        return IntegerValue(int(val.value))
+        return integer_value(int(val.value))
     if cast_type == "string":
         return StringValue(str(val.value))
     raise RuntimeError(f"Unable to cast {val} to {cast_type}")
 
 
+Frame = list[Value | tuple[object, bool] | None]
+"""The variables of one session, indexed by the slots assigned by `Program.link`, then
+the caches of its repeated conditions, see `_share_conditions`."""
+
+Evaluator = Callable[[Frame | dict[str, Value]], Value]
+"""A compiled expression: called with a frame (or, before linking, a variable table),
+returns the expression's value."""
+
+_UNARY_OPERATORS: dict[str, Callable[[Value], Value]] = {
+    "+": positive,
+    "-": negative,
+}
+
+_BINARY_OPERATORS: dict[str, Callable[[Value, Value], Value]] = {
+    "+": add,
+    "-": sub,
+    "*": mul,
+    "/": div,
+    "%": mod,
+}
+
+_INTEGER_OPERATORS: dict[str, Callable[[int, int], int]] = {
+    "+": int.__add__,
+    "-": int.__sub__,
+    "*": int.__mul__,
+    "/": int.__floordiv__,
+    "%": int.__mod__,
+}
+
+
 class Literal:
     """
     A class representing a literal value.
     """
 
+    __slots__ = ("value", "_compiled")
+
     def __init__(self, value: object) -> None:
         """
         Initializes a Literal instance.
@@ -296,6 +433,7 @@ class Literal:
             value: An object to be stored in the Literal instance.
         """
         self.value: object = value
+        self._compiled: Evaluator | None = None
 
     def __repr__(self) -> str:
         """
@@ -316,12 +454,54 @@ class Literal:
         """
         return self.value
 
+    @property
+    def type(self) -> str | None:
+        """
+        Returns the type of the literal.
+
+        Returns:
+            str | None: "integer" or "string", after the class of the value.
+        """
+        if isinstance(self.value, IntegerValue):
+            return "integer"
+        if isinstance(self.value, StringValue):
+            return "string"
+        return None
+
+    @property
+    def compiled(self) -> Evaluator:
+        """
+        Returns the compiled form of the literal, compiling it on first use.
+
+        Returns:
+            Evaluator: A closure returning the literal's value.
+        """
+        if self._compiled is None:
+            self._compiled = self.compile()
+        return self._compiled
+
+    def compile(self) -> Evaluator:
+        """
+        Compiles the literal into a closure.
+
+        Returns:
+            Evaluator: A closure returning the literal's value.
+        """
+        value = self.value
+
+        def literal(_) -> Value:
+            return value
+
+        return literal
+
 
 class Variable:
     """
     A class representing a variable.
     """
 
+    __slots__ = ("name", "_slot", "_type", "_compiled")
+
     def __init__(self, name: str) -> None:
         """
         Initializes a Variable instance.
@@ -330,6 +510,9 @@ class Variable:
             name: The name of the variable.
         """
         self.name: str = name
+        self._slot: int | None = None
+        self._type: str | None = None
+        self._compiled: Evaluator | None = None
 
     def __repr__(self) -> str:
         """
@@ -354,15 +537,101 @@ class Variable:
             RuntimeError: If the variable is not found in the table.
         """
         if table.get(self.name) is None:
-            raise RuntimeError("Variable {self.name} not found")
+            raise RuntimeError(f"Variable {self.name} not found")
         return table[self.name]
 
+    @property
+    def slot(self) -> int | None:
+        """
+        Returns the index of the variable in a session's frame.
+
+        Returns:
+            int | None: The slot, or None if the program has not been linked.
+        """
+        return self._slot
+
+    def link(self, slot: int) -> None:
+        """
+        Assigns the variable its slot in a session's frame.
+
+        Once linked, the variable compiles to a lookup by index in a frame instead
+        of a lookup by name in a table.
+
+        Args:
+            slot: The index of the variable in the frame.
+        """
+        self._slot = slot
+        self._compiled = None
+
+    @property
+    def type(self) -> str | None:
+        """
+        Returns the type inferred for the variable.
+
+        Returns:
+            str | None: "integer" or "string" if every value of the variable is known
+            to have that type, or None if it is unknown or not inferred yet.
+        """
+        return self._type
+
+    def annotate(self, type_name: str | None) -> None:
+        """
+        Records the type inferred for the variable, see `server.inference`.
+
+        Args:
+            type_name: "integer", "string" or None if the type is unknown.
+        """
+        self._type = type_name
+
+    @property
+    def compiled(self) -> Evaluator:
+        """
+        Returns the compiled form of the variable, compiling it on first use.
+
+        Returns:
+            Evaluator: A closure looking the variable up in a table.
+        """
+        if self._compiled is None:
+            self._compiled = self.compile()
+        return self._compiled
+
+    def compile(self) -> Evaluator:
+        """
+        Compiles the variable into a closure.
+
+        Returns:
+            Evaluator: A closure looking the variable up in a frame by its slot if
+            it has been linked, or in a table by its name otherwise, and raising
+            RuntimeError if it is not set, like `get_value`.
+        """
+        name = self.name
+        slot: int | None = self._slot
+        if slot is not None:
+
+            def slot_variable(frame: Frame) -> Value:
+                value = frame[slot]
+                if value is None:
+                    raise RuntimeError(f"Variable {name} not found")
+                return value
+
+            return slot_variable
+
+        def variable(table: dict[str, Value]) -> Value:
+            value = table.get(name)
+            if value is None:
+                raise RuntimeError(f"Variable {name} not found")
+            return value
+
+        return variable
+
 
 class Expression:
     """
     A class representing an expression.
     """
 
+    __slots__ = ("words", "_type", "_compiled")
+
     def __init__(self, words: tuple) -> None:
         """
         Initializes an Expression instance.
@@ -371,6 +640,8 @@ class Expression:
             words: A tuple of words forming the expression.
         """
         self.words: tuple = words
+        self._type: str | None = None
+        self._compiled: Evaluator | None = None
 
     def __repr__(self) -> str:
         """
@@ -451,6 +722,191 @@ class Expression:
             return mod(lef_oprand, rig_oprand)
         raise RuntimeError(f"Unknown operator: {operator}")
 
+    @property
+    def compiled(self) -> Evaluator:
+        """
+        Returns the compiled form of the expression, compiling it on first use.
+
+        Returns:
+            Evaluator: A closure evaluating the expression.
+        """
+        if self._compiled is None:
+            self._compiled = self.compile()
+        return self._compiled
+
+    @property
+    def type(self) -> str | None:
+        """
+        Returns the type inferred for the expression.
+
+        Returns:
+            str | None: "integer" or "string" if every value of the expression is known
+            to have that type, or None if it is unknown or not inferred yet.
+        """
+        return self._type
+
+    def annotate(self, type_name: str | None) -> None:
+        """
+        Records the type inferred for the expression, see `server.inference`.
+
+        Args:
+            type_name: "integer", "string" or None if the type is unknown.
+        """
+        self._type = type_name
+        self._compiled = None
+
+    def compile(self) -> Evaluator:
+        """
+        Compiles the expression into a closure specialized for its structure.
+
+        The shape and operator of the expression are inspected once, here, instead of
+        on every evaluation as `get_value` does. The closure returns the same values
+        and raises the same errors as `get_value`. Structures that `get_value` would
+        reject are compiled to `get_value` itself, so they fail the same way.
+
+        Where the types of the operands have been inferred, arithmetic and casts
+        skip the checks of the value classes entirely.
+
+        Returns:
+            Evaluator: A closure evaluating the expression.
+        """
+        words: tuple = self.words
+        if len(words) == 1:
+            return words[0].compiled
+        if len(words) == 2 and words[0] in _UNARY_OPERATORS:
+            unary_func = _UNARY_OPERATORS[words[0]]
+            operand: Evaluator = words[1].compiled
+
+            def unary(table: dict[str, Value]) -> Value:
+                return unary_func(operand(table))
+
+            return unary
+        if len(words) == 3 and words[1] in _BINARY_OPERATORS:
+            binary_func = _BINARY_OPERATORS[words[1]]
+            integer_func = _INTEGER_OPERATORS[words[1]]
+            lhs: Evaluator = words[0].compiled
+            rhs: Evaluator = words[2].compiled
+            types: tuple[str | None, str | None] = (words[0].type, words[2].type)
+            if types == ("integer", "integer"):
+
+                def integer_operation(table: dict[str, Value]) -> Value:
+                    return integer_value(
+                        integer_func(lhs(table).value, rhs(table).value)
+                    )
+
+                return integer_operation
+            if types == ("string", "string") and words[1] == "+":
+                operands: list = self._concatenated()
+                if len(operands) > 2:
+                    return _join(operands)
+
+                def concatenation(table: dict[str, Value]) -> Value:
+                    return StringValue(lhs(table).value + rhs(table).value)
+
+                return concatenation
+
+            def binary(table: dict[str, Value]) -> Value:
+                lef = lhs(table)
+                rig = rhs(table)
+                if type(lef) is IntegerValue and type(rig) is IntegerValue:
+                    return integer_value(integer_func(lef.value, rig.value))
+                return binary_func(lef, rig)
+
+            return binary
+        if len(words) == 3 and words[1] == "to" and words[0].type == words[2]:
+            # casting to the type the value already has returns it unchanged
+            return words[0].compiled
+        if len(words) == 3 and words[1] == "to" and words[2] == "integer":
+            operand: Evaluator = words[0].compiled
+
+            def to_integer(table: dict[str, Value]) -> Value:
+                return integer_value(int(operand(table).value))
+
+            return to_integer
+        if len(words) == 3 and words[1] == "to" and words[2] == "string":
+            operand: Evaluator = words[0].compiled
+
+            def to_string(table: dict[str, Value]) -> Value:
+                return StringValue(str(operand(table).value))
+
+            return to_string
+        return self.get_value
+
+    def _concatenated(self) -> list:
+        """
+        Flattens a chain of string concatenations into its operands.
+
+        Parentheses and the grouping of `+` do not change a concatenation, so
+        `"a" + (${b} + "c") + ${d}` has the four operands `"a"`, `${b}`, `"c"` and
+        `${d}`. Only concatenations whose operands are both known to be strings are
+        flattened; any other operand is kept whole.
+
+        Returns:
+            list: The Literal, Variable and Expression operands, from left to right.
+        """
+        words: tuple = self.words
+        if len(words) == 1 and isinstance(words[0], Expression):
+            return words[0]._concatenated()
+        if (
+            len(words) == 3
+            and words[1] == "+"
+            and words[0].type == "string"
+            and words[2].type == "string"
+        ):
+            lef: list = (
+                words[0]._concatenated()
+                if isinstance(words[0], Expression)
+                else [words[0]]
+            )
+            rig: list = (
+                words[2]._concatenated()
+                if isinstance(words[2], Expression)
+                else [words[2]]
+            )
+            return lef + rig
+        return [self]
+
+
+def _join(operands: list) -> Evaluator:
+    """
+    Compiles a flattened chain of string concatenations into one join.
+
+    The literal operands are merged into static fragments once, here. Each
+    evaluation then fills the other operands into a copy of the fragments and joins
+    them, building one string instead of one per `+`. An operand that casts to a
+    string is converted in place, without building its StringValue.
+
+    Args:
+        operands: The operands of the chain, see `Expression._concatenated`.
+
+    Returns:
+        Evaluator: A closure evaluating the whole chain.
+    """
+    fragments: list[str | None] = []
+    dynamic: list[tuple[int, Evaluator, bool]] = []
+    for operand in operands:
+        if isinstance(operand, Literal):
+            if fragments and fragments[-1] is not None:
+                fragments[-1] += operand.value.value
+            else:
+                fragments.append(operand.value.value)
+            continue
+        words: tuple = operand.words if isinstance(operand, Expression) else ()
+        if len(words) == 3 and words[1] == "to" and words[2] == "string":
+            dynamic.append((len(fragments), words[0].compiled, True))
+        else:
+            dynamic.append((len(fragments), operand.compiled, False))
+        fragments.append(None)
+
+    def join(table: dict[str, Value]) -> Value:
+        pieces: list = fragments.copy()
+        for index, evaluator, to_string in dynamic:
+            value = evaluator(table).value
+            pieces[index] = str(value) if to_string else value
+        return StringValue("".join(pieces))
+
+    return join
+
 
 def match(text: str, pattern: str) -> bool:
     """
@@ -463,15 +919,60 @@ def match(text: str, pattern: str) -> bool:
     Returns:
         bool: True if the pattern is found in the text, False otherwise.
     """
-    regex: re.Pattern[str] = re.compile(pattern=pattern)
+    regex: re.Pattern[str] = _compile_pattern(pattern)
     return regex.search(string=text) is not None
 
 
+PATTERN_CACHE_SIZE: int = 256
+"""The number of dynamic `like` patterns kept compiled by `match`."""
+
+
+@functools.lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def _compile_pattern(pattern: str) -> re.Pattern[str]:
+    """
+    Compiles a `like` pattern, keeping the most recently used ones cached.
+
+    The cache is bounded and thread-safe. Patterns that are string literals are
+    compiled once per expression by `BooleanExpression.compile` and never reach it.
+
+    Args:
+        pattern: The regular expression pattern to compile.
+
+    Returns:
+        re.Pattern[str]: The compiled pattern.
+    """
+    return re.compile(pattern=pattern)
+
+
+def pattern_cache_info() -> functools._CacheInfo:
+    """
+    Returns the statistics of the dynamic `like` pattern cache.
+
+    Returns:
+        functools._CacheInfo: The hits, misses, maximum size and current size of the
+        cache.
+    """
+    return _compile_pattern.cache_info()
+
+
+_COMPARATORS: dict[str, Callable[[object, object], bool]] = {
+    "==": eq,
+    "!=": ne,
+    "<": lt,
+    "<=": le,
+    ">": gt,
+    ">=": ge,
+    "like": match,
+}
+
+
 class BooleanExpression:
     """
     A class representing a boolean expression.
     """
 
+    __slots__ = ("words", "_compiled", "_pattern")
+
     def __init__(self, words: tuple) -> None:
         """
         Initializes a BooleanExpression instance.
@@ -480,6 +981,8 @@ class BooleanExpression:
             words: A tuple of words forming the boolean expression.
         """
         self.words: tuple = words
+        self._compiled: Callable[[dict[str, Value]], bool] | None = None
+        self._pattern: re.Pattern[str] | None = None
 
     def __repr__(self) -> str:
         """
@@ -513,6 +1016,9 @@ class BooleanExpression:
         if len(self.words) == 3:
             operator = self.words[1]
             lef_oprand = self.words[0].get_value(table)
+            if isinstance(lef_oprand, bool) and lef_oprand is (operator == "or"):
+                # short-circuit: `false and ...` and `true or ...` are decided
+                return lef_oprand
             rig_oprand = self.words[2].get_value(table)
             if isinstance(lef_oprand, bool) and isinstance(rig_oprand, bool):
                 return self._bool_binop(lef_oprand, operator, rig_oprand)
@@ -566,18 +1072,120 @@ class BooleanExpression:
             result = lef.value > rig.value
         elif operator == ">=":
             result = lef.value >= rig.value
+        elif operator == "like" and self._pattern is not None:
+            result = self._pattern.search(lef.value) is not None
         elif operator == "like":
             result = match(text=lef.value, pattern=rig.value)
         else:
             raise RuntimeError(f"Unknown comparator: {operator}")
         return result
 
+    @property
+    def compiled(self) -> Callable[[dict[str, Value]], bool]:
+        """
+        Returns the compiled form of the boolean expression, compiling it on first use.
+
+        Returns:
+            Callable[[dict[str, Value]], bool]: A closure evaluating the expression.
+        """
+        if self._compiled is None:
+            self._compiled = self.compile()
+        return self._compiled
+
+    @property
+    def pattern(self) -> re.Pattern[str] | None:
+        """
+        Returns the precompiled regular expression of a `like` comparison whose
+        pattern is a string literal.
+
+        Returns:
+            re.Pattern[str] | None: The compiled pattern, or None if the expression is
+            not such a comparison or has not been compiled yet.
+        """
+        return self._pattern
+
+    def compile(self) -> Callable[[dict[str, Value]], bool]:
+        """
+        Compiles the boolean expression into a closure specialized for its structure.
+
+        Whether the operands are boolean expressions or values is known from the
+        syntax tree, so the closure skips the type checks and operator comparisons
+        that `get_value` repeats on every evaluation. Like `get_value`, `and` and
+        `or` only evaluate their right operand if the left one does not decide the
+        result. Structures that `get_value` would reject are compiled to `get_value`
+        itself, so they fail the same way.
+
+        A `like` pattern given as a string literal is compiled to a regular
+        expression here, once, and kept in `pattern`.
+
+        Returns:
+            Callable[[dict[str, Value]], bool]: A closure evaluating the expression.
+
+        Raises:
+            SyntaxError: If a literal `like` pattern is not a valid regular expression.
+        """
+        words: tuple = self.words
+        if len(words) == 2 and words[0] == "not":
+            operand = words[1].compiled
+
+            def negation(table: dict[str, Value]) -> bool:
+                return not operand(table)
+
+            return negation
+        if len(words) != 3:
+            return self.get_value
+
+        lef_is_bool: bool = isinstance(words[0], BooleanExpression)
+        rig_is_bool: bool = isinstance(words[2], BooleanExpression)
+        lhs = words[0].compiled
+        rhs = words[2].compiled
+        if lef_is_bool and rig_is_bool and words[1] == "and":
+
+            def conjunction(table: dict[str, Value]) -> bool:
+                return lhs(table) and rhs(table)
+
+            return conjunction
+        if lef_is_bool and rig_is_bool and words[1] == "or":
+
+            def disjunction(table: dict[str, Value]) -> bool:
+                return lhs(table) or rhs(table)
+
+            return disjunction
+        if (
+            words[1] == "like"
+            and not lef_is_bool
+            and isinstance(words[2], Literal)
+            and isinstance(words[2].value, StringValue)
+        ):
+            try:
+                self._pattern = re.compile(words[2].value.value)
+            except re.error as error:
+                raise SyntaxError(
+                    f"invalid like pattern {words[2].value.value!r}: {error}"
+                ) from error
+            search = self._pattern.search
+
+            def like_literal(table: dict[str, Value]) -> bool:
+                return search(lhs(table).value) is not None
+
+            return like_literal
+        if not lef_is_bool and not rig_is_bool and words[1] in _COMPARATORS:
+            comparator = _COMPARATORS[words[1]]
+
+            def comparison(table: dict[str, Value]) -> bool:
+                return comparator(lhs(table).value, rhs(table).value)
+
+            return comparison
+        return self.get_value
+
 
 class Need:
     """
     A class representing a need for a variable.
     """
 
+    __slots__ = ("_var_id", "_slot")
+
     def __init__(self, var_id: str) -> None:
         """
         Initializes a Need instance.
@@ -586,6 +1194,7 @@ class Need:
             var_id: The variable id of the variable to be needed.
         """
         self._var_id: str = var_id
+        self._slot: int | None = None
 
     def __repr__(self) -> str:
         """
@@ -607,12 +1216,33 @@ class Need:
         """
         return self._var_id
 
+    @property
+    def slot(self) -> int | None:
+        """
+        Returns the index of the needed variable in a session's frame.
+
+        Returns:
+            int | None: The slot, or None if the program has not been linked.
+        """
+        return self._slot
+
+    def link(self, slot: int) -> None:
+        """
+        Assigns the needed variable its slot in a session's frame.
+
+        Args:
+            slot: The index of the variable in the frame.
+        """
+        self._slot = slot
+
 
 class LetStatement:
     """
     A class representing a let statement.
     """
 
+    __slots__ = ("_var_id", "_expr", "_slot")
+
     def __init__(self, var_id: str, expr: Expression) -> None:
         """
         Initializes a LetStatement instance.
@@ -623,6 +1253,7 @@ class LetStatement:
         """
         self._var_id: str = var_id
         self._expr: Expression = expr
+        self._slot: int | None = None
 
     def __repr__(self) -> str:
         """
@@ -654,12 +1285,33 @@ class LetStatement:
         """
         return self._expr
 
+    @property
+    def slot(self) -> int | None:
+        """
+        Returns the index of the assigned variable in a session's frame.
+
+        Returns:
+            int | None: The slot, or None if the program has not been linked.
+        """
+        return self._slot
+
+    def link(self, slot: int) -> None:
+        """
+        Assigns the assigned variable its slot in a session's frame.
+
+        Args:
+            slot: The index of the variable in the frame.
+        """
+        self._slot = slot
+
 
 class InputStatement:
     """
     A class representing an input statement.
     """
 
+    __slots__ = ("_var_id", "_slot")
+
     def __init__(self, var_id: str) -> None:
         """
         Initializes an InputStatement instance.
@@ -668,6 +1320,7 @@ class InputStatement:
             var_id: The variable id to store the input value into.
         """
         self._var_id: str = var_id
+        self._slot: int | None = None
 
     def __repr__(self) -> str:
         """
@@ -689,12 +1342,33 @@ class InputStatement:
         """
         return self._var_id
 
+    @property
+    def slot(self) -> int | None:
+        """
+        Returns the index of the input variable in a session's frame.
+
+        Returns:
+            int | None: The slot, or None if the program has not been linked.
+        """
+        return self._slot
+
+    def link(self, slot: int) -> None:
+        """
+        Assigns the input variable its slot in a session's frame.
+
+        Args:
+            slot: The index of the variable in the frame.
+        """
+        self._slot = slot
+
 
 class OutputStatement:
     """
     A class representing an output statement.
     """
 
+    __slots__ = ("_expr",)
+
     def __init__(self, expr: Expression) -> None:
         """
         Initializes an OutputStatement instance.
@@ -733,6 +1407,8 @@ class Branch:
     A class representing a branch statement.
     """
 
+    __slots__ = ("_proc_name", "_bexpr", "_target")
+
     def __init__(self, proc_name: str, bexpr: BooleanExpression) -> None:
         """
         Initializes a Branch instance.
@@ -743,6 +1419,7 @@ class Branch:
         """
         self._proc_name: str = proc_name
         self._bexpr: BooleanExpression = bexpr
+        self._target: "Procedure | None" = None
 
     def __repr__(self) -> str:
         """
@@ -776,12 +1453,43 @@ class Branch:
         """
         return self._bexpr
 
+    @property
+    def target(self) -> "Procedure | None":
+        """
+        Returns the procedure to call if the boolean expression evaluates to True.
+
+        Returns:
+            Procedure | None: The procedure resolved by `Program.link`, or None if the
+            program has not been linked yet.
+        """
+        return self._target
+
+    def __reduce__(self) -> tuple:
+        """
+        Pickles the Branch instance without its target, see `Program.__reduce__`.
+
+        Returns:
+            tuple: The class and the arguments to recreate the unlinked instance.
+        """
+        return Branch, (self._proc_name, self._bexpr)
+
+    def link(self, target: "Procedure") -> None:
+        """
+        Resolves the branch to the procedure it calls.
+
+        Args:
+            target: The procedure named by `proc_name`.
+        """
+        self._target = target
+
 
 class Default:
     """
     A class representing a default statement.
     """
 
+    __slots__ = ("_proc_name", "_target")
+
     def __init__(self, proc_name: str) -> None:
         """
         Initializes a Default instance.
@@ -790,6 +1498,7 @@ class Default:
             proc_name: The id of the procedure to call when no other branch evaluates to True.
         """
         self._proc_name = proc_name
+        self._target: "Procedure | None" = None
 
     def __repr__(self) -> str:
         """
@@ -812,12 +1521,359 @@ class Default:
         """
         return self._proc_name
 
+    @property
+    def target(self) -> "Procedure | None":
+        """
+        Returns the procedure to call when no other branch evaluates to True.
+
+        Returns:
+            Procedure | None: The procedure resolved by `Program.link`, or None if the
+            program has not been linked yet.
+        """
+        return self._target
+
+    def __reduce__(self) -> tuple:
+        """
+        Pickles the Default instance without its target, see `Program.__reduce__`.
+
+        Returns:
+            tuple: The class and the arguments to recreate the unlinked instance.
+        """
+        return Default, (self._proc_name,)
+
+    def link(self, target: "Procedure") -> None:
+        """
+        Resolves the default statement to the procedure it calls.
+
+        Args:
+            target: The procedure named by `proc_name`.
+        """
+        self._target = target
+
+
+Selector = Callable[[Frame | dict[str, Value]], "Procedure | None"]
+"""A compiled branch list: called with a frame, returns the next procedure."""
+
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
+
+
+def _like_patterns(bexpr: BooleanExpression) -> tuple[Variable, list[str]] | None:
+    """
+    Recognizes `${x} like "a" or ${x} like "b" or ...` conditions.
+
+    Args:
+        bexpr: The condition of a branch.
+
+    Returns:
+        tuple[Variable, list[str]] | None: The tested variable and the literal
+        patterns in evaluation order, or None if the condition has another shape.
+    """
+    words: tuple = bexpr.words
+    if len(words) != 3:
+        return None
+    if words[1] == "or":
+        if not isinstance(words[0], BooleanExpression):
+            return None
+        if not isinstance(words[2], BooleanExpression):
+            return None
+        lef = _like_patterns(words[0])
+        rig = _like_patterns(words[2])
+        if lef is None or rig is None or lef[0].name != rig[0].name:
+            return None
+        return lef[0], lef[1] + rig[1]
+    if (
+        words[1] == "like"
+        and isinstance(words[0], Variable)
+        and isinstance(words[2], Literal)
+        and isinstance(words[2].value, StringValue)
+        and _BACKREFERENCE.search(words[2].value.value) is None
+    ):
+        return words[0], [words[2].value.value]
+    return None
+
+
+class _LikeChain:
+    """
+    A run of branches that all test one variable against literal `like` patterns.
+
+    The patterns of every branch are combined into one alternation with a named
+    group per branch. A single search finds the leftmost match, which names a
+    branch that matches; searching again among only the earlier branches settles
+    whether one of those matches too. The first matching branch in source order
+    wins, exactly as if each condition were evaluated in turn.
+    """
+
+    __slots__ = ("_variable", "_branches", "_alternatives", "_regex", "_prefixes")
+
+    def __init__(
+        self, variable: Variable, branches: list[Branch], patterns: list[list[str]]
+    ) -> None:
+        """
+        Initializes a _LikeChain instance.
+
+        Args:
+            variable: The variable every branch tests.
+            branches: The branches of the run, in source order.
+            patterns: The literal patterns of each branch.
+
+        Raises:
+            re.error: If the patterns cannot be combined into one expression.
+        """
+        self._variable: Evaluator = variable.compiled
+        self._branches: list[Branch] = branches
+        self._alternatives: list[str] = [
+            f"(?P<_b{index}>" + "|".join(f"(?:{p})" for p in group) + ")"
+            for index, group in enumerate(patterns)
+        ]
+        self._regex: re.Pattern[str] = re.compile("|".join(self._alternatives))
+        self._prefixes: list[re.Pattern[str] | None] = [None] * len(branches)
+
+    def _prefix(self, count: int) -> re.Pattern[str]:
+        """
+        Returns the combined expression of the first `count` branches, compiling it
+        on first use.
+
+        Args:
+            count: The number of leading branches to combine, less than the length of
+                the run.
+
+        Returns:
+            re.Pattern[str]: The compiled alternation.
+        """
+        regex: re.Pattern[str] | None = self._prefixes[count]
+        if regex is None:
+            regex = re.compile("|".join(self._alternatives[:count]))
+            self._prefixes[count] = regex
+        return regex
+
+    def select(self, table: dict[str, Value]) -> "Procedure | None":
+        """
+        Returns the target of the first branch of the run whose condition holds.
+
+        Args:
+            table: The table of variables to lookup values from.
+
+        Returns:
+            Procedure | None: The target of the first matching branch, or None.
+        """
+        value: Value = self._variable(table)
+        if not isinstance(value, StringValue):
+            for branch in self._branches:
+                if branch.bexpr.compiled(table):
+                    return branch.target
+            return None
+        index: int | None = self.index(value.value)
+        if index is None:
+            return None
+        return self._branches[index].target
+
+    def index(self, text: str) -> int | None:
+        """
+        Returns the position in the run of the first branch matching a text.
+
+        Args:
+            text: The value of the tested variable.
+
+        Returns:
+            int | None: The index of the first matching branch, or None.
+        """
+        found = self._regex.search(text)
+        if found is None:
+            return None
+        index: int = int(found.lastgroup[2:])
+        while index > 0:
+            found = self._prefix(index).search(text)
+            if found is None:
+                break
+            index = int(found.lastgroup[2:])
+        return index
+
+
+def _structure(word) -> object:
+    """
+    Returns a hashable key that is equal for structurally identical subtrees.
+
+    Args:
+        word: A node of the syntax tree, or an operator string.
+
+    Returns:
+        object: The key of the subtree.
+    """
+    if isinstance(word, Literal):
+        return Literal, type(word.value), word.value.value
+    if isinstance(word, Variable):
+        return Variable, word.name
+    if isinstance(word, (Expression, BooleanExpression)):
+        return type(word), tuple(_structure(child) for child in word.words)
+    return word
+
+
+def _slots(word) -> list[int | None]:
+    """
+    Returns the slots of the variables a subtree reads.
+
+    Args:
+        word: A node of the syntax tree, or an operator string.
+
+    Returns:
+        list[int | None]: The slots, with None for unlinked variables.
+    """
+    if isinstance(word, Variable):
+        return [word.slot]
+    if isinstance(word, (Expression, BooleanExpression)):
+        return [slot for child in word.words for slot in _slots(child)]
+    return []
+
+
+def _memoize(
+    condition: Callable[[Frame], bool], slots: list[int], memo: int
+) -> Callable[[Frame], bool]:
+    """
+    Wraps a pure condition to reuse its last result while its inputs are unchanged.
+
+    The cache holds the values of the variables the condition read last time
+    together with its result, in slot `memo` of the frame, past the variables.
+    Values are immutable, so the result stays valid until one of those variables
+    is assigned a different value. Since every session has its own frame, sessions
+    never see each other's results.
+
+    Args:
+        condition: The compiled condition, which must read frames.
+        slots: The slots of the variables it reads.
+        memo: The slot of the frame that holds its cache.
+
+    Returns:
+        Callable[[Frame], bool]: The memoized condition.
+    """
+    inputs = itemgetter(*slots)
+
+    def memoized(frame: Frame) -> bool:
+        values = inputs(frame)
+        cached = frame[memo]
+        if cached is not None:
+            last, result = cached
+            if values is last or values == last:
+                return result
+        result = condition(frame)
+        frame[memo] = (values, result)
+        return result
+
+    return memoized
+
+
+def _repeated_conditions(
+    branches: list["Branch | Default"],
+) -> list[list[BooleanExpression]]:
+    """
+    Finds the comparisons that appear more than once in a branch list.
+
+    Comparisons reading an unlinked variable, or none at all, are left out, since
+    they cannot be cached by the slots of their inputs.
+
+    Args:
+        branches: The branch list of a linked procedure.
+
+    Returns:
+        list[list[BooleanExpression]]: The occurrences of each repeated comparison,
+        in order of first appearance.
+    """
+    occurrences: dict[object, list[BooleanExpression]] = {}
+
+    def collect(bexpr: BooleanExpression) -> None:
+        words: tuple = bexpr.words
+        if len(words) == 2 and isinstance(words[1], BooleanExpression):
+            collect(words[1])
+        elif len(words) == 3 and words[1] in ("and", "or"):
+            collect(words[0])
+            collect(words[2])
+        elif len(words) == 3 and words[1] in _COMPARATORS:
+            occurrences.setdefault(_structure(bexpr), []).append(bexpr)
+
+    for branch in branches:
+        if isinstance(branch, Branch):
+            collect(branch.bexpr)
+    repeated: list[list[BooleanExpression]] = []
+    for nodes in occurrences.values():
+        slots: list[int | None] = _slots(nodes[0])
+        if len(nodes) > 1 and slots and None not in slots:
+            repeated.append(nodes)
+    return repeated
+
+
+def _share_conditions(branches: list["Branch | Default"], memo: int) -> int:
+    """
+    Evaluates comparisons repeated across a branch list once per change of inputs.
+
+    A comparison such as `${x} like "1"` that appears in several branches of one
+    list would otherwise be evaluated again by every branch tried. Each repeated
+    comparison gets one memoized closure, shared by all its occurrences, caching
+    its result in a slot of the frame of its own. Every occurrence also keeps the
+    precompiled pattern of a literal `like`, which the virtual machine reads. Must
+    run before the conditions are compiled, since compiled conjunctions and
+    disjunctions keep the closures of their operands.
+
+    Args:
+        branches: The branch list of a linked procedure.
+        memo: The first frame slot free for caches.
+
+    Returns:
+        int: The first frame slot still free after this branch list.
+    """
+    for nodes in _repeated_conditions(branches):
+        shared = _memoize(nodes[0].compiled, _slots(nodes[0]), memo)
+        for node in nodes:
+            node._pattern = nodes[0].pattern
+            node._compiled = shared
+        memo += 1
+    return memo
+
+
+def _compile_branch(branch: Branch) -> Selector:
+    """
+    Compiles a single branch into a selector.
+
+    Args:
+        branch: The branch to compile.
+
+    Returns:
+        Selector: A closure returning the branch target if its condition holds.
+    """
+    condition = branch.bexpr.compiled
+    target: Procedure | None = branch.target
+
+    def select(table: dict[str, Value]) -> Procedure | None:
+        if condition(table):
+            return target
+        return None
+
+    return select
+
+
+def _compile_default(default: Default) -> Selector:
+    """
+    Compiles a default statement into a selector.
+
+    Args:
+        default: The default statement to compile.
+
+    Returns:
+        Selector: A closure returning the default target.
+    """
+    target: Procedure | None = default.target
+
+    def select(_) -> Procedure | None:
+        return target
+
+    return select
+
 
 class Procedure:
     """
     A class representing a procedure.
     """
 
+    __slots__ = ("_name", "_statements", "_branches", "_compiled")
+
     def __init__(
         self, name: str, statements: list[Statement], branches: list[Branch | Default]
     ) -> None:
@@ -832,6 +1888,7 @@ class Procedure:
         self._name: str = name
         self._statements: list[Statement] = statements
         self._branches: list[Branch | Default] = branches
+        self._compiled: Selector | None = None
 
     def __repr__(self) -> str:
         """
@@ -880,12 +1937,88 @@ class Procedure:
         """
         return self._branches
 
+    @property
+    def compiled(self) -> Selector:
+        """
+        Returns the compiled branch list, compiling it on first use.
+
+        Returns:
+            Selector: A closure returning the procedure to call next.
+        """
+        if self._compiled is None:
+            self._compiled = self.compile()
+        return self._compiled
+
+    def compile(self) -> Selector:
+        """
+        Compiles the branch list into a selector of the next procedure.
+
+        Branches are tried in order and the first whose condition holds wins; a
+        default statement always wins and hides the branches after it. Runs of
+        branches that test the same variable against literal `like` patterns, such
+        as `branch a when ${x} like "1" or ${x} like "a"`, are combined into one
+        regular expression searched once per turn. The program must be linked.
+
+        Returns:
+            Selector: A closure returning the procedure to call next, or None if no
+            branch applies.
+        """
+        steps: list[Selector] = []
+        run: list[Branch] = []
+        run_patterns: list[list[str]] = []
+        run_variable: Variable | None = None
+
+        def flush() -> None:
+            nonlocal run, run_patterns, run_variable
+            chain: _LikeChain | None = None
+            if sum(len(group) for group in run_patterns) > 1:
+                try:
+                    chain = _LikeChain(run_variable, run, run_patterns)
+                except re.error:
+                    chain = None
+            if chain is not None:
+                steps.append(chain.select)
+            else:
+                steps.extend(_compile_branch(branch) for branch in run)
+            run, run_patterns, run_variable = [], [], None
+
+        for branch in self._branches:
+            if isinstance(branch, Default):
+                flush()
+                steps.append(_compile_default(branch))
+                break
+            like = _like_patterns(branch.bexpr)
+            if like is None or (run and like[0].name != run_variable.name):
+                flush()
+            if like is None:
+                steps.append(_compile_branch(branch))
+                continue
+            _ = branch.bexpr.compiled
+            run.append(branch)
+            run_patterns.append(like[1])
+            run_variable = like[0]
+        flush()
+
+        if len(steps) == 1:
+            return steps[0]
+
+        def select(table: dict[str, Value]) -> Procedure | None:
+            for step in steps:
+                target = step(table)
+                if target is not None:
+                    return target
+            return None
+
+        return select
+
 
 class Program:
     """
     A class representing a program.
     """
 
+    __slots__ = ("_needs", "_procedures", "_variables", "_frame_size", "_linked")
+
     def __init__(self, needs: list[Need], procedures: list[Procedure]) -> None:
         """
         Initializes a Program instance.
@@ -896,6 +2029,9 @@ class Program:
         """
         self._needs: list[Need] = needs
         self._procedures: list[Procedure] = procedures
+        self._variables: list[str] = []
+        self._frame_size: int = 0
+        self._linked: bool = False
 
     def __repr__(self) -> str:
         """
@@ -908,6 +2044,36 @@ class Program:
         """
         return f"Program(needs={self._needs}, procedures={self._procedures})"
 
+    def __reduce__(self) -> tuple:
+        """
+        Pickles the Program instance, without compiled closures.
+
+        Branches are pickled by the name of the procedure they call rather than by
+        reference, and resolved again when the program is unpickled, so that a long
+        path of procedures does not make pickling recurse along it. A program can
+        only be pickled before it is compiled.
+
+        Returns:
+            tuple: The class, the arguments and the state to recreate the instance.
+        """
+        return (
+            Program,
+            (self._needs, self._procedures),
+            (self._variables, self._frame_size, self._linked),
+        )
+
+    def __setstate__(self, state: tuple[list[str], int, bool]) -> None:
+        """
+        Restores the slots of an unpickled Program instance and relinks its branches.
+
+        Args:
+            state: The variables of the program, the size of its frames and whether
+                it was linked.
+        """
+        self._variables, self._frame_size, self._linked = state
+        if self._linked:
+            self._link_targets()
+
     @property
     def needs(self) -> list[Need]:
         """
@@ -927,3 +2093,137 @@ class Program:
             list[Procedure]: The list of procedures in the program.
         """
         return self._procedures
+
+    @property
+    def linked(self) -> bool:
+        """
+        Returns whether the program has been linked.
+
+        Returns:
+            bool: True if every branch has been resolved to its target procedure.
+        """
+        return self._linked
+
+    @property
+    def variables(self) -> list[str]:
+        """
+        Returns the variable ids of the program, indexed by their slots.
+
+        Returns:
+            list[str]: The variable ids in order of first appearance, empty until
+            the program has been linked.
+        """
+        return self._variables
+
+    @property
+    def frame_size(self) -> int:
+        """
+        Returns the length of the frame a session of the program needs.
+
+        Returns:
+            int: The number of variables plus the number of comparisons repeated
+            within a branch list, whose cached results follow the variables, zero
+            until the program has been linked.
+        """
+        return self._frame_size
+
+    def link(self) -> None:
+        """
+        Resolves every branch and default statement to the procedure it calls, and
+        assigns every variable a slot in a session's frame.
+
+        After linking, moving from one procedure to the next is a direct reference
+        instead of a search by name. If several procedures share a name, the first one
+        wins, as it did when procedures were looked up by scanning the list.
+
+        Slots are numbered in order of first appearance, needs first, so that a
+        session stores its variables in a list of `len(self.variables)` values and
+        reads them by index instead of hashing their names. Each comparison repeated
+        within a branch list gets one more slot, past the variables, to cache its
+        result in, so a frame holds `frame_size` values. The program must be linked
+        before any of its expressions is compiled.
+
+        Raises:
+            SyntaxError: If a branch or default statement names an undefined procedure.
+        """
+        self._link_targets()
+
+        slots: dict[str, int] = {}
+
+        def slot(var_id: str) -> int:
+            return slots.setdefault(var_id, len(slots))
+
+        def link_words(words: tuple) -> None:
+            for word in words:
+                if isinstance(word, Variable):
+                    word.link(slot(word.name))
+                elif isinstance(word, (Expression, BooleanExpression)):
+                    link_words(word.words)
+
+        for need in self._needs:
+            need.link(slot(need.var_id))
+        for procedure in self._procedures:
+            for statement in procedure.statements:
+                if isinstance(statement, (LetStatement, InputStatement)):
+                    statement.link(slot(statement.var_id))
+        for procedure in self._procedures:
+            for statement in procedure.statements:
+                if isinstance(statement, (LetStatement, OutputStatement)):
+                    link_words((statement.expr,))
+            for branch in procedure.branches:
+                if isinstance(branch, Branch):
+                    link_words((branch.bexpr,))
+        self._variables = list(slots)
+        self._frame_size = len(slots) + sum(
+            len(_repeated_conditions(procedure.branches))
+            for procedure in self._procedures
+        )
+        self._linked = True
+
+    def _link_targets(self) -> None:
+        """
+        Resolves every branch and default statement to the procedure it calls.
+
+        Raises:
+            SyntaxError: If a branch or default statement names an undefined procedure.
+        """
+        procedures: dict[str, Procedure] = {}
+        for procedure in self._procedures:
+            procedures.setdefault(procedure.name, procedure)
+
+        for procedure in self._procedures:
+            for branch in procedure.branches:
+                target: Procedure | None = procedures.get(branch.proc_name)
+                if target is None:
+                    raise SyntaxError(
+                        f"undefined procedure {branch.proc_name!r} "
+                        f"in procedure {procedure.name!r}"
+                    )
+                branch.link(target)
+
+    def compile(self) -> None:
+        """
+        Compiles every expression and branch list in the program ahead of the first
+        session.
+
+        Each of them would otherwise be compiled the first time it is evaluated;
+        doing it at load time keeps that work off the conversation path. Comparisons
+        repeated across the branch list of a procedure are memoized first, see
+        `_share_conditions`.
+
+        Raises:
+            RuntimeError: If the program has not been linked.
+            SyntaxError: If a literal `like` pattern is not a valid regular expression.
+        """
+        if not self._linked:
+            raise RuntimeError("program must be linked before it is compiled")
+        memo: int = len(self._variables)
+        for procedure in self._procedures:
+            memo = _share_conditions(procedure.branches, memo)
+            for statement in procedure.statements:
+                if isinstance(statement, (LetStatement, OutputStatement)):
+                    _ = statement.expr.compiled
+            for branch in procedure.branches:
+                if isinstance(branch, Branch):
+                    _ = branch.bexpr.compiled
+            _ = procedure.compiled
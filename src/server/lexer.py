@@ -6,13 +6,17 @@ __all__: list[str] = [
     "Lexer",
 ]
 
+import os
 from ply import lex
 from ply.lex import LexToken
 from server.language import (
-    IntegerValue,
-    StringValue,
+    integer_value,
+    string_value,
 )
 
+TABLES_DIR: str = os.path.dirname(os.path.abspath(__file__))
+"""The directory of the generated `lextab` and `parsetab` modules."""
+
 
 class Lexer:
     """
@@ -23,10 +27,21 @@ class Lexer:
         """
         Initializes a Lexer instance by creating a PLY lexer.
 
+        By default the lexer is built in PLY's optimize mode from the generated
+        `server.lextab` module, which skips validating the token rules and reading
+        their source. The module must be regenerated whenever a rule changes, see
+        `server.parser.write_tables`.
+
         Args:
             **kwargs: Arbitrary keyword arguments to configure the PLY lexer.
         """
-        self.lexer: lex.Lexer = lex.lex(module=self, **kwargs)
+        options: dict[str, object] = {
+            "optimize": True,
+            "lextab": "server.lextab",
+            "outputdir": TABLES_DIR,
+            **kwargs,
+        }
+        self.lexer: lex.Lexer = lex.lex(module=self, **options)
 
     def input(self, data) -> None:
         """
@@ -119,13 +134,13 @@ class Lexer:
     def t_integer_constant(self, token) -> LexToken:
         r"\d+"
         token.type = "INTEGER_CONSTANT"
-        token.value = IntegerValue(int(token.value))
+        token.value = integer_value(int(token.value))
         return token
 
     def t_string_literal(self, token) -> LexToken:
         r'"[^"]*"'
         token.type = "STRING_LITERAL"
-        token.value = StringValue(str(token.value[1:-1]))
+        token.value = string_value(token.value[1:-1])
         return token
 
     t_VAR_ID = r"\$\{\w+\}"
@@ -148,12 +163,14 @@ class Lexer:
         Handles a syntax error in the source program.
 
         This function is called when a syntax error is encountered by the lexer.
-        It raises a SyntaxError exception with a message indicating the invalid
-        token.
+        It raises a SyntaxError exception with a message indicating the line of
+        the invalid token, and the rest of that line.
 
         :param token: The invalid token.
         :type token: LexToken
         :raises SyntaxError: A syntax error occurred.
         """
 
-        raise SyntaxError(f"invalid token: {token.value!r}")
+        end: int = token.value.find("\n")
+        rest: str = token.value if end < 0 else token.value[:end]
+        raise SyntaxError(f"invalid token at line {token.lineno}: {rest!r}")
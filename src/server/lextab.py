@@ -0,0 +1,10 @@
+# lextab.py. This file automatically created by PLY (version 3.11). Don't edit!
+_tabversion   = '3.10'
+_lextokens    = set(('AND', 'ASSIGN', 'BRANCH', 'CAST', 'COMPARATOR', 'DEFAULT', 'DIV', 'INPUT', 'INTEGER', 'INTEGER_CONSTANT', 'LET', 'LPAREN', 'MINUS', 'MOD', 'MUL', 'NEED', 'NOT', 'OR', 'OUTPUT', 'PLUS', 'PROCEDURE', 'PROC_NAME', 'RPAREN', 'STRING', 'STRING_LITERAL', 'TO', 'VAR_ID', 'WHEN'))
+_lexreflags   = 64
+_lexliterals  = ''
+_lexstateinfo = {'INITIAL': 'inclusive'}
+_lexstatere   = {'INITIAL': [('(?P<t_comment>[#].*)|(?P<t_comparator><=|>=|==|!=|<|>)|(?P<t_integer_constant>\\d+)|(?P<t_string_literal>"[^"]*")|(?P<t_proc_name>\\w+)|(?P<t_newline>\\n+)|(?P<t_VAR_ID>\\$\\{\\w+\\})|(?P<t_DIV>\\/)|(?P<t_LPAREN>\\()|(?P<t_MINUS>\\-)|(?P<t_MUL>\\*)|(?P<t_PLUS>\\+)|(?P<t_RPAREN>\\))|(?P<t_ASSIGN>=)|(?P<t_MOD>%)', [None, ('t_comment', 'comment'), ('t_comparator', 'comparator'), ('t_integer_constant', 'integer_constant'), ('t_string_literal', 'string_literal'), ('t_proc_name', 'proc_name'), ('t_newline', 'newline'), (None, 'VAR_ID'), (None, 'DIV'), (None, 'LPAREN'), (None, 'MINUS'), (None, 'MUL'), (None, 'PLUS'), (None, 'RPAREN'), (None, 'ASSIGN'), (None, 'MOD')])]}
+_lexstateignore = {'INITIAL': ' \t\r\x0c\x0b'}
+_lexstateerrorf = {'INITIAL': 't_error'}
+_lexstateeoff = {}
@@ -0,0 +1,131 @@
+"""
+A module for turning source code into a Program ready to be run.
+"""
+
+__all__: list[str] = [
+    "prepare",
+    "prepare_program",
+    "load",
+    "load_file",
+]
+
+from server.language import Program
+
+
+def prepare(
+    source: str, optimize: bool = True, lexer: str = "ply", parse_workers: int = 0
+) -> Program:
+    """
+    Parses, links, optimizes and type-checks a source string, without compiling it.
+
+    The result can be pickled, see `server.artifact`, and must be compiled with
+    `Program.compile` before it is run.
+
+    Args:
+        source: The source string to be prepared.
+        optimize: Whether to fold constants and remove unreachable code, see
+            `server.optimizer`.
+        lexer: The tokenizer, either "ply" (`server.lexer.Lexer`) or "scanner"
+            (`server.scanner.Scanner`), which produce the same tokens.
+        parse_workers: The number of processes to parse a large source in, see
+            `server.parallel`, or 0 to parse it in this process.
+
+    Returns:
+        Program: The linked and annotated program.
+
+    Raises:
+        SyntaxError: If the source is malformed, refers to undefined procedures or
+            contains an operation that can only fail with a type error.
+    """
+    # the modules that build a program, and PLY with them, are only imported once
+    # a source is actually prepared, so loading an artifact does not pay for them
+    from server.parser import new_parser
+
+    if parse_workers > 0:
+        from server.parallel import parse_parallel
+
+        program: Program = parse_parallel(source, parse_workers, lexer)
+    else:
+        program = new_parser(lexer).parse(source)
+    return prepare_program(program, optimize)
+
+
+def prepare_program(program: Program, optimize: bool = True) -> Program:
+    """
+    Links, optimizes and type-checks a parsed program, without compiling it.
+
+    What the optimizer changed, see `server.optimizer.OptimizationReport`, is
+    printed once it is done, so that a server logs it whenever it loads a script.
+
+    Args:
+        program: The program, as returned by the parser.
+        optimize: Whether to fold constants and remove unreachable code, see
+            `server.optimizer`.
+
+    Returns:
+        Program: The same program, linked and annotated.
+
+    Raises:
+        SyntaxError: If the program refers to undefined procedures or contains an
+            operation that can only fail with a type error.
+    """
+    from server import optimizer
+    from server.inference import infer_types
+
+    program.link()
+    if optimize:
+        report: optimizer.OptimizationReport = optimizer.optimize(program)
+        print(f"Optimizer {report}", flush=True)
+    infer_types(program)
+    return program
+
+
+def load(
+    source: str, optimize: bool = True, lexer: str = "ply", parse_workers: int = 0
+) -> Program:
+    """
+    Parses, links, optimizes, type-checks and compiles a source string.
+
+    Args:
+        source: The source string to be loaded.
+        optimize: Whether to fold constants and remove unreachable code, see
+            `server.optimizer`.
+        lexer: The tokenizer, either "ply" or "scanner", see `prepare`.
+        parse_workers: The number of processes to parse the source in, see
+            `prepare`.
+
+    Returns:
+        Program: The linked and compiled program.
+
+    Raises:
+        SyntaxError: If the source is malformed, refers to undefined procedures or
+            contains an operation that can only fail with a type error.
+    """
+    program: Program = prepare(source, optimize, lexer, parse_workers)
+    program.compile()
+    return program
+
+
+def load_file(
+    filename: str, optimize: bool = True, lexer: str = "ply", parse_workers: int = 0
+) -> Program:
+    """
+    Reads, parses, links, optimizes, type-checks and compiles a source file.
+
+    Args:
+        filename: The filename of the source code file.
+        optimize: Whether to fold constants and remove unreachable code.
+        lexer: The tokenizer, either "ply" or "scanner", see `prepare`.
+        parse_workers: The number of processes to parse the source in, see
+            `prepare`.
+
+    Returns:
+        Program: The linked and compiled program.
+
+    Raises:
+        SyntaxError: If the source is malformed, refers to undefined procedures or
+            contains an operation that can only fail with a type error.
+    """
+    with open(file=filename, mode="r", encoding="utf-8") as file:
+        source_code = file.read()
+    return load(source_code, optimize, lexer, parse_workers)
@@ -3,67 +3,557 @@ Run the server.
 """
 
 import argparse
+import gc
+import os
 import threading
+import time
 import signal
 import socket
+import sys
 import config
-from server.lexer import Lexer
-from server.parser import Parser
+from server.artifact import load_cached
 from server.interpreter import Interpreter
 from server.language import Program
+from server.metrics import metrics
+from server.pool import WorkerPool, reject
+from server.registry import Registry
+from server.reload import Reloader
+from server.vm import Code, compile_program
 
+STARTUP_GRACE: float = 1.0
+"""The number of seconds a worker must run for its exit not to count as a crash."""
 
-def start(filename: str, host: str, port: int) -> None:
+MAX_BACKOFF: float = 5.0
+"""The longest delay, in seconds, before restarting a worker that crashed."""
+
+
+def start(
+    filename: str,
+    host: str,
+    port: int,
+    mode: str = "thread",
+    stats_interval: float = 0,
+    workers: int = 0,
+    engine: str = "tree",
+    lexer: str = "ply",
+    parse_workers: int = 0,
+    reload_interval: float = 0,
+    cache_size: int = 16,
+    pool_size: int = 0,
+    queue_size: int = 0,
+    backlog: int = 128,
+) -> None:
     """
     Starts a server.
 
     Args:
-        filename: The filename of the source code file for the server.
+        filename: The filename of the source code file for the server, or a
+            directory of scripts for the clients to select from, see
+            `server.registry`.
+        host: The host to listen on.
+        port: The port to listen on.
+        mode: The concurrency model, either "thread" (one thread per connection)
+            or "asyncio" (one event loop serving every connection).
+        stats_interval: The number of seconds between two metrics reports, or 0
+            to disable them.
+        workers: The number of worker processes to fork, or 0 to serve from this
+            process.
+        engine: The execution engine, either "tree" (walk the syntax tree) or
+            "vm" (run the program compiled to bytecode).
+        lexer: The tokenizer used if the script is parsed, either "ply" or
+            "scanner", see `server.loader.prepare`.
+        parse_workers: The number of processes to parse the script in if it is
+            parsed, or 0 to parse it in this process.
+        reload_interval: The number of seconds between two checks of the script
+            for changes, which are then loaded for new sessions, or 0 to disable
+            hot reloading, see `server.reload`.
+        cache_size: The maximum number of scripts kept loaded when serving a
+            directory.
+        pool_size: The number of threads serving connections in the "thread"
+            mode, or 0 to start a thread per connection, see `server.pool`.
+        queue_size: The maximum number of connections waiting for a thread of
+            the pool; any more are rejected as busy.
+        backlog: The maximum number of connections waiting to be accepted.
+
+    Raises:
+        ValueError: If hot reloading is asked for a directory.
+    """
+
+    reloader: Reloader | None = None
+    registry: Registry | None = None
+    if os.path.isdir(filename):
+        if reload_interval > 0:
+            raise ValueError("hot reloading needs a script, not a directory")
+        registry = Registry(
+            filename,
+            cache_size,
+            lexer=lexer,
+            engine=engine,
+            parse_workers=parse_workers,
+        )
+        program, code = None, None
+    elif reload_interval > 0:
+        reloader = Reloader(
+            filename,
+            reload_interval,
+            lexer=lexer,
+            engine=engine,
+            parse_workers=parse_workers,
+        )
+        program, code = reloader.current
+    else:
+        # load the compiled artifact of the script, or parse and link its source
+        program: Program = load_cached(
+            filename, lexer=lexer, parse_workers=parse_workers
+        )
+        code: Code | None = compile_program(program) if engine == "vm" else None
+
+    if workers > 0:
+        serve_workers(
+            program,
+            host,
+            port,
+            mode,
+            stats_interval,
+            workers,
+            code,
+            reloader,
+            registry,
+            pool_size,
+            queue_size,
+            backlog,
+        )
+        return
+
+    if stats_interval > 0:
+        report_metrics(stats_interval)
+    if reloader is not None:
+        reloader.watch()
+
+    serve(
+        program,
+        host,
+        port,
+        mode,
+        code=code,
+        reloader=reloader,
+        registry=registry,
+        pool_size=pool_size,
+        queue_size=queue_size,
+        backlog=backlog,
+    )
+
+
+def serve(
+    program: Program | None,
+    host: str,
+    port: int,
+    mode: str,
+    reuse_port: bool = False,
+    code: Code | None = None,
+    reloader: Reloader | None = None,
+    registry: Registry | None = None,
+    pool_size: int = 0,
+    queue_size: int = 0,
+    backlog: int = 128,
+) -> None:
+    """
+    Serves the program from this process with the given concurrency model.
+
+    Args:
+        program: The parsed program to run for every connection, or None with a
+            registry.
+        host: The host to listen on.
+        port: The port to listen on.
+        mode: The concurrency model, either "thread" or "asyncio".
+        reuse_port: Whether to bind with SO_REUSEPORT, so that several processes
+            can accept on the same port.
+        code: The program compiled to bytecode, to run it on the virtual machine.
+        reloader: The reloader whose current version of the program every new
+            connection runs instead, if the script is hot reloaded.
+        registry: The scripts every connection selects from instead, if the
+            server hosts a directory of scripts.
+        pool_size: The number of threads serving connections in the "thread"
+            mode, or 0 to start a thread per connection, see `server.pool`.
+        queue_size: The maximum number of connections waiting for a thread of
+            the pool; any more are rejected as busy.
+        backlog: The maximum number of connections waiting to be accepted.
+    """
+    if mode == "asyncio":
+        # importing asyncio takes longer than the rest of the startup, see server.aio
+        import asyncio
+        from server.aio import serve_asyncio
+
+        asyncio.run(
+            serve_asyncio(
+                program, host, port, reuse_port, code, reloader, registry, backlog
+            )
+        )
+    else:
+        serve_threads(
+            program,
+            host,
+            port,
+            reuse_port,
+            code,
+            reloader,
+            registry,
+            pool_size,
+            queue_size,
+            backlog,
+        )
+
+
+def serve_workers(
+    program: Program | None,
+    host: str,
+    port: int,
+    mode: str,
+    stats_interval: float,
+    workers: int,
+    code: Code | None = None,
+    reloader: Reloader | None = None,
+    registry: Registry | None = None,
+    pool_size: int = 0,
+    queue_size: int = 0,
+    backlog: int = 128,
+) -> None:
+    """
+    Serves the program from pre-forked worker processes and restarts any that exit.
+
+    The program is parsed and linked once, here, and then frozen out of the garbage
+    collector so that the workers' collections do not write to the pages it lives
+    in, which keeps them shared copy-on-write. Every worker binds its own socket to
+    the same port with SO_REUSEPORT, and the kernel spreads connections across
+    them. Each worker also watches a pipe held open by this process and exits when
+    it closes, so that no worker outlives the server. With hot reloading, each
+    worker watches the script on its own, so a restarted worker catches up with
+    the changes made since this process loaded it. When hosting a directory, each
+    worker loads and caches the scripts it is asked for on its own.
+
+    A worker that exits within `STARTUP_GRACE` seconds of starting, say because
+    it cannot bind the port, is restarted after a delay that doubles with every
+    such crash in a row, up to `MAX_BACKOFF`. Once every worker has crashed at
+    startup in a row, with none left running, the server gives up.
+
+    Args:
+        program: The parsed program to run for every connection, or None with a
+            registry.
         host: The host to listen on.
         port: The port to listen on.
+        mode: The concurrency model of each worker, either "thread" or "asyncio".
+        stats_interval: The number of seconds between two metrics reports of each
+            worker, or 0 to disable them.
+        workers: The number of worker processes.
+        code: The program compiled to bytecode, to run it on the virtual machine.
+        reloader: The reloader of the script, if it is hot reloaded.
+        registry: The scripts to select from, if the server hosts a directory.
+        pool_size: The number of threads serving connections in each worker, or
+            0 for a thread per connection.
+        queue_size: The maximum number of connections waiting for a thread in
+            each worker.
+        backlog: The maximum number of connections waiting to be accepted by
+            each worker.
+
+    Raises:
+        RuntimeError: If every worker crashes at startup.
     """
+    gc.freeze()
+    lifeline, keepalive = os.pipe()
+
+    def spawn() -> int:
+        pid: int = os.fork()
+        if pid != 0:
+            return pid
+        status: int = 1
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            os.close(keepalive)
+            watch_parent(lifeline)
+            if stats_interval > 0:
+                report_metrics(stats_interval)
+            if reloader is not None:
+                reloader.watch()
+            serve(
+                program,
+                host,
+                port,
+                mode,
+                True,
+                code,
+                reloader,
+                registry,
+                pool_size,
+                queue_size,
+                backlog,
+            )
+            status = 0
+        except Exception:
+            # os._exit skips the interpreter's own report, and the buffers
+            import traceback
+
+            traceback.print_exc()
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(status)
 
-    # open file and read its content
-    with open(file=filename, mode="r", encoding="utf-8") as file:
-        source_code = file.read()
+    def terminate() -> None:
+        # the loop below may be adding or removing a worker when a signal arrives,
+        # and a worker it has not yet seen exit cannot be signalled any more
+        for pid in list(pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
 
-    # create lexer and parser
-    lexer: Lexer = Lexer()
-    parser: Parser = Parser(lexer)
+    def stop(signum, frame) -> None:
+        terminate()
+        os._exit(0)
 
-    # parse the source code
-    program: Program = parser.parse(source_code)
+    # the time every running worker started at
+    pids: dict[int, float] = {}
+    signal.signal(signal.SIGTERM, stop)
+    for _ in range(workers):
+        pids[spawn()] = time.monotonic()
+    print(f"Server started {workers} workers on {host}:{port}", flush=True)
+
+    crashes: int = 0
+    while True:
+        pid, status = os.wait()
+        if pid not in pids:
+            continue
+        now: float = time.monotonic()
+        crashed: bool = now - pids.pop(pid) < STARTUP_GRACE
+        crashes = crashes + 1 if crashed else 0
+        exit_code: int = os.waitstatus_to_exitcode(status)
+        if crashes >= workers and all(
+            now - started < STARTUP_GRACE for started in pids.values()
+        ):
+            terminate()
+            raise RuntimeError(
+                f"every worker crashed at startup, the last with code {exit_code}"
+            )
+        delay: float = min(0.1 * 2**crashes, MAX_BACKOFF) if crashed else 0.1
+        print(
+            f"Worker {pid} exited with code {exit_code}, restarting in {delay:g} s",
+            flush=True,
+        )
+        time.sleep(delay)
+        pids[spawn()] = time.monotonic()
+
+
+def watch_parent(lifeline: int) -> None:
+    """
+    Exits this process as soon as the parent closes its end of the given pipe.
+
+    Args:
+        lifeline: The read end of a pipe whose write end only the parent holds.
+    """
+
+    def watch() -> None:
+        os.read(lifeline, 1)
+        os._exit(0)
+
+    threading.Thread(target=watch, daemon=True).start()
+
+
+def serve_threads(
+    program: Program | None,
+    host: str,
+    port: int,
+    reuse_port: bool = False,
+    code: Code | None = None,
+    reloader: Reloader | None = None,
+    registry: Registry | None = None,
+    pool_size: int = 0,
+    queue_size: int = 0,
+    backlog: int = 128,
+) -> None:
+    """
+    Serves the program with one thread per connection, or from a pool of threads.
+
+    Args:
+        program: The parsed program to run for every connection, or None with a
+            registry.
+        host: The host to listen on.
+        port: The port to listen on.
+        reuse_port: Whether to bind with SO_REUSEPORT.
+        code: The program compiled to bytecode, to run it on the virtual machine.
+        reloader: The reloader whose current version of the program every new
+            connection runs instead, if the script is hot reloaded.
+        registry: The scripts every connection selects from instead, if the
+            server hosts a directory of scripts.
+        pool_size: The number of threads serving connections, or 0 to start a
+            thread per connection, see `server.pool`.
+        queue_size: The maximum number of connections waiting for a thread of
+            the pool; any more are rejected as busy.
+        backlog: The maximum number of connections waiting to be accepted.
+    """
 
     # create socket
     server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if reuse_port:
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
     server_socket.bind((host, port))
-    server_socket.listen(5)
+    server_socket.listen(backlog)
 
     print(f"Server is listening on {host}:{port}")
 
     def handle_connection(conn, addr) -> None:
         print(f"Connected by {addr}")
-        interpreter: Interpreter = Interpreter(program, conn, addr)
-        interpreter.run()
-        conn.close()
+        # a session runs the version current when it starts until it ends
+        current, current_code = (
+            (program, code) if reloader is None else reloader.current
+        )
+        interpreter: Interpreter = Interpreter(
+            current, conn, addr, current_code, registry
+        )
+        try:
+            interpreter.run()
+        except ConnectionError:
+            pass
+        finally:
+            conn.close()
         print(f"Disconnected by {addr}")
 
+    pool: WorkerPool | None = None
+    if pool_size > 0:
+        pool = WorkerPool(pool_size, queue_size, handle_connection)
+
     while True:
         conn, addr = server_socket.accept()
-        thread = threading.Thread(target=handle_connection, args=(conn, addr))
-        thread.start()
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if pool is None:
+            thread = threading.Thread(target=handle_connection, args=(conn, addr))
+            thread.start()
+        elif not pool.submit(conn, addr):
+            reject(conn)
+
+
+def report_metrics(interval: float) -> None:
+    """
+    Prints the server metrics as JSON at a fixed interval from a daemon thread.
+
+    Args:
+        interval: The number of seconds between two reports.
+    """
+
+    # imported here, so that a server started without reports never loads it
+    import json
+
+    def report() -> None:
+        while True:
+            time.sleep(interval)
+            print(f"Metrics: {json.dumps(metrics.snapshot())}", flush=True)
+
+    threading.Thread(target=report, daemon=True).start()
 
 
 if __name__ == "__main__":
     signal.signal(signal.SIGINT, signal.SIG_DFL)
     arg_parser = argparse.ArgumentParser(description="Run the server.")
-    arg_parser.add_argument("filename", help="The path to the source file.")
+    arg_parser.add_argument(
+        "filename",
+        help="The path to the source file, or to a directory of scripts to host.",
+    )
     arg_parser.add_argument(
         "--host", default="localhost", help="The host to listen on."
     )
     arg_parser.add_argument(
         "--port", type=int, default=config.default_port, help="The port to listen on."
     )
+    arg_parser.add_argument(
+        "--mode",
+        choices=("thread", "asyncio"),
+        default="thread",
+        help="The concurrency model: a thread per connection, or one asyncio event loop.",
+    )
+    arg_parser.add_argument(
+        "--stats-interval",
+        type=float,
+        default=0,
+        help="Print metrics as JSON every this many seconds (0 disables).",
+    )
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Fork this many worker processes sharing the port (0 serves in-process).",
+    )
+    arg_parser.add_argument(
+        "--engine",
+        choices=("tree", "vm"),
+        default="tree",
+        help="Walk the syntax tree, or run the program compiled to bytecode.",
+    )
+    arg_parser.add_argument(
+        "--lexer",
+        choices=("ply", "scanner"),
+        default="ply",
+        help="Tokenize the script with PLY, or with the hand-written scanner.",
+    )
+    arg_parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=0,
+        help="Parse a large script in this many processes (0 parses in-process).",
+    )
+    arg_parser.add_argument(
+        "--reload-interval",
+        type=float,
+        default=0,
+        help="Check the script for changes every this many seconds and load them "
+        "for new sessions (0 disables).",
+    )
+    arg_parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=16,
+        help="Keep at most this many scripts of a directory loaded.",
+    )
+    arg_parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=0,
+        help="Serve connections from this many threads (0 starts one per connection).",
+    )
+    arg_parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=0,
+        help="Let this many connections wait for a thread of the pool, and reject "
+        "any more as busy.",
+    )
+    arg_parser.add_argument(
+        "--backlog",
+        type=int,
+        default=128,
+        help="The maximum number of connections waiting to be accepted.",
+    )
     args = arg_parser.parse_args()
+    if os.path.isdir(args.filename) and args.reload_interval > 0:
+        arg_parser.error("--reload-interval needs a script, not a directory")
+    if args.cache_size <= 0:
+        arg_parser.error("--cache-size must be positive")
+    if args.pool_size > 0 and args.mode != "thread":
+        arg_parser.error("--pool-size needs --mode thread")
+    if args.pool_size < 0 or args.queue_size < 0:
+        arg_parser.error("--pool-size and --queue-size must not be negative")
 
-    start(filename=args.filename, host=args.host, port=args.port)
+    start(
+        filename=args.filename,
+        host=args.host,
+        port=args.port,
+        mode=args.mode,
+        stats_interval=args.stats_interval,
+        workers=args.workers,
+        engine=args.engine,
+        lexer=args.lexer,
+        parse_workers=args.parse_workers,
+        reload_interval=args.reload_interval,
+        cache_size=args.cache_size,
+        pool_size=args.pool_size,
+        queue_size=args.queue_size,
+        backlog=args.backlog,
+    )
@@ -0,0 +1,64 @@
+"""
+A module for counting server events, such as socket writes and conversation turns.
+"""
+
+__all__: list[str] = [
+    "Metrics",
+    "metrics",
+]
+
+import threading
+
+
+class Metrics:
+    """
+    A thread-safe set of named counters.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes a Metrics instance with no counters.
+        """
+        self._lock: threading.Lock = threading.Lock()
+        self._counters: dict[str, int] = {}
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """
+        Adds to a counter, creating it at zero if needed.
+
+        Args:
+            name: The name of the counter.
+            value: The amount to add.
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def get(self, name: str) -> int:
+        """
+        Returns the value of a counter.
+
+        Args:
+            name: The name of the counter.
+
+        Returns:
+            int: The value of the counter, or 0 if it has never been incremented.
+        """
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> dict[str, int | float]:
+        """
+        Returns a copy of every counter, plus the derived `writes_per_turn`.
+
+        Returns:
+            dict[str, int | float]: The counters by name.
+        """
+        with self._lock:
+            counters: dict[str, int | float] = dict(self._counters)
+        if counters.get("turns"):
+            counters["writes_per_turn"] = counters.get("writes", 0) / counters["turns"]
+        return counters
+
+
+metrics: Metrics = Metrics()
+"""The counters of this server process."""
@@ -0,0 +1,289 @@
+"""
+A load-time optimizer that folds constants and removes unreachable code.
+
+The optimizer runs on a linked program before it is compiled. It rewrites the
+syntax tree in place:
+
+- arithmetic, casts and comparisons whose operands are all literals are computed
+  once and replaced by their result;
+- a branch whose condition is always false is removed, and one whose condition
+  is always true becomes a default, making every branch after it unreachable;
+- procedures that no branch path from the first procedure reaches are removed.
+
+Anything that would fail when evaluated, such as `"a" - 1` or a division by zero,
+is left as it is, so that it still fails when and only when it is run.
+"""
+
+__all__: list[str] = [
+    "OptimizationReport",
+    "optimize",
+]
+
+import re
+from dataclasses import dataclass, field
+from server.language import (
+    Literal,
+    Variable,
+    Expression,
+    BooleanExpression,
+    LetStatement,
+    OutputStatement,
+    Branch,
+    Default,
+    Procedure,
+    Program,
+    StringValue,
+    string_value,
+)
+
+_EVALUATION_ERRORS: tuple[type[Exception], ...] = (
+    RuntimeError,
+    TypeError,
+    ValueError,
+    ZeroDivisionError,
+    re.error,
+)
+
+
+@dataclass
+class OptimizationReport:
+    """
+    What the optimizer changed in a program.
+    """
+
+    folded: int = 0
+    branches: list[tuple[str, str]] = field(default_factory=list)
+    procedures: list[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        """
+        Summarizes the report on one line.
+
+        Returns:
+            str: The number of folded expressions, removed branches and removed
+            procedures.
+        """
+        return (
+            f"folded {self.folded} constant expressions, "
+            f"removed {len(self.branches)} branches "
+            f"and {len(self.procedures)} procedures"
+        )
+
+
+def optimize(program: Program) -> OptimizationReport:
+    """
+    Folds constants and removes unreachable branches and procedures, in place.
+
+    Args:
+        program: The linked program to optimize. It must not have been compiled
+            yet, since compiled closures would keep the old syntax tree.
+
+    Returns:
+        OptimizationReport: The number of folded expressions, the removed branches
+        as (procedure, target) pairs and the names of the removed procedures.
+
+    Raises:
+        RuntimeError: If the program has not been linked.
+    """
+    if not program.linked:
+        raise RuntimeError("program must be linked before it is optimized")
+    report: OptimizationReport = OptimizationReport()
+    for procedure in program.procedures:
+        for statement in procedure.statements:
+            if isinstance(statement, (LetStatement, OutputStatement)):
+                _fold_statement(statement.expr, report)
+        _prune_branches(procedure, report)
+    _prune_procedures(program, report)
+    return report
+
+
+def _fold_statement(expr, report: OptimizationReport) -> None:
+    """
+    Folds the expression of a let or output statement in place.
+
+    The statement keeps its Expression object, so a fully constant expression
+    becomes an Expression of the single resulting Literal.
+
+    Args:
+        expr: The Literal, Variable or Expression of the statement.
+        report: The report to count folded expressions in.
+    """
+    if not isinstance(expr, Expression):
+        return
+    folded = _fold(expr, report)
+    if folded is not expr:
+        expr.words = (folded,)
+
+
+def _fold(word, report: OptimizationReport):
+    """
+    Folds the constant subexpressions of an arithmetic expression.
+
+    Args:
+        word: A Literal, Variable or Expression.
+        report: The report to count folded expressions in.
+
+    Returns:
+        The word itself, with its constant subexpressions replaced by Literals, or
+        a Literal if the whole word is constant and evaluates without error.
+    """
+    if not isinstance(word, Expression):
+        return word
+    word.words = tuple(_fold(child, report) for child in word.words)
+    if any(isinstance(child, (Variable, Expression)) for child in word.words):
+        return word
+    try:
+        value = word.get_value({})
+    except _EVALUATION_ERRORS:
+        return word
+    if isinstance(value, StringValue):
+        value = string_value(value.value)
+    report.folded += 1
+    return Literal(value)
+
+
+def _fold_condition(bexpr: BooleanExpression, report: OptimizationReport):
+    """
+    Folds the constant parts of a branch condition.
+
+    A conjunction with a true operand or a disjunction with a false one reduces to
+    its other operand. A conjunction whose left operand is false or a disjunction
+    whose left operand is true is constant, since its right operand is never
+    evaluated. A constant right operand does not make the condition constant, since
+    the left one is still evaluated first and could raise an error.
+
+    Args:
+        bexpr: The condition to fold; its words are rewritten in place.
+        report: The report to count folded expressions in.
+
+    Returns:
+        bool | BooleanExpression: The value of a constant condition, or the
+        condition it reduces to.
+    """
+    words: tuple = bexpr.words
+    if len(words) == 2 and words[0] == "not":
+        operand = _fold_condition(words[1], report)
+        if isinstance(operand, bool):
+            report.folded += 1
+            return not operand
+        bexpr.words = ("not", operand)
+        return bexpr
+    if len(words) != 3:
+        return bexpr
+
+    if words[1] in ("and", "or"):
+        lef = _fold_condition(words[0], report)
+        rig = _fold_condition(words[2], report)
+        identity: bool = words[1] == "and"
+        if lef is not identity and isinstance(lef, bool):
+            report.folded += 1
+            return lef
+        if lef is identity:
+            report.folded += 1
+            return rig
+        if rig is identity:
+            report.folded += 1
+            return lef
+        # `x and false` still evaluates x, so its constant right operand stays
+        bexpr.words = (lef, words[1], words[2] if isinstance(rig, bool) else rig)
+        return bexpr
+
+    lef = _fold(words[0], report)
+    rig = _fold(words[2], report)
+    bexpr.words = (lef, words[1], rig)
+    if not (isinstance(lef, Literal) and isinstance(rig, Literal)):
+        return bexpr
+    try:
+        result: bool = bexpr.get_value({})
+    except _EVALUATION_ERRORS:
+        return bexpr
+    report.folded += 1
+    return result
+
+
+def _prune_branches(procedure: Procedure, report: OptimizationReport) -> None:
+    """
+    Removes the branches of a procedure that can never be taken, in place.
+
+    Args:
+        procedure: The procedure whose branches to prune.
+        report: The report to record removed branches in.
+    """
+    kept: list[Branch | Default] = []
+    for index, branch in enumerate(procedure.branches):
+        if isinstance(branch, Default):
+            kept.append(branch)
+            report.branches.extend(
+                (procedure.name, dead.proc_name)
+                for dead in procedure.branches[index + 1 :]
+            )
+            break
+        condition = _fold_condition(branch.bexpr, report)
+        if condition is False:
+            report.branches.append((procedure.name, branch.proc_name))
+            continue
+        if condition is True:
+            default: Default = Default(branch.proc_name)
+            default.link(branch.target)
+            procedure.branches[index] = default
+            kept.append(default)
+            report.branches.extend(
+                (procedure.name, dead.proc_name)
+                for dead in procedure.branches[index + 1 :]
+            )
+            break
+        if condition is not branch.bexpr:
+            branch.bexpr.words = condition.words
+        kept.append(branch)
+    procedure.branches[:] = kept
+
+
+def _prune_procedures(program: Program, report: OptimizationReport) -> None:
+    """
+    Removes the procedures no branch path from the first procedure reaches.
+
+    Args:
+        program: The program whose procedures to prune, in place.
+        report: The report to record removed procedures in.
+    """
+    if not program.procedures:
+        return
+    reachable: set[int] = set()
+    pending: list[Procedure] = [program.procedures[0]]
+    while pending:
+        procedure: Procedure = pending.pop()
+        if id(procedure) in reachable:
+            continue
+        reachable.add(id(procedure))
+        pending.extend(branch.target for branch in procedure.branches)
+
+    report.procedures.extend(
+        procedure.name
+        for procedure in program.procedures
+        if id(procedure) not in reachable
+    )
+    program.procedures[:] = [
+        procedure for procedure in program.procedures if id(procedure) in reachable
+    ]
+
+
+if __name__ == "__main__":
+    import argparse
+    from server.lexer import Lexer
+    from server.parser import Parser
+
+    arg_parser = argparse.ArgumentParser(
+        description="Report what the optimizer removes from a script."
+    )
+    arg_parser.add_argument("filename", help="The path to the source file.")
+    args = arg_parser.parse_args()
+
+    with open(file=args.filename, mode="r", encoding="utf-8") as file:
+        parsed: Program = Parser(Lexer()).parse(file.read())
+    parsed.link()
+    result: OptimizationReport = optimize(parsed)
+    print(result)
+    for name, target in result.branches:
+        print(f"removed branch to {target} in procedure {name}")
+    for name in result.procedures:
+        print(f"removed procedure {name}")
@@ -0,0 +1,176 @@
+"""
+Parsing very large scripts in a pool of processes.
+
+A script is a list of needs followed by procedures, and every procedure starts
+with the `procedure` keyword and ends where the next one starts. `split_blocks`
+cuts the source at the lines starting with that keyword into blocks of about
+the same size. The first block holds the needs and the first procedures; each
+other block is a list of procedures on its own. `parse_parallel` parses the
+blocks in worker processes, each of which holds a copy of the whole source, and
+merges the procedures of every block into one program, in order.
+
+Blocks are parsed with the positions and line numbers they have in the whole
+source, so a syntax error reports the same line as `Parser.parse` would.
+"""
+
+__all__: list[str] = [
+    "BLOCK_SIZE",
+    "split_blocks",
+    "parse_blocks",
+    "parse_parallel",
+]
+
+import gc
+import re
+from concurrent.futures import ProcessPoolExecutor
+from server.language import Program, Procedure
+from server.parser import Parser, new_parser
+
+BLOCK_SIZE: int = 1 << 16
+"""The default minimum number of characters in a block."""
+
+# comments and string literals are matched as a whole, so that a line of them
+# starting with the keyword is not taken for the start of a procedure
+_BOUNDARY: re.Pattern[str] = re.compile(
+    r'#[^\n]*|"[^"]*"|^[ \t\r\f\v]*procedure\b', re.MULTILINE
+)
+
+_parser: Parser | None = None
+_source: str = ""
+
+
+def split_blocks(
+    source: str, count: int, block_size: int = BLOCK_SIZE
+) -> list[tuple[int, int, int]]:
+    """
+    Splits a source at the start of procedures into blocks of about equal size.
+
+    Args:
+        source: The source string to be split.
+        count: The maximum number of blocks.
+        block_size: The minimum number of characters in a block, except the last.
+
+    Returns:
+        list[tuple[int, int, int]]: The start index, end index and line number of
+        the start of each block, in order. They cover the whole source.
+    """
+    size: int = max(len(source) // max(count, 1), block_size)
+    blocks: list[tuple[int, int, int]] = []
+    start: int = 0
+    lineno: int = 1
+    seen: bool = False
+    for match in _BOUNDARY.finditer(source):
+        if match[0][0] in '#"':
+            continue
+        if not seen:
+            # the first block must hold a procedure, as a program does
+            seen = True
+            continue
+        boundary: int = match.start()
+        if boundary - start >= size:
+            blocks.append((start, boundary, lineno))
+            lineno += source.count("\n", start, boundary)
+            start = boundary
+    blocks.append((start, len(source), lineno))
+    return blocks
+
+
+def _initialize(source: str, lexer: str) -> None:
+    """
+    Prepares a worker process to parse blocks of a source.
+
+    Args:
+        source: The whole source string.
+        lexer: The tokenizer, either "ply" or "scanner".
+    """
+    global _parser, _source
+    _parser = new_parser(lexer)
+    _source = source
+    # a worker only allocates trees it sends back, so collecting them is wasted
+    gc.disable()
+
+
+def _parse_block(block: tuple[int, int, int]) -> Program:
+    """
+    Parses a block of the source of the worker process.
+
+    Args:
+        block: The start index, end index and line number of the block.
+
+    Returns:
+        Program: The needs and procedures of the block.
+
+    Raises:
+        SyntaxError: If the block is malformed.
+    """
+    start, end, lineno = block
+    return _parser.parse(_source, start, end, lineno)
+
+
+def parse_blocks(
+    source: str, blocks: list[tuple[int, int, int]], workers: int, lexer: str = "ply"
+) -> list[Program]:
+    """
+    Parses blocks of a source string in a pool of worker processes.
+
+    Args:
+        source: The whole source string.
+        blocks: The start index, end index and line number of each block, see
+            `split_blocks`.
+        workers: The maximum number of worker processes.
+        lexer: The tokenizer, either "ply" or "scanner", see `server.loader.prepare`.
+
+    Returns:
+        list[Program]: The needs and procedures of each block, in order.
+
+    Raises:
+        SyntaxError: If a block is malformed; the error of the first malformed
+            block is raised.
+    """
+    # unpickling the trees allocates as many objects as parsing them did, and the
+    # collections those allocations would trigger cost more than the unpickling
+    enabled: bool = gc.isenabled()
+    gc.disable()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(blocks)),
+            initializer=_initialize,
+            initargs=(source, lexer),
+        ) as executor:
+            return list(executor.map(_parse_block, blocks))
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def parse_parallel(
+    source: str, workers: int, lexer: str = "ply", block_size: int = BLOCK_SIZE
+) -> Program:
+    """
+    Parses a source string in a pool of worker processes.
+
+    A source too small to be split into two blocks, or a single worker, is parsed
+    in this process.
+
+    Args:
+        source: The source string to be parsed.
+        workers: The number of worker processes.
+        lexer: The tokenizer, either "ply" or "scanner", see `server.loader.prepare`.
+        block_size: The minimum number of characters in a block.
+
+    Returns:
+        Program: The parsed program, not linked yet.
+
+    Raises:
+        SyntaxError: If the source is malformed; the error of the first
+            malformed block is raised.
+    """
+    # a few blocks per worker, so that a slow block does not hold up the others
+    blocks: list[tuple[int, int, int]] = split_blocks(source, workers * 4, block_size)
+    if len(blocks) == 1 or workers <= 1:
+        return new_parser(lexer).parse(source)
+    programs: list[Program] = parse_blocks(source, blocks, workers, lexer)
+    procedures: list[Procedure] = [
+        procedure for program in programs for procedure in program.procedures
+    ]
+    return Program(needs=programs[0].needs, procedures=procedures)
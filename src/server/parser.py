@@ -2,10 +2,13 @@
 A module for parsing a source string into a Program object.
 """
 
-__all__: tuple[str] = ("Parser",)
+__all__: tuple[str] = ("Parser", "new_parser", "write_tables")
 
+import importlib
+import os
+import sys
 from ply import yacc
-from server.lexer import Lexer
+from server.lexer import TABLES_DIR, Lexer
 from server.language import (
     IntegerValue,
     StringValue,
@@ -38,21 +41,44 @@ class Parser:
         Args:
             lexer: The Lexer instance to be used for lexical analysis.
             **kwargs: Arbitrary keyword arguments to configure the PLY parser.
+
+        By default the LALR tables are read from the generated `server.parsetab`
+        module and nothing is written. PLY checks the signature of the module
+        against the grammar and builds the tables in memory if they differ, so a
+        stale module only costs time; regenerate it with `write_tables`.
         """
+        options: dict[str, object] = {
+            "tabmodule": "server.parsetab",
+            "outputdir": TABLES_DIR,
+            "debug": False,
+            "write_tables": False,
+            **kwargs,
+        }
         self.lexer: Lexer = lexer
-        self.parser: yacc.yacc = yacc.yacc(module=self, **kwargs)
+        self.parser: yacc.yacc = yacc.yacc(module=self, **options)
 
-    def parse(self, source: str) -> Program:
+    def parse(
+        self, source: str, start: int = 0, end: int | None = None, lineno: int = 1
+    ) -> Program:
         """
-        Parses a source string and returns a Program object.
+        Parses a source string, or a block of it, and returns a Program object.
+
+        Tokens and errors in a block keep their positions and line numbers in
+        the whole source, see `server.parallel`.
 
         Args:
             source: The source string to be parsed.
+            start: The index in the source at which the block starts.
+            end: The index in the source at which the block ends, by default its end.
+            lineno: The line number of the start of the block.
 
         Returns:
             A Program object, which represents the parsed program.
         """
-        return self.parser.parse(source, lexer=self.lexer)
+        self.lexer.input(source if end is None else source[:end])
+        self.lexer.lexer.lexpos = start
+        self.lexer.lexer.lineno = lineno
+        return self.parser.parse(lexer=self.lexer)
 
     def p_error(self, p) -> None:
         """
@@ -62,17 +88,27 @@ class Parser:
         It prints the token that caused the error, and then raises a SyntaxError exception.
         """
         print(p)
-        raise SyntaxError
+        if p is None:
+            raise SyntaxError(
+                f"unexpected end of input at line {self.lexer.lexer.lineno}"
+            )
+        value = p.value
+        if isinstance(value, (IntegerValue, StringValue)):
+            value = value.value
+        raise SyntaxError(f"unexpected {p.type} {value!r} at line {p.lineno}")
 
     def p_program(self, p) -> None:
         "program : needs procedures"
         p[0] = Program(needs=p[1], procedures=p[2])
 
     def p_needs(self, p) -> None:
-        """needs : need needs
+        """needs : needs need
         |"""
-        if len(p) == 3:  # need needs
-            p[0] = [p[1]] + p[2]
+        # the list rules are left-recursive, so each list is built by appending
+        # to it in place and the parser stack stays shallow however long it is
+        if len(p) == 3:  # needs need
+            p[1].append(p[2])
+            p[0] = p[1]
         else:  # EMPTY
             p[0] = []
 
@@ -81,10 +117,11 @@ class Parser:
         p[0] = Need(var_id=p[2])
 
     def p_procedures(self, p) -> None:
-        """procedures : procedure procedures
+        """procedures : procedures procedure
         | procedure"""
-        if len(p) == 3:  # procedure procedures
-            p[0] = [p[1]] + p[2]
+        if len(p) == 3:  # procedures procedure
+            p[1].append(p[2])
+            p[0] = p[1]
         else:  # procedure
             p[0] = [p[1]]
 
@@ -93,10 +130,11 @@ class Parser:
         p[0] = Procedure(name=p[2], statements=p[3], branches=p[4])
 
     def p_statements(self, p) -> None:
-        """statements : statement statements
+        """statements : statements statement
         |"""
-        if len(p) == 3:  # statement statements
-            p[0] = [p[1]] + p[2]
+        if len(p) == 3:  # statements statement
+            p[1].append(p[2])
+            p[0] = p[1]
         else:  # EMPTY
             p[0] = []
 
@@ -107,13 +145,18 @@ class Parser:
         p[0] = p[1]
 
     def p_branches(self, p) -> None:
-        """branches : branch branches
-        | default
+        """branches : branch_list default
+        | branch_list"""
+        if len(p) == 3:  # branch_list default
+            p[1].append(p[2])
+        p[0] = p[1]
+
+    def p_branch_list(self, p) -> None:
+        """branch_list : branch_list branch
         |"""
-        if len(p) == 3:  # branch branches
-            p[0] = [p[1]] + p[2]
-        elif len(p) == 2:  # default
-            p[0] = [p[1]]
+        if len(p) == 3:  # branch_list branch
+            p[1].append(p[2])
+            p[0] = p[1]
         else:  # EMPTY
             p[0] = []
 
@@ -139,12 +182,12 @@ class Parser:
 
     def p_bexpr(self, p) -> None:
         """bexpr : bterm
-        | bexpr AND expr"""
+        | bexpr AND bterm"""
         if len(p) == 2:
             # bterm
             p[0] = p[1]
         else:
-            # bexpr AND expr
+            # bexpr AND bterm
             p[0] = BooleanExpression((p[1], p[2], p[3]))
 
     def p_bterm(self, p) -> None:
@@ -154,7 +197,7 @@ class Parser:
             # bfactor
             p[0] = p[1]
         else:
-            # bterm OR expr
+            # bterm OR bfactor
             p[0] = BooleanExpression((p[1], p[2], p[3]))
 
     def p_bfactor(self, p) -> None:
@@ -212,15 +255,58 @@ class Parser:
         | VAR_ID
         | LPAREN expr RPAREN"""
         if len(p) == 2:
-            if isinstance(p[1], IntegerValue):
-                # INTEGER_CONSTANT
-                p[0] = Literal(IntegerValue(p[1].value))
-            elif isinstance(p[1], StringValue):
-                # STRING_LITERAL
-                p[0] = Literal(StringValue(p[1].value))
+            if isinstance(p[1], (IntegerValue, StringValue)):
+                # INTEGER_CONSTANT or STRING_LITERAL, shared with the lexer
+                p[0] = Literal(p[1])
             else:
                 # VAR_ID
                 p[0] = Variable(p[1])
         else:
             # LPAREN expr RPAREN
             p[0] = p[2]
+
+
+def new_parser(lexer: str = "ply") -> Parser:
+    """
+    Returns a parser reading its tokens from the given tokenizer.
+
+    Args:
+        lexer: The tokenizer, either "ply" (`server.lexer.Lexer`) or "scanner"
+            (`server.scanner.Scanner`), which produce the same tokens.
+
+    Returns:
+        Parser: The parser.
+    """
+    if lexer == "scanner":
+        from server.scanner import Scanner
+
+        return Parser(Scanner())
+    return Parser(Lexer())
+
+
+def write_tables() -> list[str]:
+    """
+    Regenerates the lexer and parser table modules shipped with the server.
+
+    Run `python -m server.parser` after changing a token rule or the grammar.
+
+    Returns:
+        list[str]: The paths of the written modules.
+    """
+    paths: list[str] = []
+    for name in ("lextab", "parsetab"):
+        path: str = os.path.join(TABLES_DIR, f"{name}.py")
+        if os.path.exists(path):
+            os.remove(path)
+        sys.modules.pop(f"server.{name}", None)
+        paths.append(path)
+    importlib.invalidate_caches()
+    lexer: Lexer = Lexer(optimize=False)
+    lexer.lexer.writetab("lextab", TABLES_DIR)
+    Parser(lexer, write_tables=True)
+    return paths
+
+
+if __name__ == "__main__":
+    for written in write_tables():
+        print(f"wrote {written}")
@@ -0,0 +1,73 @@
+
+# parsetab.py
+# This file is automatically generated. Do not edit.
+# pylint: disable=W,C,R
+_tabversion = '3.10'
+
+_lr_method = 'LALR'
+
+_lr_signature = 'AND ASSIGN BRANCH CAST COMPARATOR DEFAULT DIV INPUT INTEGER INTEGER_CONSTANT LET LPAREN MINUS MOD MUL NEED NOT OR OUTPUT PLUS PROCEDURE PROC_NAME RPAREN STRING STRING_LITERAL TO VAR_ID WHENprogram : needs proceduresneeds : needs need\n        |need : NEED VAR_IDprocedures : procedures procedure\n        | procedureprocedure : PROCEDURE PROC_NAME statements branchesstatements : statements statement\n        |statement : let_statement\n        | input_statement\n        | output_statementbranches : branch_list default\n        | branch_listbranch_list : branch_list branch\n        |branch : BRANCH PROC_NAME WHEN bexprdefault : DEFAULT PROC_NAMElet_statement : LET VAR_ID ASSIGN exprinput_statement : INPUT VAR_IDoutput_statement : OUTPUT exprbexpr : bterm\n        | bexpr AND btermbterm : bfactor\n        | bterm OR bfactorbfactor : NOT bfactor\n        | LPAREN bexpr RPAREN\n        | expr COMPARATOR exprexpr : term\n        | PLUS expr\n        | MINUS expr\n        | expr PLUS term\n        | expr MINUS term\n        | CAST expr TO INTEGER\n        | CAST expr TO STRINGterm : factor\n        | term MUL factor\n        | term DIV factor\n        | term MOD factorfactor : INTEGER_CONSTANT\n        | STRING_LITERAL\n        | VAR_ID\n        | LPAREN expr RPAREN'
+    
+_lr_action_items = {'NEED':([0,2,4,9,],[-3,6,-2,-4,]),'PROCEDURE':([0,2,3,4,5,8,9,10,11,12,13,14,15,16,17,21,22,26,27,28,32,33,34,35,37,45,46,50,51,52,53,54,55,57,58,59,60,64,65,68,72,73,74,75,],[-3,7,7,-2,-6,-5,-4,-9,-16,-7,-8,-14,-10,-11,-12,-13,-15,-20,-21,-29,-36,-40,-41,-42,-18,-30,-31,-19,-32,-33,-37,-38,-39,-43,-17,-22,-24,-34,-35,-26,-23,-25,-27,-28,]),'$end':([1,3,5,8,10,11,12,13,14,15,16,17,21,22,26,27,28,32,33,34,35,37,45,46,50,51,52,53,54,55,57,58,59,60,64,65,68,72,73,74,75,],[0,-1,-6,-5,-9,-16,-7,-8,-14,-10,-11,-12,-13,-15,-20,-21,-29,-36,-40,-41,-42,-18,-30,-31,-19,-32,-33,-37,-38,-39,-43,-17,-22,-24,-34,-35,-26,-23,-25,-27,-28,]),'VAR_ID':([6,18,19,20,29,30,31,36,39,40,41,42,43,44,49,61,62,66,67,71,],[9,25,26,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,35,]),'PROC_NAME':([7,23,24,],[10,37,38,]),'LET':([10,11,13,15,16,17,26,27,28,32,33,34,35,45,46,50,51,52,53,54,55,57,64,65,],[-9,18,-8,-10,-11,-12,-20,-21,-29,-36,-40,-41,-42,-30,-31,-19,-32,-33,-37,-38,-39,-43,-34,-35,]),'INPUT':([10,11,13,15,16,17,26,27,28,32,33,34,35,45,46,50,51,52,53,54,55,57,64,65,],[-9,19,-8,-10,-11,-12,-20,-21,-29,-36,-40,-41,-42,-30,-31,-19,-32,-33,-37,-38,-39,-43,-34,-35,]),'OUTPUT':([10,11,13,15,16,17,26,27,28,32,33,34,35,45,46,50,51,52,53,54,55,57,64,65,],[-9,20,-8,-10,-11,-12,-20,-21,-29,-36,-40,-41,-42,-30,-31,-19,-32,-33,-37,-38,-39,-43,-34,-35,]),'DEFAULT':([10,11,13,14,15,16,17,22,26,27,28,32,33,34,35,45,46,50,51,52,53,54,55,57,58,59,60,64,65,68,72,73,74,75,],[-9,-16,-8,23,-10,-11,-12,-15,-20,-21,-29,-36,-40,-41,-42,-30,-31,-19,-32,-33,-37,-38,-39,-43,-17,-22,-24,-34,-35,-26,-23,-25,-27,-28,]),'BRANCH':([10,11,13,14,15,16,17,22,26,27,28,32,33,34,35,45,46,50,51,52,53,54,55,57,58,59,60,64,65,68,72,73,74,75,],[-9,-16,-8,24,-10,-11,-12,-15,-20,-21,-29,-36,-40,-41,-42,-30,-31,-19,-32,-33,-37,-38,-39,-43,-17,-22,-24,-34,-35,-26,-23,-25,-27,-28,]),'PLUS':([20,27,28,29,30,31,32,33,34,35,36,39,45,46,47,48,49,50,51,52,53,54,55,57,61,62,63,64,65,66,67,70,71,75,],[29,40,-29,29,29,29,-36,-40,-41,-42,29,29,40,40,40,40,29,40,-32,-33,-37,-38,-39,-43,29,29,40,-34,-35,29,29,40,29,40,]),'MINUS':([20,27,28,29,30,31,32,33,34,35,36,39,45,46,47,48,49,50,51,52,53,54,55,57,61,62,63,64,65,66,67,70,71,75,],[30,41,-29,30,30,30,-36,-40,-41,-42,30,30,41,41,41,41,30,41,-32,-33,-37,-38,-39,-43,30,30,41,-34,-35,30,30,41,30,41,]),'CAST':([20,29,30,31,36,39,49,61,62,66,67,71,],[31,31,31,31,31,31,31,31,31,31,31,31,]),'INTEGER_CONSTANT':([20,29,30,31,36,39,40,41,42,43,44,49,61,62,66,67,71,],[33,33,33,33,33,33,33,33,33,33,33,33,33,33,33,33,33,]),'STRING_LITERAL':([20,29,30,31,36,39,40,41,42,43,44,49,61,62,66,67,71,],[34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,34,]),'LPAREN':([20,29,30,31,36,39,40,41,42,43,44,49,61,62,66,67,71,],[36,36,36,36,36,36,36,36,36,36,36,62,62,62,62,62,36,]),'ASSIGN':([25,],[39,]),'TO':([28,32,33,34,35,45,46,47,51,52,53,54,55,57,64,65,],[-29,-36,-40,-41,-42,-30,-31,56,-32,-33,-37,-38,-39,-43,-34,-35,]),'RPAREN':([28,32,33,34,35,45,46,48,51,52,53,54,55,57,59,60,64,65,68,69,70,72,73,74,75,],[-29,-36,-40,-41,-42,-30,-31,57,-32,-33,-37,-38,-39,-43,-22,-24,-34,-35,-26,74,57,-23,-25,-27,-28,]),'COMPARATOR':([28,32,33,34,35,45,46,51,52,53,54,55,57,63,64,65,70,],[-29,-36,-40,-41,-42,-30,-31,-32,-33,-37,-38,-39,-43,71,-34,-35,71,]),'OR':([28,32,33,34,35,45,46,51,52,53,54,55,57,59,60,64,65,68,72,73,74,75,],[-29,-36,-40,-41,-42,-30,-31,-32,-33,-37,-38,-39,-43,67,-24,-34,-35,-26,67,-25,-27,-28,]),'AND':([28,32,33,34,35,45,46,51,52,53,54,55,57,58,59,60,64,65,68,69,72,73,74,75,],[-29,-36,-40,-41,-42,-30,-31,-32,-33,-37,-38,-39,-43,66,-22,-24,-34,-35,-26,66,-23,-25,-27,-28,]),'MUL':([28,32,33,34,35,51,52,53,54,55,57,],[42,-36,-40,-41,-42,42,42,-37,-38,-39,-43,]),'DIV':([28,32,33,34,35,51,52,53,54,55,57,],[43,-36,-40,-41,-42,43,43,-37,-38,-39,-43,]),'MOD':([28,32,33,34,35,51,52,53,54,55,57,],[44,-36,-40,-41,-42,44,44,-37,-38,-39,-43,]),'WHEN':([38,],[49,]),'NOT':([49,61,62,66,67,],[61,61,61,61,61,]),'INTEGER':([56,],[64,]),'STRING':([56,],[65,]),}
+
+_lr_action = {}
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _x in _lr_action:  _lr_action[_x] = {}
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+
+_lr_goto_items = {'program':([0,],[1,]),'needs':([0,],[2,]),'procedures':([2,],[3,]),'need':([2,],[4,]),'procedure':([2,3,],[5,8,]),'statements':([10,],[11,]),'branches':([11,],[12,]),'statement':([11,],[13,]),'branch_list':([11,],[14,]),'let_statement':([11,],[15,]),'input_statement':([11,],[16,]),'output_statement':([11,],[17,]),'default':([14,],[21,]),'branch':([14,],[22,]),'expr':([20,29,30,31,36,39,49,61,62,66,67,71,],[27,45,46,47,48,50,63,63,70,63,63,75,]),'term':([20,29,30,31,36,39,40,41,49,61,62,66,67,71,],[28,28,28,28,28,28,51,52,28,28,28,28,28,28,]),'factor':([20,29,30,31,36,39,40,41,42,43,44,49,61,62,66,67,71,],[32,32,32,32,32,32,32,32,53,54,55,32,32,32,32,32,32,]),'bexpr':([49,62,],[58,69,]),'bterm':([49,62,66,],[59,59,72,]),'bfactor':([49,61,62,66,67,],[60,68,60,60,73,]),}
+
+_lr_goto = {}
+for _k, _v in _lr_goto_items.items():
+   for _x, _y in zip(_v[0], _v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = {}
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+_lr_productions = [
+  ("S' -> program","S'",1,None,None,None),
+  ('program -> needs procedures','program',2,'p_program','parser.py',83),
+  ('needs -> needs need','needs',2,'p_needs','parser.py',87),
+  ('needs -> <empty>','needs',0,'p_needs','parser.py',88),
+  ('need -> NEED VAR_ID','need',2,'p_need','parser.py',98),
+  ('procedures -> procedures procedure','procedures',2,'p_procedures','parser.py',102),
+  ('procedures -> procedure','procedures',1,'p_procedures','parser.py',103),
+  ('procedure -> PROCEDURE PROC_NAME statements branches','procedure',4,'p_procedure','parser.py',111),
+  ('statements -> statements statement','statements',2,'p_statements','parser.py',115),
+  ('statements -> <empty>','statements',0,'p_statements','parser.py',116),
+  ('statement -> let_statement','statement',1,'p_statement','parser.py',124),
+  ('statement -> input_statement','statement',1,'p_statement','parser.py',125),
+  ('statement -> output_statement','statement',1,'p_statement','parser.py',126),
+  ('branches -> branch_list default','branches',2,'p_branches','parser.py',130),
+  ('branches -> branch_list','branches',1,'p_branches','parser.py',131),
+  ('branch_list -> branch_list branch','branch_list',2,'p_branch_list','parser.py',137),
+  ('branch_list -> <empty>','branch_list',0,'p_branch_list','parser.py',138),
+  ('branch -> BRANCH PROC_NAME WHEN bexpr','branch',4,'p_branch','parser.py',146),
+  ('default -> DEFAULT PROC_NAME','default',2,'p_default','parser.py',150),
+  ('let_statement -> LET VAR_ID ASSIGN expr','let_statement',4,'p_let_statement','parser.py',154),
+  ('input_statement -> INPUT VAR_ID','input_statement',2,'p_input_statement','parser.py',158),
+  ('output_statement -> OUTPUT expr','output_statement',2,'p_output_statement','parser.py',162),
+  ('bexpr -> bterm','bexpr',1,'p_bexpr','parser.py',166),
+  ('bexpr -> bexpr AND bterm','bexpr',3,'p_bexpr','parser.py',167),
+  ('bterm -> bfactor','bterm',1,'p_bterm','parser.py',176),
+  ('bterm -> bterm OR bfactor','bterm',3,'p_bterm','parser.py',177),
+  ('bfactor -> NOT bfactor','bfactor',2,'p_bfactor','parser.py',186),
+  ('bfactor -> LPAREN bexpr RPAREN','bfactor',3,'p_bfactor','parser.py',187),
+  ('bfactor -> expr COMPARATOR expr','bfactor',3,'p_bfactor','parser.py',188),
+  ('expr -> term','expr',1,'p_expr','parser.py',200),
+  ('expr -> PLUS expr','expr',2,'p_expr','parser.py',201),
+  ('expr -> MINUS expr','expr',2,'p_expr','parser.py',202),
+  ('expr -> expr PLUS term','expr',3,'p_expr','parser.py',203),
+  ('expr -> expr MINUS term','expr',3,'p_expr','parser.py',204),
+  ('expr -> CAST expr TO INTEGER','expr',4,'p_expr','parser.py',205),
+  ('expr -> CAST expr TO STRING','expr',4,'p_expr','parser.py',206),
+  ('term -> factor','term',1,'p_term','parser.py',223),
+  ('term -> term MUL factor','term',3,'p_term','parser.py',224),
+  ('term -> term DIV factor','term',3,'p_term','parser.py',225),
+  ('term -> term MOD factor','term',3,'p_term','parser.py',226),
+  ('factor -> INTEGER_CONSTANT','factor',1,'p_factor','parser.py',235),
+  ('factor -> STRING_LITERAL','factor',1,'p_factor','parser.py',236),
+  ('factor -> VAR_ID','factor',1,'p_factor','parser.py',237),
+  ('factor -> LPAREN expr RPAREN','factor',3,'p_factor','parser.py',238),
+]
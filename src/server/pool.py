@@ -0,0 +1,123 @@
+"""
+Serving connections from a fixed number of threads, with admission control.
+
+Without a pool, the "thread" mode starts a thread for every connection it
+accepts, so a burst of connections starts a burst of threads. A `WorkerPool`
+runs connections on a fixed number of threads instead. A connection accepted
+while every thread is busy waits in a queue of bounded length, and one accepted
+while the queue is full too is turned away with `reject`, which tells the
+client the server is busy and closes the connection.
+
+The `queue_depth` counter of `server.metrics` is the number of connections
+waiting for a thread, and `rejected_connections` the number turned away, so a
+supervisor can scale on them.
+"""
+
+__all__: list[str] = [
+    "WorkerPool",
+    "reject",
+]
+
+import socket
+import threading
+from collections import deque
+from collections.abc import Callable
+from config import busy_message
+from config import exit_signal
+from server.metrics import metrics
+
+
+class WorkerPool:
+    """
+    A fixed number of threads handling connections from a bounded queue.
+    """
+
+    def __init__(
+        self, workers: int, queue_size: int, handler: Callable[..., None]
+    ) -> None:
+        """
+        Initializes a WorkerPool instance and starts its threads.
+
+        Args:
+            workers: The number of threads.
+            queue_size: The maximum number of connections waiting for a thread.
+            handler: The function handling a connection, called with the
+                arguments given to `submit`.
+
+        Raises:
+            ValueError: If there are no threads or the queue size is negative.
+        """
+        if workers <= 0 or queue_size < 0:
+            raise ValueError(
+                f"a pool needs threads and a queue, not {workers} and {queue_size}"
+            )
+        self._handler: Callable[..., None] = handler
+        self._queue_size: int = queue_size
+        self._pending: deque[tuple] = deque()
+        self._idle: int = 0
+        self._condition: threading.Condition = threading.Condition()
+        for _ in range(workers):
+            threading.Thread(target=self._work, daemon=True).start()
+
+    def submit(self, *args) -> bool:
+        """
+        Queues a connection for the next idle thread, unless the queue is full.
+
+        Args:
+            *args: The arguments of the handler.
+
+        Returns:
+            bool: Whether the connection was queued; if not, the caller should
+            reject it.
+        """
+        with self._condition:
+            # a connection an idle thread is about to take does not wait
+            if len(self._pending) >= self._idle + self._queue_size:
+                metrics.increment("rejected_connections")
+                return False
+            self._pending.append(args)
+            # counted under the same lock, so the gauge follows the queue exactly
+            metrics.increment("queue_depth")
+            self._condition.notify()
+        return True
+
+    def _work(self) -> None:
+        """
+        Handles queued connections, one at a time, forever.
+        """
+        while True:
+            with self._condition:
+                self._idle += 1
+                while not self._pending:
+                    self._condition.wait()
+                self._idle -= 1
+                args: tuple = self._pending.popleft()
+                metrics.increment("queue_depth", -1)
+            try:
+                self._handler(*args)
+            except Exception:
+                # an error in one session must not cost the pool a thread; the
+                # traceback module is only imported then, it slows the startup
+                import traceback
+
+                traceback.print_exc()
+
+
+def reject(conn: socket.socket) -> None:
+    """
+    Tells a client the server is busy and closes its connection.
+
+    The message is sent as the end of a conversation in the delimiter protocol,
+    which every conversation starts in, so that clients of either protocol end
+    it, and rejecting a connection never blocks.
+
+    Args:
+        conn: The accepted client socket.
+    """
+    try:
+        conn.setblocking(False)
+        conn.send((busy_message + "\n").encode() + exit_signal)
+    except OSError:
+        pass
+    finally:
+        conn.close()
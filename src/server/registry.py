@@ -0,0 +1,211 @@
+"""
+Hosting every script of a directory from one server.
+
+A `Registry` maps the name of a script to the file `<name>.script` in its
+directory. A client names the script it wants in answer to the first prompt of
+the conversation, or in the SCRIPT frame switching to the framed protocol, see
+`protocol`. The script is loaded the first time it is asked for, from its
+artifact if it has a fresh one, see `server.artifact`.
+
+Loaded scripts are kept in a least recently used cache holding at most a given
+number of them, so that a server hosting many scripts only keeps the busy ones
+in memory. Evicting a script does not affect the sessions running it, which
+hold on to its program until they end. A cached script is not loaded again
+when its file changes; see `server.reload` for that.
+
+The counters `script_hits`, `script_loads` and `script_evictions` of
+`server.metrics` tell how well the cache fits the traffic.
+"""
+
+__all__: list[str] = [
+    "SCRIPT_SUFFIX",
+    "SCRIPT_PROMPT",
+    "Registry",
+]
+
+import os
+import threading
+from collections import OrderedDict
+from server.artifact import load_cached
+from server.language import Program
+from server.metrics import metrics
+from server.vm import Code, compile_program
+
+SCRIPT_SUFFIX: str = ".script"
+"""The suffix of the files of the scripts in a directory."""
+
+SCRIPT_PROMPT: str = "script required: "
+"""The prompt asking a client that did not name a script for one."""
+
+
+class Registry:
+    """
+    A class loading the scripts of a directory on demand, and caching the latest.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        capacity: int,
+        optimize: bool = True,
+        lexer: str = "ply",
+        engine: str = "tree",
+        parse_workers: int = 0,
+    ) -> None:
+        """
+        Initializes a Registry instance with no script loaded.
+
+        Args:
+            directory: The directory holding the scripts.
+            capacity: The maximum number of scripts kept loaded.
+            optimize: Whether to fold constants and remove unreachable code.
+            lexer: The tokenizer, either "ply" or "scanner", see
+                `server.loader.prepare`.
+            engine: The execution engine, either "tree" or "vm"; programs are
+                also compiled to bytecode for "vm".
+            parse_workers: The number of processes to parse a script in, see
+                `server.loader.prepare`.
+
+        Raises:
+            ValueError: If the capacity is not positive.
+        """
+        if capacity <= 0:
+            raise ValueError(f"capacity must be positive, not {capacity}")
+        self._directory: str = directory
+        self._capacity: int = capacity
+        self._optimize: bool = optimize
+        self._lexer: str = lexer
+        self._engine: str = engine
+        self._parse_workers: int = parse_workers
+        self._lock: threading.Lock = threading.Lock()
+        self._cache: OrderedDict[str, tuple[Program, Code | None]] = OrderedDict()
+        self._loading: dict[str, threading.Lock] = {}
+
+    def get(self, name: str) -> tuple[Program, Code | None]:
+        """
+        Returns a script, loading it if it is not cached.
+
+        A script is loaded by one thread at a time; the others asking for it wait
+        for that load rather than loading it again.
+
+        Args:
+            name: The name of the script, that is its filename without suffix.
+
+        Returns:
+            tuple[Program, Code | None]: The program, and its bytecode if the
+            engine is "vm".
+
+        Raises:
+            KeyError: If there is no such script, or it cannot be loaded; the
+                message of the error is meant for the client.
+        """
+        version: tuple[Program, Code | None] | None = self.get_cached(name)
+        if version is not None:
+            return version
+        filename: str = self._filename(name)
+        with self._lock:
+            loading: threading.Lock = self._loading.setdefault(name, threading.Lock())
+        with loading:
+            version = self.get_cached(name)
+            if version is not None:
+                return version
+            try:
+                version = self._load(filename)
+                # cached before the lock is released, or a thread arriving in
+                # between would find neither and load the script again
+                self._insert(name, version)
+            except (OSError, UnicodeDecodeError, SyntaxError) as error:
+                print(f"Loading {filename} failed: {error}", flush=True)
+                raise KeyError(f"script {name!r} cannot be loaded") from error
+            finally:
+                with self._lock:
+                    self._loading.pop(name, None)
+        return version
+
+    def get_cached(self, name: str) -> tuple[Program, Code | None] | None:
+        """
+        Returns a script if it is cached, without loading it otherwise.
+
+        Args:
+            name: The name of the script.
+
+        Returns:
+            tuple[Program, Code | None] | None: The program and its bytecode, or
+            None if the script is not cached.
+        """
+        with self._lock:
+            version: tuple[Program, Code | None] | None = self._cache.get(name)
+            if version is None:
+                return None
+            self._cache.move_to_end(name)
+        metrics.increment("script_hits")
+        return version
+
+    def cached(self) -> list[str]:
+        """
+        Returns the names of the cached scripts.
+
+        Returns:
+            list[str]: The names, from the least to the most recently used.
+        """
+        with self._lock:
+            return list(self._cache)
+
+    def _filename(self, name: str) -> str:
+        """
+        Returns the path to a script of the directory.
+
+        Args:
+            name: The name of the script.
+
+        Returns:
+            str: The path to the file of the script.
+
+        Raises:
+            KeyError: If the name does not name a script of the directory; names
+                holding a path separator or starting with a dot never do.
+        """
+        if not name or name.startswith(".") or os.sep in name or "/" in name:
+            raise KeyError(f"unknown script {name!r}")
+        filename: str = os.path.join(self._directory, name + SCRIPT_SUFFIX)
+        if not os.path.isfile(filename):
+            raise KeyError(f"unknown script {name!r}")
+        return filename
+
+    def _load(self, filename: str) -> tuple[Program, Code | None]:
+        """
+        Loads a script.
+
+        Args:
+            filename: The path to the script.
+
+        Returns:
+            tuple[Program, Code | None]: The program, and its bytecode if the
+            engine is "vm".
+
+        Raises:
+            SyntaxError: If the script cannot be loaded.
+        """
+        program: Program = load_cached(
+            filename, self._optimize, self._lexer, self._parse_workers
+        )
+        code: Code | None = compile_program(program) if self._engine == "vm" else None
+        metrics.increment("script_loads")
+        return program, code
+
+    def _insert(self, name: str, version: tuple[Program, Code | None]) -> None:
+        """
+        Caches a script, evicting the least recently used ones beyond the capacity.
+
+        Args:
+            name: The name of the script.
+            version: The program and its bytecode.
+        """
+        evicted: int = 0
+        with self._lock:
+            self._cache[name] = version
+            while len(self._cache) > self._capacity:
+                self._cache.popitem(last=False)
+                evicted += 1
+        if evicted:
+            metrics.increment("script_evictions", evicted)
@@ -0,0 +1,265 @@
+"""
+Hot reloading of a running script.
+
+A `Reloader` holds the current version of a script, that is its program and,
+for the virtual machine, its bytecode. `Reloader.watch` checks the file for
+changes from a daemon thread. When the file changes, the reloader loads it
+again and swaps the new version in with a single assignment. A new session
+takes whichever version is current when it starts. A live session keeps the
+version it started with until it ends, since nothing a version holds is
+changed by the next one.
+
+Only the procedure blocks whose text changed are parsed again. The source is
+split into a block per procedure, see `server.parallel.split_blocks`, and the
+syntax tree of every block is kept pickled under the SHA-256 hash of its text.
+An unchanged block is unpickled rather than parsed, which is several times
+faster and gives the new version its own copy of the tree. The changed blocks
+are parsed in worker processes if there are several of them and workers are
+configured. Linking, optimizing, type-checking and compiling then run on the
+whole program, as they depend on every procedure.
+
+The first version is taken from the script's artifact if it is fresh, see
+`server.artifact`; the first reload after that parses every block.
+
+A version that fails to load, whatever the error, is reported and the current
+one is kept. The file is tried again at the next check, even if it has not
+changed since.
+"""
+
+__all__: list[str] = [
+    "Reloader",
+]
+
+import gc
+import hashlib
+import os
+import pickle
+import threading
+from server.artifact import artifact_path, decode_source, read_artifact
+from server.language import Procedure, Program
+from server.metrics import metrics
+from server.vm import Code, compile_program
+
+
+class Reloader:
+    """
+    A class keeping the latest version of a script loaded, for new sessions.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        interval: float,
+        optimize: bool = True,
+        lexer: str = "ply",
+        engine: str = "tree",
+        parse_workers: int = 0,
+    ) -> None:
+        """
+        Initializes a Reloader instance and loads the first version of the script.
+
+        Args:
+            filename: The path to the script.
+            interval: The number of seconds between two checks of the file.
+            optimize: Whether to fold constants and remove unreachable code.
+            lexer: The tokenizer, either "ply" or "scanner", see
+                `server.loader.prepare`.
+            engine: The execution engine, either "tree" or "vm"; the program is
+                also compiled to bytecode for "vm".
+            parse_workers: The number of processes to parse changed blocks in,
+                or 0 to parse them in this process.
+
+        Raises:
+            SyntaxError: If the script cannot be loaded.
+        """
+        self._filename: str = filename
+        self._interval: float = interval
+        self._optimize: bool = optimize
+        self._lexer: str = lexer
+        self._engine: str = engine
+        self._parse_workers: int = parse_workers
+        self._lock: threading.Lock = threading.Lock()
+        self._stopped: threading.Event = threading.Event()
+        self._error: str | None = None
+        self._blocks: dict[bytes, bytes] = {}
+        self._stamp: tuple[int, int] = self._stat()
+        self._source: bytes = self._read()
+        program: Program | None = read_artifact(
+            artifact_path(filename), self._source, optimize
+        )
+        if program is None:
+            self._current: tuple[Program, Code | None] = self._load(self._source)
+        else:
+            self._current = (program, self._compile(program))
+
+    @property
+    def current(self) -> tuple[Program, Code | None]:
+        """
+        Returns the current version of the script.
+
+        Returns:
+            tuple[Program, Code | None]: The program, and its bytecode if the
+            engine is "vm".
+        """
+        return self._current
+
+    def reload(self) -> bool:
+        """
+        Loads the script again if its file changed, and makes it the current version.
+
+        An error loading the new version is printed and counted, unless it is the
+        same as the last one, and the current version kept. The file is then
+        checked again next time, even if it has not changed.
+
+        Returns:
+            bool: Whether a new version was swapped in.
+        """
+        with self._lock:
+            try:
+                stamp: tuple[int, int] = self._stat()
+                if stamp == self._stamp:
+                    return False
+                source: bytes = self._read()
+                if source == self._source:
+                    self._stamp = stamp
+                    return False
+                current: tuple[Program, Code | None] = self._load(source)
+            except Exception as error:
+                # any error escaping would end the watching thread, and hot
+                # reloading with it for the life of the process
+                message: str = f"{type(error).__name__}: {error}"
+                if message != self._error:
+                    self._error = message
+                    print(f"Reloading {self._filename} failed: {message}", flush=True)
+                    metrics.increment("reload_errors")
+                return False
+            self._stamp = stamp
+            self._source = source
+            self._current = current
+            self._error = None
+        metrics.increment("reloads")
+        print(f"Reloaded {self._filename}", flush=True)
+        return True
+
+    def watch(self) -> None:
+        """
+        Checks the file for changes from a daemon thread, and reloads it when it does.
+        """
+
+        def poll() -> None:
+            while not self._stopped.wait(self._interval):
+                self.reload()
+
+        threading.Thread(target=poll, daemon=True).start()
+
+    def stop(self) -> None:
+        """
+        Stops checking the file for changes.
+        """
+        self._stopped.set()
+
+    def _stat(self) -> tuple[int, int]:
+        """
+        Returns what tells whether the file may have changed.
+
+        Returns:
+            tuple[int, int]: The modification time of the file, in nanoseconds,
+            and its size.
+        """
+        stat: os.stat_result = os.stat(self._filename)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read(self) -> bytes:
+        """
+        Reads the source of the script.
+
+        Returns:
+            bytes: The source, as read from the file, which is what artifacts are
+            keyed by.
+        """
+        with open(file=self._filename, mode="rb") as file:
+            return file.read()
+
+    def _compile(self, program: Program) -> Code | None:
+        """
+        Compiles a program to bytecode, if the engine runs bytecode.
+
+        Args:
+            program: The compiled program.
+
+        Returns:
+            Code | None: The bytecode if the engine is "vm", or else None.
+        """
+        return compile_program(program) if self._engine == "vm" else None
+
+    def _load(self, data: bytes) -> tuple[Program, Code | None]:
+        """
+        Loads a version of the script, parsing only the blocks not seen before.
+
+        Args:
+            data: The source of the version, as read from the file.
+
+        Returns:
+            tuple[Program, Code | None]: The compiled program, and its bytecode
+            if the engine is "vm".
+
+        Raises:
+            SyntaxError: If the source cannot be loaded.
+        """
+        # the parser is only imported once a script is actually loaded
+        from server.loader import prepare_program
+        from server.parallel import parse_blocks, split_blocks
+        from server.parser import new_parser
+
+        source: str = decode_source(data)
+        # a block per procedure, or per line of procedures
+        blocks: list[tuple[int, int, int]] = split_blocks(source, len(source), 1)
+        keys: list[bytes] = [
+            hashlib.sha256(source[start:end].encode("utf-8")).digest()
+            for start, end, _ in blocks
+        ]
+        missing: dict[bytes, tuple[int, int, int]] = {}
+        for key, block in zip(keys, blocks):
+            if key not in self._blocks:
+                missing.setdefault(key, block)
+        cache: dict[bytes, bytes] = {}
+        programs: list[Program] = []
+        # loading allocates objects by the million, every one of them live, so the
+        # collections they would trigger find nothing to free; see server.parallel
+        enabled: bool = gc.isenabled()
+        gc.disable()
+        try:
+            parsed: list[Program]
+            if self._parse_workers > 1 and len(missing) > 1:
+                parsed = parse_blocks(
+                    source, list(missing.values()), self._parse_workers, self._lexer
+                )
+            elif missing:
+                parser = new_parser(self._lexer)
+                parsed = [parser.parse(source, *block) for block in missing.values()]
+            else:
+                parsed = []
+            # a block parsed just now is used as it is the first time it occurs
+            fresh: dict[bytes, Program] = dict(zip(missing, parsed))
+            for key in keys:
+                block: Program | None = fresh.pop(key, None)
+                if block is not None:
+                    cache[key] = pickle.dumps(block, pickle.HIGHEST_PROTOCOL)
+                else:
+                    cache.setdefault(key, self._blocks.get(key))
+                    block = pickle.loads(cache[key])
+                programs.append(block)
+            procedures: list[Procedure] = [
+                procedure for block in programs for procedure in block.procedures
+            ]
+            program: Program = Program(needs=programs[0].needs, procedures=procedures)
+            prepare_program(program, self._optimize)
+            program.compile()
+            code: Code | None = self._compile(program)
+        finally:
+            if enabled:
+                gc.enable()
+        # only the blocks of the latest version are kept
+        self._blocks = cache
+        metrics.increment("reparsed_blocks", len(missing))
+        return program, code
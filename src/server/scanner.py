@@ -0,0 +1,174 @@
+"""
+A hand-written scanner producing the same tokens as `server.lexer.Lexer`.
+
+PLY matches one token at a time against a master regex, dispatches to a rule
+method per token, and builds a `LexToken` with an instance dictionary for each.
+The scanner instead walks the source in a single generator, with one regex that
+also consumes the whitespace before each token, and builds each token as a tuple.
+
+The tokens have the same types, values and positions as PLY's, and an invalid
+character raises the same SyntaxError, once the parser asks for the token at
+that position. It can replace the PLY lexer anywhere, e.g.
+`Parser(Scanner())`.
+"""
+
+__all__: list[str] = [
+    "Token",
+    "Scanner",
+]
+
+import re
+from collections.abc import Callable, Iterator
+from functools import partial
+from operator import itemgetter
+from server.language import (
+    integer_value,
+    string_value,
+)
+from server.lexer import Lexer
+
+# the groups, in the order the rules of `Lexer` try them
+_TOKEN: re.Pattern[str] = re.compile(
+    r"[ \t\r\f\v]*(?:"
+    r"(\d+)"  # 1: INTEGER_CONSTANT
+    r"|(\w+)"  # 2: a keyword or PROC_NAME
+    r"|(\$\{\w+\})"  # 3: VAR_ID
+    r"|(\n+)"  # 4: newlines
+    r'|("[^"]*")'  # 5: STRING_LITERAL
+    r"|(<=|>=|==|!=|<|>)"  # 6: COMPARATOR
+    r"|([=+\-*/%()])"  # 7: an operator
+    r"|(#.*)"  # 8: a comment
+    r"|\Z)"
+)
+
+_IGNORE: re.Pattern[str] = re.compile(r"[ \t\r\f\v]*")
+
+_OPERATORS: dict[str, str] = {
+    "=": "ASSIGN",
+    "+": "PLUS",
+    "-": "MINUS",
+    "*": "MUL",
+    "/": "DIV",
+    "%": "MOD",
+    "(": "LPAREN",
+    ")": "RPAREN",
+}
+
+
+class Token(tuple):
+    """
+    A token, read like a PLY `LexToken`.
+
+    Tokens are (type, value, lineno, lexpos) tuples, which are cheaper to build
+    than objects. The parser may still attach attributes to them, such as `lexer`.
+    """
+
+    type = property(itemgetter(0), doc="The type of the token.")
+    value = property(itemgetter(1), doc="The value of the token.")
+    lineno = property(itemgetter(2), doc="The line the token is on.")
+    lexpos = property(itemgetter(3), doc="The index of the token in the source.")
+
+    def __repr__(self) -> str:
+        """
+        Returns a string representation of the token, the same as PLY's.
+
+        Returns:
+            str: A string in the format 'LexToken(<type>,<value>,<lineno>,<lexpos>)'.
+        """
+        return f"LexToken({self[0]},{self[1]!r},{self[2]},{self[3]})"
+
+    __str__ = __repr__
+
+
+class Scanner:
+    """
+    A class for tokenizing a source string into a sequence of tokens, without PLY.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes a Scanner instance with no input.
+        """
+        self.lexdata: str = ""
+        self.lexpos: int = 0
+        self.lineno: int = 1
+        self.token: Callable[[], Token | None] = partial(next, iter(()), None)
+
+    @property
+    def lexer(self) -> "Scanner":
+        """
+        Returns the scanner itself, which holds the state `Lexer.lexer` holds.
+
+        Returns:
+            Scanner: The scanner.
+        """
+        return self
+
+    def input(self, data: str) -> None:
+        """
+        Sets the input data, whose tokens `token` then returns one by one.
+
+        As with PLY, line numbers continue from the previous input, and scanning
+        can start further in the input by setting `lexpos` and `lineno`.
+
+        Args:
+            data: The input data string to be tokenized.
+        """
+        self.lexdata = data
+        self.lexpos = 0
+        # a C-level call per token, since the parser calls it for every token
+        self.token = partial(next, self._scan(data), None)
+
+    def _scan(self, data: str) -> Iterator[Token]:
+        """
+        Yields the tokens of the input data, counting lines as it goes.
+
+        Args:
+            data: The input data string to be tokenized.
+
+        Yields:
+            Token: The next token.
+
+        Raises:
+            SyntaxError: If no token matches the input at some position.
+        """
+        keywords: dict[str, str] = Lexer.keywords
+        operators: dict[str, str] = _OPERATORS
+        # read once the first token is asked for, so both can be set after `input`
+        lineno: int = self.lineno
+        pos: int = self.lexpos
+        for match in _TOKEN.finditer(data, pos):
+            if match.start() != pos:
+                pos = _IGNORE.match(data, pos).end()
+                self.lexpos, self.lineno = pos, lineno
+                end: int = data.find("\n", pos)
+                rest: str = data[pos:] if end < 0 else data[pos:end]
+                raise SyntaxError(f"invalid token at line {lineno}: {rest!r}")
+            pos = match.end()
+            group: int | None = match.lastindex
+            if group == 2:
+                text: str = match[2]
+                yield Token(
+                    (keywords.get(text, "PROC_NAME"), text, lineno, pos - len(text))
+                )
+            elif group == 3:
+                text = match[3]
+                yield Token(("VAR_ID", text, lineno, pos - len(text)))
+            elif group == 4:
+                lineno += pos - match.start(4)
+                self.lineno = lineno
+            elif group == 5:
+                text = match[5]
+                value = string_value(text[1:-1])
+                yield Token(("STRING_LITERAL", value, lineno, pos - len(text)))
+            elif group == 7:
+                text = match[7]
+                yield Token((operators[text], text, lineno, pos - 1))
+            elif group == 6:
+                text = match[6]
+                yield Token(("COMPARATOR", text, lineno, pos - len(text)))
+            elif group == 1:
+                text = match[1]
+                value = integer_value(int(text))
+                yield Token(("INTEGER_CONSTANT", value, lineno, pos - len(text)))
+        self.lexpos = pos
@@ -0,0 +1,287 @@
+"""
+A transport-agnostic, resumable session running one conversation of a program.
+"""
+
+__all__: list[str] = [
+    "Session",
+]
+
+from collections.abc import Generator
+from server.language import (
+    StringValue,
+    Value,
+    Frame,
+    Expression,
+    Need,
+    InputStatement,
+    OutputStatement,
+    LetStatement,
+    Procedure,
+    Program,
+)
+from server.interface import (
+    process_natrual_language,
+    generate_multimedia_response,
+)
+from server.vm import Code, execute
+
+
+class Session:
+    """
+    A single conversation with a program, independent of any transport.
+
+    The session runs the program until it needs input, then pauses and hands back
+    the outputs produced so far. Feeding it the next line of input resumes the
+    program where it stopped. Because a paused session holds no thread and no
+    socket, one thread or event loop can drive any number of sessions.
+
+    Example:
+        session = Session(program)
+        outputs = session.start()
+        while not session.finished:
+            outputs = session.feed(read_line())
+    """
+
+    __slots__ = (
+        "_program",
+        "_code",
+        "_frame",
+        "_registers",
+        "_outputs",
+        "_steps",
+        "_finished",
+    )
+
+    def __init__(self, program: Program, code: Code | None = None) -> None:
+        """
+        Initializes a Session instance.
+
+        Args:
+            program: The linked Program object representing the program to run.
+            code: The program compiled to bytecode, to run it on the virtual
+                machine instead of walking its syntax tree.
+
+        Raises:
+            RuntimeError: If the program has not been linked.
+        """
+        if not program.linked:
+            raise RuntimeError("program must be linked before it is run")
+        self._program: Program = program
+        self._code: Code | None = code
+        self._frame: Frame = [None] * program.frame_size
+        self._registers: list = list(code.registers) if code is not None else []
+        self._outputs: list[str] = []
+        self._steps: Generator[None, str, None] | None = None
+        self._finished: bool = False
+
+    def start(self) -> list[str]:
+        """
+        Starts the program and runs it until it first needs input or ends.
+
+        Returns:
+            list[str]: The outputs produced before the first input point.
+
+        Raises:
+            RuntimeError: If the session has already been started.
+        """
+        if self._steps is not None:
+            raise RuntimeError("session already started")
+        if self._code is not None:
+            self._steps = execute(self._code, self._registers, self._output)
+        else:
+            self._steps = self._run()
+        return self._resume(None)
+
+    def feed(self, text: str) -> list[str]:
+        """
+        Supplies a line of input and runs the program until it needs input again.
+
+        Args:
+            text: The input line answering the pending `need` or `input`.
+
+        Returns:
+            list[str]: The outputs produced before the next input point or the end
+                of the program.
+
+        Raises:
+            RuntimeError: If the session has not been started or has finished.
+        """
+        if self._steps is None:
+            raise RuntimeError("session not started")
+        if self._finished:
+            raise RuntimeError("session already finished")
+        return self._resume(text)
+
+    @property
+    def finished(self) -> bool:
+        """
+        Returns whether the program has reached its end.
+
+        Returns:
+            bool: True if the program has ended, False if it is waiting for input.
+        """
+        return self._finished
+
+    def get_vartable(self) -> dict[str, Value]:
+        """
+        Returns a dictionary mapping variable ids to their values.
+
+        :return: A dictionary mapping variable ids to their values.
+        """
+        if self._code is not None:
+            first: int = self._code.first_variable
+            return {
+                name: value
+                for name, value in zip(self._code.variables, self._registers[first:])
+                if value is not None
+            }
+        return {
+            name: value
+            for name, value in zip(self._program.variables, self._frame)
+            if value is not None
+        }
+
+    def _resume(self, text: str | None) -> list[str]:
+        """
+        Resumes the program with the given input and collects its outputs.
+
+        Args:
+            text: The input to resume with, or None to start the program.
+
+        Returns:
+            list[str]: The outputs produced until the program pauses or ends.
+        """
+        try:
+            self._steps.send(text)
+        except StopIteration:
+            self._finished = True
+        outputs, self._outputs = self._outputs, []
+        return outputs
+
+    def _run(self) -> Generator[None, str, None]:
+        """
+        Executes the program as a generator that suspends at every input point.
+
+        This method executes the procedures in the program from top to bottom. For each
+        procedure, it executes the statements in the procedure from top to bottom. If a
+        branch statement is encountered, it branches to the specified procedure. If a
+        default statement is encountered, it branches to the specified procedure. The
+        generator yields whenever the program needs a line of input, and expects the
+        text of that line to be sent back in.
+
+        Yields:
+            None: Each time the program waits for input.
+        """
+        for need in self._program.needs:
+            yield from self._execute_need(need)
+
+        current_procedure = self._program.procedures[0]
+
+        while current_procedure is not None:
+            current_procedure = yield from self._execute_procedure(current_procedure)
+
+    def _calculate(self, expression: Expression) -> Value:
+        """
+        Calculates the value of the given expression.
+
+        Args:
+            expression: The expression to be calculated.
+
+        Returns:
+            Value: The value of the expression.
+        """
+        return expression.compiled(self._frame)
+
+    def _execute_need(self, need: Need) -> Generator[None, str, None]:
+        """
+        Executes a need statement by prompting the client for input for a required variable.
+
+        Args:
+            need: The Need instance containing the variable id to be prompted for input.
+
+        This method outputs a message indicating the required variable, waits for the
+        input, and stores the input as a StringValue in the variable's slot.
+        """
+        var_id: str = need.var_id
+        self._output(output=f"{var_id} required: ")
+        result: str = yield
+        self._frame[need.slot] = StringValue(result)
+
+    def _execute_let(self, slot: int, expr: Expression) -> None:
+        """
+        Executes a let statement by calculating the given expression and
+        storing the result in the given slot.
+
+        Args:
+            slot: The slot of the variable to store the result of the expression in.
+            expr: The expression to be evaluated and stored in the variable.
+        """
+        self._frame[slot] = self._calculate(expr)
+
+    def _execute_input(self, slot: int) -> Generator[None, str, None]:
+        """
+        Executes an input statement by waiting for a line of input and
+        storing the result in the given slot.
+
+        Args:
+            slot: The slot of the variable to store the result of the input in.
+        """
+        text: str = yield
+        result: str = process_natrual_language(text)
+        self._frame[slot] = StringValue(result)
+
+    def _execute_output(self, expr: Expression) -> None:
+        """
+        Executes an output statement by evaluating the given expression and
+        queueing the result for the client.
+
+        Args:
+            expr: The expression to be evaluated and sent to the client.
+        """
+        value = self._calculate(expr)
+        self._output(output=value.value)
+
+    def _execute_statement(self, statement) -> Generator[None, str, None]:
+        """
+        Executes a statement by delegating to the appropriate method.
+
+        Args:
+            statement: The statement to be executed.
+
+        Raises:
+            RuntimeError: If the statement is unknown.
+        """
+        if isinstance(statement, LetStatement):
+            self._execute_let(statement.slot, statement.expr)
+        elif isinstance(statement, InputStatement):
+            yield from self._execute_input(statement.slot)
+        elif isinstance(statement, OutputStatement):
+            self._execute_output(statement.expr)
+        else:
+            raise RuntimeError(f"unknown statement type: {statement}")
+
+    def _execute_procedure(
+        self, procedure: Procedure
+    ) -> Generator[None, str, Procedure | None]:
+        """
+        Executes a procedure by executing its statements and evaluating its branches.
+
+        Args:
+            procedure: The Procedure instance to be executed.
+
+        Returns:
+            Procedure | None: The procedure to call next if a branch evaluates to
+                True, or None if no branch evaluates to True.
+        """
+        for statement in procedure.statements:
+            yield from self._execute_statement(statement)
+        return procedure.compiled(self._frame)
+
+    def _output(self, output: str) -> None:
+        """
+        Queues the given output string to be returned at the next pause.
+
+        Args:
+            output: The string to be sent to the client.
+        """
+        self._outputs.append(generate_multimedia_response(output))
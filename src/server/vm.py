@@ -0,0 +1,712 @@
+"""
+A bytecode compiler and register virtual machine for the language.
+
+A linked Program is compiled into one flat instruction stream, an `array('i')` in
+which every instruction takes four slots: an opcode and three operands. Operand a
+is the register written or the offset jumped to; operands b and c are the
+registers read. The register file of a session holds, in order, the constants of
+the program, its variables and the temporaries of its expressions, so every
+instruction works on registers directly and no operand stack is needed. Every
+procedure is resolved to the offset of its first instruction and every branch to
+conditional jumps fused with the comparisons it tests, `and`, `or` and `not`
+included, so that conditions short-circuit without computing boolean values.
+"""
+
+__all__: list[str] = [
+    "Code",
+    "compile_program",
+    "execute",
+    "disassemble",
+]
+
+import re
+from array import array
+from collections.abc import Callable, Generator
+from operator import eq, ne, lt, le, gt, ge
+from server.language import (
+    StringValue,
+    Value,
+    integer_value,
+    Literal,
+    Variable,
+    BooleanExpression,
+    InputStatement,
+    OutputStatement,
+    LetStatement,
+    Branch,
+    Default,
+    Procedure,
+    Program,
+    _LikeChain,
+    _like_patterns,
+    match,
+    add,
+    sub,
+    mul,
+    div,
+    mod,
+    positive,
+    negative,
+)
+from server.interface import process_natrual_language
+
+# Opcodes. Families are numbered contiguously so that the dispatch loop can test
+# for a whole family with one comparison.
+MOVE: int = 0
+ADD: int = 1
+SUB: int = 2
+MUL: int = 3
+DIV: int = 4
+MOD: int = 5
+JUMP_IF_EQ: int = 6
+JUMP_IF_NE: int = 7
+JUMP_IF_LT: int = 8
+JUMP_IF_LE: int = 9
+JUMP_IF_GT: int = 10
+JUMP_IF_GE: int = 11
+JUMP_IF_MATCH: int = 12
+JUMP_IF_SEARCH: int = 13
+JUMP: int = 14
+SELECT: int = 15
+OUTPUT: int = 16
+INPUT: int = 17
+CAST_INTEGER: int = 18
+CAST_STRING: int = 19
+POSITIVE: int = 20
+NEGATIVE: int = 21
+NEED: int = 22
+HALT: int = 23
+
+OPNAMES: tuple[str, ...] = (
+    "MOVE",
+    "ADD",
+    "SUB",
+    "MUL",
+    "DIV",
+    "MOD",
+    "JUMP_IF_EQ",
+    "JUMP_IF_NE",
+    "JUMP_IF_LT",
+    "JUMP_IF_LE",
+    "JUMP_IF_GT",
+    "JUMP_IF_GE",
+    "JUMP_IF_MATCH",
+    "JUMP_IF_SEARCH",
+    "JUMP",
+    "SELECT",
+    "OUTPUT",
+    "INPUT",
+    "CAST_INTEGER",
+    "CAST_STRING",
+    "POSITIVE",
+    "NEGATIVE",
+    "NEED",
+    "HALT",
+)
+
+_ARITHMETIC: dict[str, int] = {"+": ADD, "-": SUB, "*": MUL, "/": DIV, "%": MOD}
+_ARITHMETIC_FUNCS: tuple[Callable[[Value, Value], Value], ...] = (
+    add,
+    sub,
+    mul,
+    div,
+    mod,
+)
+_COMPARISONS: dict[str, int] = {
+    "==": 0,
+    "!=": 1,
+    "<": 2,
+    "<=": 3,
+    ">": 4,
+    ">=": 5,
+    "like": 6,
+}
+_COMPARISON_FUNCS: tuple[Callable[[object, object], bool], ...] = (
+    eq,
+    ne,
+    lt,
+    le,
+    gt,
+    ge,
+    match,
+)
+_JUMPS: frozenset[int] = frozenset(range(JUMP_IF_EQ, SELECT))
+_INVERSE_JUMPS: dict[int, int] = {
+    JUMP_IF_EQ: JUMP_IF_NE,
+    JUMP_IF_NE: JUMP_IF_EQ,
+    JUMP_IF_LT: JUMP_IF_GE,
+    JUMP_IF_GE: JUMP_IF_LT,
+    JUMP_IF_LE: JUMP_IF_GT,
+    JUMP_IF_GT: JUMP_IF_LE,
+}
+
+# register kinds used while compiling, before registers are numbered
+_CONSTANT: int = 0
+_VARIABLE: int = 1
+_TEMPORARY: int = 2
+_UNUSED: int = -1
+
+Register = tuple[int, int]
+"""A register while compiling: its kind and its index among registers of that kind."""
+
+
+class Code:
+    """
+    A program compiled to bytecode.
+    """
+
+    def __init__(
+        self,
+        instructions: array,
+        registers: list[object],
+        variables: list[str],
+        procedures: dict[int, str],
+    ) -> None:
+        """
+        Initializes a Code instance.
+
+        Args:
+            instructions: The instruction stream, four slots per instruction.
+            registers: The initial register file: the constants, then None for
+                every variable and temporary.
+            variables: The names of the variables, which occupy the registers
+                right after the constants.
+            procedures: The name of the procedure starting at each offset.
+        """
+        self.instructions: array = instructions
+        self.registers: list[object] = registers
+        self.variables: list[str] = variables
+        self.procedures: dict[int, str] = procedures
+        self.first_variable: int = len(registers) - registers.count(None)
+
+    def __repr__(self) -> str:
+        """
+        Returns a string representation of the Code instance.
+
+        Returns:
+            str: A string in the format 'Code(instructions=<n>, registers=<n>)'
+            giving the number of instructions and the size of the register file.
+        """
+        return (
+            f"Code(instructions={len(self.instructions) // 4}, "
+            f"registers={len(self.registers)})"
+        )
+
+    def variable(self, register: int) -> str | None:
+        """
+        Returns the name of the variable held by a register.
+
+        Args:
+            register: The register number.
+
+        Returns:
+            str | None: The variable name, or None if the register holds a
+            constant or a temporary.
+        """
+        index: int = register - self.first_variable
+        if 0 <= index < len(self.variables):
+            return self.variables[index]
+        return None
+
+
+class _Label:
+    """
+    A jump target inside a procedure, whose offset is set once it is emitted.
+    """
+
+    __slots__ = ("offset",)
+
+    def __init__(self) -> None:
+        """
+        Initializes a _Label instance.
+        """
+        self.offset: int = -1
+
+
+class _Compiler:
+    """
+    Emits the bytecode of one program.
+
+    Registers are referred to by kind and index until `finish`, when the number
+    of constants and variables is known and they can be numbered.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes a _Compiler instance.
+        """
+        self.instructions: list[list] = []
+        self.constants: list[object] = []
+        self.variables: dict[str, int] = {}
+        self.temporaries: int = 0
+        self.max_temporaries: int = 0
+        self.offsets: dict[int, int] = {}
+        self.procedures: dict[int, str] = {}
+
+    def emit(self, opcode: int, a=_UNUSED, b=_UNUSED, c=_UNUSED) -> None:
+        """
+        Appends an instruction.
+
+        Args:
+            opcode: The opcode.
+            a: The register written, or the procedure jumped to.
+            b: The first register read.
+            c: The second register read.
+        """
+        self.instructions.append([opcode, a, b, c])
+
+    def constant(self, value: object) -> Register:
+        """
+        Adds a value to the constants.
+
+        Args:
+            value: The value.
+
+        Returns:
+            Register: The register of the constant.
+        """
+        self.constants.append(value)
+        return _CONSTANT, len(self.constants) - 1
+
+    def variable(self, name: str) -> Register:
+        """
+        Returns the register of a variable, allocating it on first use.
+
+        Args:
+            name: The variable name.
+
+        Returns:
+            Register: The register of the variable.
+        """
+        return _VARIABLE, self.variables.setdefault(name, len(self.variables))
+
+    def temporary(self) -> Register:
+        """
+        Allocates a register for an intermediate result of the current statement.
+
+        Returns:
+            Register: The register of the temporary.
+        """
+        self.temporaries += 1
+        self.max_temporaries = max(self.max_temporaries, self.temporaries)
+        return _TEMPORARY, self.temporaries - 1
+
+    def value(self, node, dest: Register | None = None) -> Register:
+        """
+        Emits the code computing a literal, variable or expression.
+
+        Args:
+            node: The Literal, Variable or Expression.
+            dest: The register to leave the result in, or None to leave it where
+                it is cheapest, which for literals and variables is their own
+                register.
+
+        Returns:
+            Register: The register holding the result.
+
+        Raises:
+            RuntimeError: If the node has an unknown structure.
+        """
+        if isinstance(node, (Literal, Variable)):
+            if isinstance(node, Literal):
+                source: Register = self.constant(node.value)
+            else:
+                source = self.variable(node.name)
+            if dest is None:
+                return source
+            self.emit(MOVE, dest, source)
+            return dest
+
+        words: tuple = node.words
+        if len(words) == 1:
+            return self.value(words[0], dest)
+        if len(words) == 2 and words[0] in ("+", "-"):
+            operand: Register = self.value(words[1])
+            dest = dest or self.temporary()
+            self.emit(POSITIVE if words[0] == "+" else NEGATIVE, dest, operand)
+            return dest
+        if len(words) == 3 and words[1] in _ARITHMETIC:
+            lhs: Register = self.value(words[0])
+            rhs: Register = self.value(words[2])
+            dest = dest or self.temporary()
+            self.emit(_ARITHMETIC[words[1]], dest, lhs, rhs)
+            return dest
+        if len(words) == 3 and words[1] == "to" and words[2] in ("integer", "string"):
+            operand = self.value(words[0])
+            dest = dest or self.temporary()
+            opcode: int = CAST_INTEGER if words[2] == "integer" else CAST_STRING
+            self.emit(opcode, dest, operand)
+            return dest
+        raise RuntimeError(f"Unknown expression structure: {node}")
+
+    def comparison(self, bexpr: BooleanExpression) -> tuple[int, Register, Register]:
+        """
+        Emits the code computing the operands of a comparison.
+
+        A `like` pattern given as a string literal becomes a constant holding the
+        `search` method of the regular expression precompiled for it.
+
+        Args:
+            bexpr: A boolean expression comparing two values.
+
+        Returns:
+            tuple[int, Register, Register]: The JUMP_IF_* opcode testing the
+            comparison, and the registers of its operands.
+
+        Raises:
+            RuntimeError: If the expression is not a comparison.
+        """
+        words: tuple = bexpr.words
+        if len(words) != 3 or words[1] not in _COMPARISONS:
+            raise RuntimeError(f"Unknown boolean expression structure: {bexpr}")
+        lhs: Register = self.value(words[0])
+        if words[1] == "like" and bexpr.pattern is not None:
+            return JUMP_IF_SEARCH, lhs, self.constant(bexpr.pattern.search)
+        rhs: Register = self.value(words[2])
+        return JUMP_IF_EQ + _COMPARISONS[words[1]], lhs, rhs
+
+    def jump(self, bexpr: BooleanExpression, target, when: bool = True) -> None:
+        """
+        Emits the code jumping to a target if a boolean expression has a given value,
+        and falling through otherwise.
+
+        `and`, `or` and `not` become jumps rather than values, so the right operand
+        of `and` and `or` is only evaluated if the left one does not decide the
+        result, as in the tree walker.
+
+        Args:
+            bexpr: The boolean expression.
+            target: The procedure or label to jump to.
+            when: The value of the expression for which to jump.
+
+        Raises:
+            RuntimeError: If the expression has an unknown structure.
+        """
+        words: tuple = bexpr.words
+        if len(words) == 2 and words[0] == "not":
+            self.jump(words[1], target, not when)
+            return
+        if len(words) == 3 and words[1] in ("and", "or"):
+            # the value of the left operand that decides the result on its own
+            decisive: bool = words[1] == "or"
+            if when == decisive:
+                self.jump(words[0], target, when)
+                self.jump(words[2], target, when)
+            else:
+                skip: _Label = _Label()
+                self.jump(words[0], skip, decisive)
+                self.jump(words[2], target, when)
+                skip.offset = len(self.instructions)
+            return
+        opcode, lhs, rhs = self.comparison(bexpr)
+        if when:
+            self.emit(opcode, target, lhs, rhs)
+        elif opcode in _INVERSE_JUMPS:
+            self.emit(_INVERSE_JUMPS[opcode], target, lhs, rhs)
+        else:
+            skip = _Label()
+            self.emit(opcode, skip, lhs, rhs)
+            self.emit(JUMP, target)
+            skip.offset = len(self.instructions)
+
+    def branch(self, branch: Branch) -> None:
+        """
+        Emits a conditional jump to the target of a branch.
+
+        Args:
+            branch: The linked branch.
+        """
+        self.temporaries = 0
+        self.jump(branch.bexpr, branch.target)
+
+    def like_chain(
+        self, variable: Variable, branches: list[Branch], patterns: list[list[str]]
+    ) -> None:
+        """
+        Emits a run of branches testing one variable against literal `like` patterns.
+
+        A SELECT instruction searches the combined expression of the run, as
+        `Procedure.compile` does, and jumps to the target of the first matching
+        branch, or past the run if none matches. The branches are also emitted one
+        by one after it, for values that are not strings, which SELECT leaves to
+        them so that they fail the way the tree walker does.
+
+        Args:
+            variable: The variable every branch tests.
+            branches: The branches of the run, in source order.
+            patterns: The literal patterns of each branch.
+        """
+        chain: _LikeChain | None = None
+        if sum(len(group) for group in patterns) > 1:
+            try:
+                chain = _LikeChain(variable, branches, patterns)
+            except re.error:
+                chain = None
+        if chain is None:
+            for branch in branches:
+                self.branch(branch)
+            return
+        # the jump table is a constant, completed in `finish` with the offsets of
+        # the targets and of the instruction after the run
+        table: list = [chain.index, [branch.target for branch in branches], None]
+        self.emit(SELECT, _UNUSED, self.constant(table), self.variable(variable.name))
+        for branch in branches:
+            self.branch(branch)
+        table[2] = len(self.instructions)
+
+    def procedure(self, procedure: Procedure, following: Procedure | None) -> None:
+        """
+        Emits a procedure: its statements, then a jump per branch.
+
+        Args:
+            procedure: The linked procedure.
+            following: The procedure emitted right after this one, which a default
+                statement naming it falls through to without a jump.
+        """
+        self.offsets[id(procedure)] = len(self.instructions)
+        self.procedures[len(self.instructions)] = procedure.name
+        for statement in procedure.statements:
+            self.temporaries = 0
+            if isinstance(statement, LetStatement):
+                self.value(statement.expr, self.variable(statement.var_id))
+            elif isinstance(statement, InputStatement):
+                self.emit(INPUT, self.variable(statement.var_id))
+            elif isinstance(statement, OutputStatement):
+                self.emit(OUTPUT, _UNUSED, self.value(statement.expr))
+            else:
+                raise RuntimeError(f"unknown statement type: {statement}")
+
+        run: list[Branch] = []
+        run_patterns: list[list[str]] = []
+        run_variable: Variable | None = None
+        default: Default | None = None
+        for branch in procedure.branches:
+            if isinstance(branch, Default):
+                default = branch
+                break
+            like = _like_patterns(branch.bexpr)
+            if run and (like is None or like[0].name != run_variable.name):
+                self.like_chain(run_variable, run, run_patterns)
+                run, run_patterns, run_variable = [], [], None
+            if like is None:
+                self.branch(branch)
+                continue
+            run.append(branch)
+            run_patterns.append(like[1])
+            run_variable = like[0]
+        if run:
+            self.like_chain(run_variable, run, run_patterns)
+
+        if default is None:
+            self.emit(HALT)
+        elif default.target is not following:
+            self.emit(JUMP, default.target)
+
+    def finish(self) -> Code:
+        """
+        Numbers the registers, resolves the jumps and returns the compiled program.
+
+        Returns:
+            Code: The compiled program.
+        """
+        bases: dict[int, int] = {
+            _CONSTANT: 0,
+            _VARIABLE: len(self.constants),
+            _TEMPORARY: len(self.constants) + len(self.variables),
+        }
+
+        def operand(value) -> int:
+            if isinstance(value, tuple):
+                return bases[value[0]] + value[1]
+            if isinstance(value, Procedure):
+                return self.offsets[id(value)] * 4
+            if isinstance(value, _Label):
+                return value.offset * 4
+            return value
+
+        instructions: array = array("i")
+        for instruction in self.instructions:
+            instructions.extend(operand(value) for value in instruction)
+        registers: list[object] = []
+        for value in self.constants:
+            if isinstance(value, list):
+                search, targets, end = value
+                value = (search, tuple(operand(t) for t in targets), end * 4)
+            registers.append(value)
+        registers += [None] * (len(self.variables) + self.max_temporaries)
+        procedures: dict[int, str] = {
+            offset * 4: name for offset, name in self.procedures.items()
+        }
+        return Code(instructions, registers, list(self.variables), procedures)
+
+
+def compile_program(program: Program) -> Code:
+    """
+    Compiles a program to bytecode.
+
+    The needs come first, then the first procedure, which is where execution
+    starts, then the remaining procedures in source order.
+
+    Args:
+        program: The linked program. If it has also been compiled, its literal
+            `like` patterns are reused instead of being looked up at run time.
+
+    Returns:
+        Code: The compiled program.
+
+    Raises:
+        RuntimeError: If the program has not been linked.
+    """
+    if not program.linked:
+        raise RuntimeError("program must be linked before it is compiled")
+    compiler: _Compiler = _Compiler()
+    for need in program.needs:
+        compiler.emit(NEED, compiler.variable(need.var_id))
+    procedures: list[Procedure] = program.procedures
+    if not procedures:
+        compiler.emit(HALT)
+    for index, procedure in enumerate(procedures):
+        following = procedures[index + 1] if index + 1 < len(procedures) else None
+        compiler.procedure(procedure, following)
+    return compiler.finish()
+
+
+def execute(
+    code: Code, registers: list, output: Callable[[str], None]
+) -> Generator[None, str, None]:
+    """
+    Runs a compiled program as a generator that suspends at every input point.
+
+    Args:
+        code: The compiled program.
+        registers: A fresh copy of `code.registers`.
+        output: The function to pass every output string to.
+
+    Yields:
+        None: Each time the program waits for input.
+
+    Raises:
+        RuntimeError: If a variable is read before it is set, or an operation is
+            applied to values of the wrong type.
+    """
+    instructions: array = code.instructions
+    comparisons = _COMPARISON_FUNCS
+    integer = integer_value
+    string = StringValue
+    pc: int = 0
+    try:
+        while True:
+            opcode = instructions[pc]
+            a = instructions[pc + 1]
+            b = instructions[pc + 2]
+            c = instructions[pc + 3]
+            pc += 4
+            if opcode == MOVE:
+                value = registers[b]
+                if value is None:
+                    raise TypeError("read of an unset register")
+                registers[a] = value
+            elif opcode <= MOD:
+                lhs = registers[b]
+                rhs = registers[c]
+                if type(lhs) is integer and type(rhs) is integer:
+                    if opcode == ADD:
+                        registers[a] = integer(lhs.value + rhs.value)
+                    elif opcode == SUB:
+                        registers[a] = integer(lhs.value - rhs.value)
+                    elif opcode == MUL:
+                        registers[a] = integer(lhs.value * rhs.value)
+                    elif opcode == DIV:
+                        registers[a] = integer(lhs.value // rhs.value)
+                    else:
+                        registers[a] = integer(lhs.value % rhs.value)
+                else:
+                    registers[a] = _ARITHMETIC_FUNCS[opcode - ADD](lhs, rhs)
+            elif opcode <= JUMP_IF_MATCH:
+                if comparisons[opcode - JUMP_IF_EQ](
+                    registers[b].value, registers[c].value
+                ):
+                    pc = a
+            elif opcode == JUMP_IF_SEARCH:
+                if registers[c](registers[b].value) is not None:
+                    pc = a
+            elif opcode == JUMP:
+                pc = a
+            elif opcode == SELECT:
+                value = registers[c]
+                if type(value) is string:
+                    search, offsets, end = registers[b]
+                    index = search(value.value)
+                    pc = end if index is None else offsets[index]
+            elif opcode == OUTPUT:
+                output(registers[b].value)
+            elif opcode == INPUT:
+                text: str = yield
+                registers[a] = string(process_natrual_language(text))
+            elif opcode == CAST_INTEGER:
+                registers[a] = integer(int(registers[b].value))
+            elif opcode == CAST_STRING:
+                registers[a] = string(str(registers[b].value))
+            elif opcode == POSITIVE:
+                registers[a] = positive(registers[b])
+            elif opcode == NEGATIVE:
+                registers[a] = negative(registers[b])
+            elif opcode == NEED:
+                output(f"{code.variable(a)} required: ")
+                text = yield
+                registers[a] = string(text)
+            elif opcode == HALT:
+                return
+            else:
+                raise RuntimeError(f"unknown opcode {opcode} at {pc - 4}")
+    except (AttributeError, TypeError, RuntimeError):
+        # An unset variable is None in its register. Rather than checking every
+        # read, let the instruction fail, then report the variable it read, as
+        # the tree walker would have.
+        for register in (b, c):
+            name: str | None = code.variable(register)
+            if name is not None and registers[register] is None:
+                raise RuntimeError(f"Variable {name} not found") from None
+        raise
+
+
+def disassemble(code: Code) -> str:
+    """
+    Returns a readable listing of the bytecode, for debugging.
+
+    Args:
+        code: The compiled program.
+
+    Returns:
+        str: One line per instruction, with procedure names as labels.
+    """
+
+    def describe(register: int) -> str:
+        if register < 0:
+            return ""
+        name: str | None = code.variable(register)
+        if name is not None:
+            return name
+        if register >= code.first_variable:
+            return f"t{register - code.first_variable - len(code.variables)}"
+        value = code.registers[register]
+        if isinstance(value, tuple):
+            return "<like chain>"
+        if callable(value):
+            return f"/{value.__self__.pattern}/"
+        return repr(value.value)
+
+    lines: list[str] = []
+    for offset in range(0, len(code.instructions), 4):
+        if offset in code.procedures:
+            lines.append(f"{code.procedures[offset]}:")
+        opcode, a, b, c = code.instructions[offset : offset + 4]
+        if opcode in _JUMPS:
+            target: str = code.procedures.get(a, str(a))
+        else:
+            target = describe(a)
+        operands: str = ", ".join(
+            text for text in (target, describe(b), describe(c)) if text
+        )
+        lines.append(f"{offset:6d} {OPNAMES[opcode]:<15}{operands}")
+    return "\n".join(lines)
@@ -0,0 +1,123 @@
+import pickle
+import shutil
+import sys
+from pathlib import Path
+import pytest
+from server.artifact import (
+    artifact_path,
+    load_cached,
+    read_artifact,
+    write_artifact,
+)
+from server.language import *
+from server.loader import load, prepare
+from server.session import Session
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def script(tmp_path) -> Path:
+    path = tmp_path / "sort.script"
+    shutil.copy(ROOT / "scripts" / "sort.script", path)
+    return path
+
+
+def run(program: Program, inputs: list[str]) -> list[str]:
+    session = Session(program)
+    outputs = session.start()
+    for text in inputs:
+        outputs += session.feed(text)
+    return outputs
+
+
+def string_literals(word) -> list[Literal]:
+    if isinstance(word, Literal):
+        return [word] if isinstance(word.value, StringValue) else []
+    if isinstance(word, Expression):
+        return [literal for child in word.words for literal in string_literals(child)]
+    return []
+
+
+def test_artifact_runs_like_source(script) -> None:
+    path = write_artifact(str(script))
+    assert path == str(script.with_suffix(".dslc"))
+    program = read_artifact(path, script.read_bytes())
+    assert program is not None
+    inputs = ["3", "2", "3", "1"]
+    assert run(program, inputs) == run(load(script.read_text("utf-8")), inputs)
+    literals = [
+        literal
+        for procedure in program.procedures
+        for statement in procedure.statements
+        if isinstance(statement, OutputStatement)
+        for literal in string_literals(statement.expr)
+    ]
+    assert literals
+    for literal in literals:
+        assert literal.value is string_value(literal.value.value)
+
+
+def test_stale_artifacts_are_ignored(script) -> None:
+    path = write_artifact(str(script))
+    source = script.read_bytes()
+    assert read_artifact(path, source, optimize=False) is None
+    assert read_artifact(path, source + b"\n") is None
+    assert read_artifact(str(script), source) is None
+    assert (
+        read_artifact(artifact_path(str(script.with_name("missing"))), source) is None
+    )
+
+    script.write_bytes(source + b"\n")
+    assert read_artifact(path, script.read_bytes()) is None
+    assert load_cached(str(script)).linked
+
+    Path(path).write_bytes(Path(path).read_bytes()[:40])
+    assert read_artifact(path, script.read_bytes()) is None
+
+
+def test_load_cached_prefers_fresh_artifact(script, monkeypatch) -> None:
+    write_artifact(str(script), optimize=False)
+    for name in ("server.lexer", "server.parser"):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    program = load_cached(str(script), optimize=False)
+    assert "server.lexer" not in sys.modules
+    assert "server.parser" not in sys.modules
+    assert len(program.procedures[0].statements) > 0
+
+
+def test_long_procedure_chains_pickle() -> None:
+    count = 3000
+    program = prepare(
+        "".join(
+            f'procedure p{index}\n    branch p{index + 1} when ${{x}} == "{index}"\n'
+            for index in range(count)
+        )
+        + f"procedure p{count}\n",
+        optimize=False,
+    )
+    copy: Program = pickle.loads(pickle.dumps(program, pickle.HIGHEST_PROTOCOL))
+    assert copy.linked
+    assert copy.frame_size == 1
+    assert copy.variables == ["${x}"]
+    procedures = copy.procedures
+    for procedure, following in zip(procedures, procedures[1:]):
+        assert procedure.branches[0].target is following
+
+
+def test_corrupted_artifacts_are_ignored(script) -> None:
+    path = Path(write_artifact(str(script)))
+    data = path.read_bytes()
+    source = script.read_bytes()
+    # the program pickle takes most of the file, so these damage it
+    for offset in range(len(data) // 4, len(data), max(len(data) // 200, 1)):
+        path.write_bytes(data[:offset])
+        assert read_artifact(str(path), source) is None
+        path.write_bytes(
+            data[:offset] + bytes([data[offset] ^ 0xFF]) + data[offset + 1 :]
+        )
+        program = read_artifact(str(path), source)
+        assert program is None or isinstance(program, Program)
+    assert run(load_cached(str(script)), ["1", "5"]) == run(
+        load(script.read_text("utf-8")), ["1", "5"]
+    )
@@ -0,0 +1,152 @@
+import pytest
+from server.lexer import Lexer
+from server.parser import Parser
+from server.language import *
+from server.inference import INTEGER, STRING, UNKNOWN, infer_types
+from server.loader import load
+from server.session import Session
+
+
+@pytest.fixture
+def parser() -> Parser:
+    return Parser(Lexer())
+
+
+def infer(parser: Parser, source: str) -> tuple[Program, dict]:
+    program = parser.parse(source)
+    program.link()
+    return program, infer_types(program)
+
+
+def test_infer_variable_types(parser) -> None:
+    program, types = infer(
+        parser,
+        """
+        need ${名字}
+        procedure p
+            input ${s}
+            let ${n} = cast ${s} to integer
+            let ${m} = ${n} * 2 + 1
+            let ${both} = ${n}
+            let ${both} = ${s}
+            let ${text} = ${名字} + (cast ${m} to string)
+            let ${loop} = ${loop} + 1
+            output ${text}
+        """,
+    )
+    assert types == {
+        "${名字}": STRING,
+        "${s}": STRING,
+        "${n}": INTEGER,
+        "${m}": INTEGER,
+        "${both}": UNKNOWN,
+        "${text}": STRING,
+        "${loop}": None,
+    }
+    statements = program.procedures[0].statements
+    assert statements[2].expr.type == INTEGER
+    assert statements[2].expr.words[0].words[0].type == INTEGER
+    assert statements[5].expr.type == STRING
+    assert statements[5].expr.words[2].type == STRING
+    assert statements[6].expr.type is None
+
+
+def test_infer_requires_link(parser) -> None:
+    with pytest.raises(RuntimeError):
+        infer_types(parser.parse("procedure p"))
+
+
+@pytest.mark.parametrize(
+    "statement, message",
+    [
+        ('let ${x} = "a" - 1', "cannot apply '-' to a string"),
+        ("let ${x} = -${s}", "cannot apply '-' to a string"),
+        ("let ${x} = ${s} + ${n}", "cannot add string and integer"),
+        ('branch p when ${n} < "10"', "cannot compare integer < string"),
+        ("branch p when ${n} like ${s}", "like needs a string"),
+        ("branch p when ${s} like ${n}", "like needs a string"),
+    ],
+)
+def test_definite_type_errors(parser, statement: str, message: str) -> None:
+    source = f"""
+        procedure p
+            input ${{s}}
+            let ${{n}} = 1
+            {statement}
+        """
+    with pytest.raises(SyntaxError, match=message):
+        infer(parser, source)
+    with pytest.raises(SyntaxError, match="procedure 'p'"):
+        load(source)
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "let ${x} = ${u} - 1",
+        "let ${x} = cast ${s} to integer",
+        "let ${x} = ${missing} + 1",
+        'branch p when ${n} == "1"',
+        'branch p when ${u} like "1"',
+    ],
+)
+def test_possible_type_errors_are_accepted(parser, statement: str) -> None:
+    infer(
+        parser,
+        f"""
+        procedure p
+            input ${{s}}
+            let ${{n}} = 1
+            let ${{u}} = ${{n}}
+            let ${{u}} = ${{s}}
+            {statement}
+        """,
+    )
+
+
+def test_typed_expressions_evaluate_alike(parser) -> None:
+    program = load("""
+        procedure p
+            input ${s}
+            let ${n} = cast ${s} to integer
+            let ${m} = (${n} + 2) * ${n} % 7
+            let ${t} = ${s} + "!" + (cast ${m} to string)
+            let ${same} = cast ${t} to string
+        """)
+    session = Session(program)
+    session.start()
+    session.feed("12")
+    table = session.get_vartable()
+    assert table["${m}"] == IntegerValue((12 + 2) * 12 % 7)
+    assert table["${t}"] == StringValue("12!0")
+    assert table["${same}"] is table["${t}"]
+
+
+def test_concatenation_chains_are_joined() -> None:
+    source: str = """
+        procedure p
+            input ${s}
+            let ${n} = cast ${s} to integer
+            let ${t} = "[" + ${s} + "|" + "-" + ((cast ${n} to string) + ${s}) + "]"
+            let ${u} = ${t} + (cast ${t} to string) + ${s}
+        """
+    program = load(source)
+    statements = program.procedures[0].statements
+    operands: list = statements[2].expr._concatenated()
+    assert [type(operand) for operand in operands] == [
+        Literal,
+        Variable,
+        Literal,
+        Literal,
+        Expression,
+        Variable,
+        Literal,
+    ]
+    assert operands[4].words[1:] == ("to", "string")
+    for optimize in (True, False):
+        session = Session(load(source, optimize=optimize))
+        session.start()
+        session.feed("12")
+        table = session.get_vartable()
+        assert table["${t}"] == StringValue("[12|-1212]")
+        assert table["${u}"] == StringValue("[12|-1212][12|-1212]12")
@@ -0,0 +1,258 @@
+import asyncio
+import socket
+import threading
+import pytest
+from config import delimiter, exit_signal, frame_magic
+from protocol import *
+from server.loader import load
+from server.metrics import metrics
+from server.interpreter import Interpreter
+from server.aio import AsyncInterpreter
+from server.registry import SCRIPT_PROMPT, Registry
+
+SOURCE = """
+need ${名字}
+procedure 问候
+    output "你好，" + ${名字}
+    input ${答复}
+    branch 再见 when ${答复} like "再见"
+    default 问候
+
+procedure 再见
+    output "再见！"
+"""
+
+
+@pytest.fixture
+def program():
+    return load(SOURCE)
+
+
+def read_until(sock: socket.socket, *markers: bytes) -> bytes:
+    data = b""
+    while not any(marker in data for marker in markers):
+        chunk = sock.recv(1024)
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def converse(sock: socket.socket, inputs: list[str]) -> bytes:
+    transcript = b""
+    for text in inputs:
+        transcript += read_until(sock, delimiter)
+        sock.sendall(text.encode() + delimiter)
+    transcript += read_until(sock, exit_signal)
+    return transcript
+
+
+EXPECTED = (
+    "${名字} required: \n".encode()
+    + delimiter
+    + "你好，小明\n".encode()
+    + delimiter
+    + "你好，小明\n".encode()
+    + delimiter
+    + "再见！\n".encode()
+    + exit_signal
+)
+
+
+def test_thread_interpreter(program) -> None:
+    server, client = socket.socketpair()
+    interpreter = Interpreter(program, server, None)
+    thread = threading.Thread(target=interpreter.run)
+    thread.start()
+    transcript = converse(client, ["小明", "嗯", "再见"])
+    thread.join()
+    assert transcript == EXPECTED
+    assert interpreter.get_vartable()["${答复}"].value == "再见"
+
+
+def test_thread_interpreter_disconnect(program) -> None:
+    server, client = socket.socketpair()
+    interpreter = Interpreter(program, server, None)
+    client.close()
+    with pytest.raises(ConnectionError):
+        interpreter.run()
+
+
+def test_async_interpreter(program) -> None:
+    async def scenario() -> bytes:
+        async def handle(reader, writer) -> None:
+            await AsyncInterpreter(program, reader, writer, None).run()
+            writer.close()
+
+        server = await asyncio.start_server(handle, "localhost", 0)
+        port = server.sockets[0].getsockname()[1]
+        with socket.create_connection(("localhost", port)) as sock:
+            return await asyncio.to_thread(converse, sock, ["小明", "嗯", "再见"])
+
+    assert asyncio.run(scenario()) == EXPECTED
+
+
+def test_thread_interpreter_input_like_magic(program) -> None:
+    # an input sharing its first bytes with the magic is still an input
+    server, client = socket.socketpair()
+    interpreter = Interpreter(program, server, None)
+    thread = threading.Thread(target=interpreter.run)
+    thread.start()
+    name = frame_magic[:10].decode()
+    converse(client, [name, "再见"])
+    thread.join()
+    assert interpreter.get_vartable()["${名字}"].value == name
+
+
+def converse_framed(
+    sock: socket.socket, inputs: list[str], script: str | None = None
+) -> list[tuple]:
+    first = read_until(sock, delimiter)
+    assert first.endswith(delimiter)
+    frames = FrameReader(sock)
+    received = []
+    if script is not None:
+        sock.sendall(encode_upgrade(SCRIPT, script))
+    else:
+        received.append((PROMPT, first[: -len(delimiter)].decode()))
+        sock.sendall(encode_upgrade(INPUT, inputs[0]))
+        inputs = inputs[1:]
+    for text in inputs:
+        received.append(frames.read())
+        sock.sendall(encode_frame(INPUT, text))
+    received.append(frames.read())
+    return received
+
+
+EXPECTED_FRAMES = [
+    (PROMPT, "${名字} required: \n"),
+    (PROMPT, "你好，小明\n"),
+    (PROMPT, "你好，小明\n"),
+    (EXIT, "再见！\n"),
+]
+
+
+def test_thread_interpreter_framed(program) -> None:
+    server, client = socket.socketpair()
+    interpreter = Interpreter(program, server, None)
+    thread = threading.Thread(target=interpreter.run)
+    thread.start()
+    assert converse_framed(client, ["小明", "嗯", "再见"]) == EXPECTED_FRAMES
+    thread.join()
+
+
+def test_thread_interpreter_ignores_script(program) -> None:
+    server, client = socket.socketpair()
+    interpreter = Interpreter(program, server, None)
+    thread = threading.Thread(target=interpreter.run)
+    thread.start()
+    # the prompt is sent again, as a frame
+    received = converse_framed(client, ["小明", "嗯", "再见"], "greet")
+    thread.join()
+    assert received == EXPECTED_FRAMES
+
+
+def test_async_interpreter_framed(program) -> None:
+    async def scenario() -> list[tuple]:
+        async def handle(reader, writer) -> None:
+            await AsyncInterpreter(program, reader, writer, None).run()
+            writer.close()
+
+        server = await asyncio.start_server(handle, "localhost", 0)
+        port = server.sockets[0].getsockname()[1]
+        with socket.create_connection(("localhost", port)) as sock:
+            return await asyncio.to_thread(
+                converse_framed, sock, ["小明", "嗯", "再见"]
+            )
+
+    assert asyncio.run(scenario()) == EXPECTED_FRAMES
+
+
+def test_one_write_per_turn(program) -> None:
+    server, client = socket.socketpair()
+    interpreter = Interpreter(program, server, None)
+    thread = threading.Thread(target=interpreter.run)
+    writes, turns = metrics.get("writes"), metrics.get("turns")
+    thread.start()
+    converse(client, ["小明", "嗯", "再见"])
+    thread.join()
+    assert metrics.get("turns") - turns == 4
+    assert metrics.get("writes") - writes == 4
+
+
+@pytest.fixture
+def registry(tmp_path):
+    (tmp_path / "greet.script").write_text(SOURCE, encoding="utf-8")
+    return Registry(str(tmp_path), 1)
+
+
+def test_thread_interpreter_selects_script(registry) -> None:
+    server, client = socket.socketpair()
+    interpreter = Interpreter(None, server, None, registry=registry)
+    thread = threading.Thread(target=interpreter.run)
+    thread.start()
+    received = converse_framed(client, ["小明", "嗯", "再见"], "greet")
+    thread.join()
+    assert received == EXPECTED_FRAMES
+
+
+def test_thread_interpreter_asks_for_script(registry) -> None:
+    server, client = socket.socketpair()
+    interpreter = Interpreter(None, server, None, registry=registry)
+    thread = threading.Thread(target=interpreter.run)
+    thread.start()
+    transcript = converse(client, ["greet", "小明", "嗯", "再见"])
+    thread.join()
+    assert transcript == f"{SCRIPT_PROMPT}\n".encode() + delimiter + EXPECTED
+
+
+@pytest.mark.parametrize("script", ["unknown", "../greet"])
+def test_async_interpreter_unknown_script(registry, script) -> None:
+    async def scenario() -> list[tuple]:
+        async def handle(reader, writer) -> None:
+            await AsyncInterpreter(None, reader, writer, None, registry=registry).run()
+            writer.close()
+
+        server = await asyncio.start_server(handle, "localhost", 0)
+        port = server.sockets[0].getsockname()[1]
+        with socket.create_connection(("localhost", port)) as sock:
+            return await asyncio.to_thread(converse_framed, sock, [], script)
+
+    assert asyncio.run(scenario()) == [(EXIT, f"unknown script {script!r}\n")]
+
+
+def test_async_interpreter_selects_script(registry) -> None:
+    async def scenario() -> list[tuple]:
+        async def handle(reader, writer) -> None:
+            await AsyncInterpreter(None, reader, writer, None, registry=registry).run()
+            writer.close()
+
+        server = await asyncio.start_server(handle, "localhost", 0)
+        port = server.sockets[0].getsockname()[1]
+        with socket.create_connection(("localhost", port)) as sock:
+            return await asyncio.to_thread(
+                converse_framed, sock, ["小明", "嗯", "再见"], "greet"
+            )
+
+    assert asyncio.run(scenario()) == EXPECTED_FRAMES
+
+
+@pytest.mark.parametrize("size", [1 << 17, 1 << 20])
+def test_async_interpreter_long_input(program, size) -> None:
+    # longer than the 64 KiB limit of asyncio streams
+    name = "长" * (size // 3)
+
+    async def scenario() -> bytes:
+        async def handle(reader, writer) -> None:
+            await AsyncInterpreter(program, reader, writer, None).run()
+            writer.close()
+
+        server = await asyncio.start_server(handle, "localhost", 0)
+        port = server.sockets[0].getsockname()[1]
+        with socket.create_connection(("localhost", port)) as sock:
+            return await asyncio.to_thread(converse, sock, [name, "再见"])
+
+    transcript = asyncio.run(scenario())
+    assert transcript.endswith(
+        f"你好，{name}\n".encode() + delimiter + "再见！\n".encode() + exit_signal
+    )
@@ -0,0 +1,355 @@
+import pytest
+from server.lexer import Lexer
+from server.parser import Parser
+from server.language import *
+from server.language import add, pattern_cache_info
+
+
+@pytest.fixture
+def parser() -> Parser:
+    lexer = Lexer()
+    return Parser(lexer)
+
+
+def test_link(parser) -> None:
+    program = parser.parse("""
+        procedure p1
+            branch p2 when 1 == 1
+            default p3
+        procedure p2
+        procedure p3
+        """)
+    assert not program.linked
+    assert program.procedures[0].branches[0].target is None
+
+    program.link()
+    p1, p2, p3 = program.procedures
+    assert program.linked
+    assert p1.branches[0].target is p2
+    assert p1.branches[1].target is p3
+
+
+def test_link_first_definition_wins(parser) -> None:
+    program = parser.parse("""
+        procedure p1
+            default p2
+        procedure p2
+        procedure p2
+        """)
+    program.link()
+    assert program.procedures[0].branches[0].target is program.procedures[1]
+
+
+def test_link_undefined_procedure(parser) -> None:
+    program = parser.parse("""
+        procedure p1
+            branch p2 when 1 == 1
+        """)
+    with pytest.raises(SyntaxError, match="p2"):
+        program.link()
+    assert not program.linked
+
+
+TABLE = {
+    "${i}": IntegerValue(7),
+    "${j}": IntegerValue(-3),
+    "${s}": StringValue("套餐查询"),
+    "${n}": StringValue("42"),
+}
+
+
+def parse_output_expr(parser, text: str):
+    program = parser.parse(f"procedure p\n    output {text}\n")
+    return program.procedures[0].statements[0].expr
+
+
+def parse_branch_bexpr(parser, text: str):
+    program = parser.parse(f"procedure p\n    branch p when {text}\n")
+    return program.procedures[0].branches[0].bexpr
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "1",
+        '"abc"',
+        "${i}",
+        "-${i}",
+        "+${j}",
+        "${i} + ${j} * 2",
+        "${i} / 2 - ${i} % 3",
+        "(${i} + 1) * (${j} - 1)",
+        '${s} + "!"',
+        "cast ${n} to integer + 1",
+        '"第 " + (cast ${i} to string) + " 个"',
+    ],
+)
+def test_compiled_expression(parser, text: str) -> None:
+    expr = parse_output_expr(parser, text)
+    assert expr.compiled(TABLE) == expr.get_value(TABLE)
+    assert type(expr.compiled(TABLE)) is type(expr.get_value(TABLE))
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["${s} - 1", "-${s}", '${i} + "a"', "${missing}", "cast ${s} to integer"],
+)
+def test_compiled_expression_errors(parser, text: str) -> None:
+    expr = parse_output_expr(parser, text)
+    with pytest.raises(Exception) as expected:
+        expr.get_value(TABLE)
+    with pytest.raises(expected.type):
+        expr.compiled(TABLE)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "${i} == 7",
+        "${i} != 7",
+        "${i} < ${j}",
+        "${i} <= 7",
+        "${i} > ${j}",
+        "${j} >= 0",
+        '${s} like "套餐"',
+        '${s} like "^查询"',
+        '${s} like "话费" or ${s} like "查询"',
+        'not ${s} like "话费"',
+        "not (${i} > 1 or ${j} > 1)",
+    ],
+)
+def test_compiled_boolean_expression(parser, text: str) -> None:
+    bexpr = parse_branch_bexpr(parser, text)
+    assert bexpr.compiled(TABLE) is bexpr.get_value(TABLE)
+
+
+def test_compiled_is_cached(parser) -> None:
+    expr = parse_output_expr(parser, "${i} + 1")
+    assert expr.compiled is expr.compiled
+
+
+def test_literal_pattern_is_precompiled(parser) -> None:
+    bexpr = parse_branch_bexpr(parser, '${s} like "套餐|话费"')
+    assert bexpr.pattern is None
+    before = pattern_cache_info()
+    assert bexpr.compiled(TABLE) is True
+    assert bexpr.pattern.pattern == "套餐|话费"
+    assert pattern_cache_info() == before
+
+
+def test_invalid_literal_pattern(parser) -> None:
+    program = parser.parse('procedure p\n    branch p when ${s} like "(套餐"\n')
+    program.link()
+    with pytest.raises(SyntaxError, match="套餐"):
+        program.compile()
+
+
+def test_dynamic_pattern_cache(parser) -> None:
+    bexpr = parse_branch_bexpr(parser, "${s} like ${s}")
+    assert bexpr.pattern is None
+    table = {"${s}": StringValue("动态模式 1")}
+    before = pattern_cache_info()
+    assert bexpr.compiled(table) is True
+    assert bexpr.compiled(table) is True
+    after = pattern_cache_info()
+    assert after.misses == before.misses + 1
+    assert after.hits == before.hits + 1
+    assert after.currsize <= after.maxsize
+
+
+def frame(program, table):
+    memos = [None] * (program.frame_size - len(program.variables))
+    return [table.get(name) for name in program.variables] + memos
+
+
+def naive_select(procedure, table):
+    for branch in procedure.branches:
+        if isinstance(branch, Default) or branch.bexpr.get_value(table):
+            return branch.target
+    return None
+
+
+LIKE_CHAIN = """
+procedure 问候
+    branch 帮助 when ${答复} like "帮助" or ${答复} like "5"
+    branch 套餐 when ${答复} like "套餐" or ${答复} like "1"
+    branch 话费 when ${答复} like "话费" or ${答复} like "余额" or ${答复} like "^2$"
+    branch 故障 when ${答复} like "故障|报修" or ${答复} like "(坏)+"
+    branch 其他 when ${其他} == "是"
+    branch 帮助 when ${答复} like "(.)\\1"
+    default 问候
+procedure 帮助
+procedure 套餐
+procedure 话费
+procedure 故障
+procedure 其他
+"""
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "帮助",
+        "套餐帮助",
+        "1 还是 5",
+        "话费余额",
+        "2",
+        "22",
+        "坏了",
+        "报修",
+        "哈哈",
+        "随便",
+    ],
+)
+def test_like_chain_matches_first_branch(parser, text: str) -> None:
+    program = parser.parse(LIKE_CHAIN)
+    program.link()
+    program.compile()
+    table = {"${答复}": StringValue(text), "${其他}": StringValue("否")}
+    procedure = program.procedures[0]
+    assert procedure.compiled(frame(program, table)) is naive_select(procedure, table)
+
+
+def test_like_chain_single_run(parser) -> None:
+    program = parser.parse("""
+        procedure p
+            branch a when ${x} like "a" or ${x} like "b"
+            branch b when ${x} like "b"
+        procedure a
+        procedure b
+        """)
+    program.link()
+    program.compile()
+    procedure, a, b = program.procedures
+    assert type(procedure.compiled.__self__).__name__ == "_LikeChain"
+    assert procedure.compiled([StringValue("cb")]) is a
+    assert procedure.compiled([StringValue("c")]) is None
+    with pytest.raises(RuntimeError):
+        procedure.compiled([None])
+    with pytest.raises(TypeError):
+        procedure.compiled([IntegerValue(1)])
+
+
+def test_link_assigns_slots(parser) -> None:
+    program = parser.parse("""
+        need ${b}
+        procedure p
+            let ${a} = ${b} + ${c}
+            input ${b}
+            output ${a}
+            branch p when ${d} == "x"
+        """)
+    assert program.variables == []
+    program.link()
+    assert program.variables == ["${b}", "${a}", "${c}", "${d}"]
+    let, input_statement, output = program.procedures[0].statements
+    assert program.needs[0].slot == 0
+    assert let.slot == 1
+    assert input_statement.slot == 0
+    assert [word.slot for word in let.expr.words[::2]] == [0, 2]
+    assert output.expr.slot == 1
+    assert let.expr.compiled([StringValue("1"), None, StringValue("2"), None]) == (
+        StringValue("12")
+    )
+    with pytest.raises(RuntimeError, match=r"\$\{c\}"):
+        let.expr.compiled([StringValue("1"), None, None, None])
+
+
+def test_values_are_immutable_and_interned(parser) -> None:
+    value = IntegerValue(1)
+    with pytest.raises(AttributeError):
+        value._value = 2
+    with pytest.raises(AttributeError):
+        value.extra = 2
+    assert hash(value) == hash(IntegerValue(1))
+    assert integer_value(7) is integer_value(7)
+    assert integer_value(10**6) == IntegerValue(10**6)
+    assert add(IntegerValue(2), IntegerValue(3)) is integer_value(5)
+    assert string_value("是") is string_value("是")
+
+    program = parser.parse("""
+        procedure p
+            output "是" + 1
+            branch p when ${x} == "是"
+        """)
+    output = program.procedures[0].statements[0]
+    branch = program.procedures[0].branches[0]
+    assert output.expr.words[0].value is branch.bexpr.words[2].value
+    assert output.expr.words[2].value is integer_value(1)
+    assert not hasattr(output.expr, "__dict__")
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('${x} == "b" and ${missing} == 1', False),
+        ('${x} == "a" or ${missing} == 1', True),
+        ('not ${x} == "a" and ${missing} == 1', False),
+    ],
+)
+def test_short_circuit(parser, text: str, expected: bool) -> None:
+    program = parser.parse(f"procedure p\n    branch p when {text}")
+    program.link()
+    bexpr = program.procedures[0].branches[0].bexpr
+    assert bexpr.get_value({"${x}": StringValue("a")}) is expected
+    frame = [None] * program.frame_size
+    frame[program.variables.index("${x}")] = StringValue("a")
+    assert bexpr.compiled(frame) is expected
+
+
+def test_repeated_conditions_are_shared(parser) -> None:
+    program = parser.parse("""
+        procedure p
+            branch a when ${x} like "1" and ${y} == "是"
+            branch b when ${y} == "否" or ${x} like "1"
+            branch c when ${x} like "2"
+        procedure a
+        procedure b
+        procedure c
+        """)
+    program.link()
+    program.compile()
+    p, a, b, c = program.procedures
+    first, second, third = (branch.bexpr for branch in p.branches)
+    assert first.words[0].compiled is second.words[2].compiled
+    assert first.words[2].compiled is not second.words[0].compiled
+    assert third.compiled is not first.words[0].compiled
+    assert first.words[0].pattern is not None
+    assert second.words[2].pattern is first.words[0].pattern
+    assert program.frame_size == len(program.variables) + 1
+
+    frame = [StringValue("1"), StringValue("否"), None]
+    assert p.compiled(frame) is b
+    frame[1] = StringValue("也许")
+    assert p.compiled(frame) is b
+    frame[0] = StringValue("2")
+    assert p.compiled(frame) is c
+    frame[0] = StringValue("1")
+    frame[1] = StringValue("是")
+    assert p.compiled(frame) is a
+    assert p.compiled([StringValue("3"), StringValue("否"), None]) is b
+    with pytest.raises(RuntimeError):
+        p.compiled([None, StringValue("否"), None])
+
+
+def test_repeated_conditions_are_cached_per_session(parser) -> None:
+    program = parser.parse("""
+        procedure p
+            branch a when ${x} like "1" and ${y} == "是"
+            branch b when ${x} like "1"
+            branch c when ${x} like "2"
+        procedure a
+        procedure b
+        procedure c
+        """)
+    program.link()
+    program.compile()
+    p, a, b, c = program.procedures
+    ones = [StringValue("1"), StringValue("否"), None]
+    twos = [StringValue("2"), StringValue("否"), None]
+    for _ in range(2):
+        assert p.compiled(ones) is b
+        assert p.compiled(twos) is c
+    assert ones[2] == (StringValue("1"), True)
+    assert twos[2] == (StringValue("2"), False)
@@ -1,25 +1,31 @@
 import pytest
 from ply.lex import LexToken
+from pathlib import Path
 from server.lexer import Lexer
 from server.language import (
     IntegerValue,
     StringValue,
 )
+from server.scanner import Scanner
 
+ROOT = Path(__file__).resolve().parent.parent
 
-def test_init() -> None:
-    lexer = Lexer()
+
+@pytest.fixture(params=[Lexer, Scanner])
+def lexer(request) -> Lexer | Scanner:
+    return request.param()
+
+
+def test_init(lexer) -> None:
     assert lexer.lexer is not None
 
 
-def test_input() -> None:
-    lexer = Lexer()
+def test_input(lexer) -> None:
     lexer.input(data="hello world")
     assert lexer.lexer.lexdata == "hello world"
 
 
-def test_tokens() -> None:
-    lexer = Lexer()
+def test_tokens(lexer) -> None:
     lexer.input(
         data="need procedure input output let branch when default integer string + - * / % = < >"
     )
@@ -53,8 +59,7 @@ def test_tokens() -> None:
     ]
 
 
-def test_ignore_whitespace() -> None:
-    lexer = Lexer()
+def test_ignore_whitespace(lexer) -> None:
     lexer.input(data="   hello   world   ")
     token: LexToken = lexer.token()
     assert token is not None
@@ -62,8 +67,7 @@ def test_ignore_whitespace() -> None:
     assert token.value == "hello"
 
 
-def test_keywords() -> None:
-    lexer = Lexer()
+def test_keywords(lexer) -> None:
     keywords: list[str] = "need procedure input output let branch when default".split()
     for keyword in keywords:
         lexer.input(data=keyword)
@@ -75,8 +79,7 @@ def test_keywords() -> None:
     assert lexer.token() is None
 
 
-def test_type() -> None:
-    lexer = Lexer()
+def test_type(lexer) -> None:
     lexer.input(data="integer string")
 
     token: LexToken = lexer.token()
@@ -92,8 +95,7 @@ def test_type() -> None:
     assert lexer.token() is None
 
 
-def test_var_id() -> None:
-    lexer = Lexer()
+def test_var_id(lexer) -> None:
     lexer.input(data="${hello}")
 
     token: LexToken = lexer.token()
@@ -104,8 +106,7 @@ def test_var_id() -> None:
     assert lexer.token() is None
 
 
-def test_proc_name() -> None:
-    lexer = Lexer()
+def test_proc_name(lexer) -> None:
     lexer.input(data="hello")
 
     token: LexToken = lexer.token()
@@ -116,8 +117,7 @@ def test_proc_name() -> None:
     assert lexer.token() is None
 
 
-def test_operator() -> None:
-    lexer = Lexer()
+def test_operator(lexer) -> None:
     operators = "+-*/%="
     expected_types = ["PLUS", "MINUS", "MUL", "DIV", "MOD", "ASSIGN"]
     for operator, expected_type in zip(operators, expected_types):
@@ -129,8 +129,7 @@ def test_operator() -> None:
     assert lexer.token() is None
 
 
-def test_comparator() -> None:
-    lexer = Lexer()
+def test_comparator(lexer) -> None:
     comparators: list[str] = "< <= == >= > != like".split()
     for comparator in comparators:
         lexer.input(data=comparator)
@@ -141,8 +140,7 @@ def test_comparator() -> None:
     assert lexer.token() is None
 
 
-def test_cast() -> None:
-    lexer = Lexer()
+def test_cast(lexer) -> None:
     lexer.input(data="cast ${var} to integer")
 
     token: LexToken = lexer.token()
@@ -168,8 +166,7 @@ def test_cast() -> None:
     assert lexer.token() is None
 
 
-def test_to() -> None:
-    lexer = Lexer()
+def test_to(lexer) -> None:
     lexer.input(data="to")
 
     token: LexToken = lexer.token()
@@ -180,8 +177,7 @@ def test_to() -> None:
     assert lexer.token() is None
 
 
-def test_integer_constant() -> None:
-    lexer = Lexer()
+def test_integer_constant(lexer) -> None:
     lexer.input(data="123")
 
     token: LexToken = lexer.token()
@@ -192,8 +188,7 @@ def test_integer_constant() -> None:
     assert lexer.token() is None
 
 
-def test_string_literal() -> None:
-    lexer = Lexer()
+def test_string_literal(lexer) -> None:
     lexer.input(data='"hello"')
 
     token: LexToken = lexer.token()
@@ -204,16 +199,14 @@ def test_string_literal() -> None:
     assert lexer.token() is None
 
 
-def test_newline() -> None:
-    lexer = Lexer()
+def test_newline(lexer) -> None:
     lexer.input(data="\n")
     token: LexToken = lexer.token()
     assert token is None
     assert lexer.lexer.lineno == 2
 
 
-def test_comment() -> None:
-    lexer = Lexer()
+def test_comment(lexer) -> None:
     lexer.input(data="# comment\n")
 
     token: LexToken = lexer.token()
@@ -229,23 +222,21 @@ def test_comment() -> None:
     assert lexer.token() is None
 
 
-def test_chinese_procedure() -> None:
-    lexer = Lexer()
+def test_chinese_procedure(lexer) -> None:
     lexer.input(data="沙黑然木斯德克")
     token: LexToken = lexer.token()
     assert token.type == "PROC_NAME"
     assert token.value == "沙黑然木斯德克"
 
 
-def test_chinese_variable() -> None:
-    lexer = Lexer()
+def test_chinese_variable(lexer) -> None:
     lexer.input(data="${变量一}")
     token: LexToken = lexer.token()
     assert token.type == "VAR_ID"
     assert token.value == "${变量一}"
 
 
-def test_complex_input() -> None:
+def test_complex_input(lexer) -> None:
     code = """
     need ${姓名}
     need ${电话号码}
@@ -262,7 +253,6 @@ def test_complex_input() -> None:
         branch 举报 when ${答复} like ${举报模式}
         default 重新问一遍
     """
-    lexer = Lexer()
     lexer.input(data=code)
     expected_results = [
         ("NEED", "need"),
@@ -316,3 +306,29 @@ def test_complex_input() -> None:
 
     token: LexToken = lexer.token()
     assert token is None
+
+
+def tokenize(lexer: Lexer | Scanner, data: str) -> list[tuple]:
+    lexer.input(data=data)
+    tokens: list[tuple] = []
+    while (token := lexer.token()) is not None:
+        tokens.append((token.type, token.value, token.lineno, token.lexpos))
+    return tokens
+
+
+@pytest.mark.parametrize(
+    "path", sorted((ROOT / "scripts").glob("*.script")), ids=lambda path: path.stem
+)
+def test_scanner_matches_ply(path) -> None:
+    source = path.read_text("utf-8") + "\r\n\t1 \f\v${x}#tail"
+    scanner = Scanner()
+    assert tokenize(scanner, source) == tokenize(Lexer(), source)
+    assert scanner.lineno == source.count("\n") + 1
+
+
+def test_invalid_token(lexer) -> None:
+    lexer.input(data='output "a"\n  @ 1\nb')
+    assert lexer.token().type == "OUTPUT"
+    assert lexer.token().type == "STRING_LITERAL"
+    with pytest.raises(SyntaxError, match="invalid token at line 2: '@ 1'"):
+        lexer.token()
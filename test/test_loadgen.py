@@ -0,0 +1,120 @@
+import socket
+import threading
+import time
+from pathlib import Path
+import pytest
+from config import delimiter, exit_signal
+from client.loadgen import LoadReport, Transcript, run_load, run_session, percentile
+from server.loader import load_file
+from server.main import serve_threads
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    # an ephemeral port, so that no earlier run's lingering sockets hold it
+    with socket.socket() as probe:
+        probe.bind(("localhost", 0))
+        return probe.getsockname()[1]
+
+
+def start_server(**options) -> int:
+    program = load_file(str(ROOT / "scripts" / "sort.script"))
+    port: int = free_port()
+    errors: list[Exception] = []
+
+    def serve() -> None:
+        try:
+            serve_threads(program, "localhost", port, **options)
+        except Exception as error:
+            errors.append(error)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    for _ in range(250):
+        if not thread.is_alive():
+            pytest.fail(f"the server failed to start: {errors[0]!r}")
+        try:
+            socket.create_connection(("localhost", port)).close()
+            return port
+        except ConnectionRefusedError:
+            time.sleep(0.02)
+    pytest.fail(f"nothing is listening on port {port}")
+
+
+@pytest.fixture(scope="module")
+def port() -> int:
+    return start_server()
+
+
+def test_percentile() -> None:
+    values: list[float] = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile(values, 100) == 100.0
+    assert percentile([3.0], 95) == 3.0
+    assert percentile([], 50) == 0.0
+
+
+@pytest.mark.parametrize("protocol", ["framed", "legacy"])
+def test_run_session(port: int, protocol: str) -> None:
+    transcript = Transcript.from_file(ROOT / "test" / "test_sort" / "input1.txt")
+    connect, latencies = run_session("localhost", port, transcript, protocol)
+    assert len(latencies) == len(transcript.inputs) + 1
+    assert 0 < connect
+
+
+def test_run_session_against_server_predating_framing() -> None:
+    # a server predating framing: it speaks first and takes any bytes for input
+    inputs: list[bytes] = []
+    with socket.create_server(("localhost", 0)) as listener:
+
+        def serve() -> None:
+            conn, _ = listener.accept()
+            with conn:
+                conn.sendall(b"name?\n" + delimiter)
+                data = b""
+                while delimiter not in data:
+                    data += conn.recv(1024)
+                inputs.append(data.split(delimiter)[0])
+                conn.sendall(b"bye\n" + exit_signal)
+
+        thread = threading.Thread(target=serve)
+        thread.start()
+        port = listener.getsockname()[1]
+        transcript = Transcript(name="legacy", inputs=["小明"])
+        _, latencies = run_session("localhost", port, transcript, "legacy")
+        assert len(latencies) == 2
+        thread.join()
+    assert inputs == ["小明".encode()]
+
+
+def test_run_load(port: int) -> None:
+    transcripts: list[Transcript] = [
+        Transcript.from_file(ROOT / "test" / "test_sort" / f"input{i}.txt")
+        for i in (1, 2)
+    ]
+    result: dict = run_load("localhost", port, transcripts, clients=4, sessions=10)
+    assert result["sessions"] == 10
+    assert result["errors"] == 0
+    turns: int = sum(len(t.inputs) + 1 for t in transcripts) * 5
+    assert result["turns"] == turns
+    for name in ("connect_ms", "turn_latency_ms"):
+        latency: dict = result[name]
+        assert 0 < latency["p50"] <= latency["p95"] <= latency["p99"] <= latency["max"]
+
+
+def test_report_keeps_connections_apart() -> None:
+    report = LoadReport()
+    report.add_session(0.5, [0.001, 0.002])
+    summary: dict = report.summary(1.0)
+    assert summary["turns"] == 2
+    assert summary["connect_ms"]["max"] == 500.0
+    assert summary["turn_latency_ms"]["max"] == 2.0
+
+
+def test_run_load_counts_errors(port: int) -> None:
+    short = Transcript(name="short", inputs=[])
+    result: dict = run_load("localhost", port, [short], clients=2, sessions=3)
+    assert result["sessions"] == 0
+    assert result["error_types"] == {"EOFError": 3}
@@ -0,0 +1,222 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+import pytest
+from config import delimiter, exit_signal
+
+ROOT = Path(__file__).resolve().parent.parent
+PORT = 10091
+RELOAD_PORT = 10093
+REGISTRY_PORT = 10094
+
+
+def converse(port: int, inputs: list[str]) -> bytes:
+    with socket.create_connection(("localhost", port)) as sock:
+        transcript = b""
+        for text in inputs + [None]:
+            while exit_signal not in transcript and not transcript.endswith(delimiter):
+                chunk = sock.recv(1024)
+                if not chunk:
+                    return transcript
+                transcript += chunk
+            if exit_signal in transcript or text is None:
+                return transcript
+            sock.sendall(text.encode() + delimiter)
+            transcript += b"|"
+        return transcript
+
+
+def wait_for_port(port: int) -> None:
+    for _ in range(100):
+        try:
+            socket.create_connection(("localhost", port)).close()
+            return
+        except ConnectionRefusedError:
+            time.sleep(0.05)
+    raise TimeoutError(f"nothing is listening on port {port}")
+
+
+@pytest.fixture
+def server():
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            str(ROOT / "src" / "server" / "main.py"),
+            "--port",
+            str(PORT),
+            "--workers",
+            "2",
+            str(ROOT / "scripts" / "fibonacci.script"),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    wait_for_port(PORT)
+    yield process
+    process.terminate()
+    process.wait()
+
+
+def workers_of(pid: int) -> set[int]:
+    children: Path = Path(f"/proc/{pid}/task/{pid}/children")
+    return {int(child) for child in children.read_text().split()}
+
+
+@pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="needs SO_REUSEPORT")
+def test_workers_restart(server) -> None:
+    before: bytes = converse(PORT, ["10"])
+    assert exit_signal in before
+
+    workers: set[int] = workers_of(server.pid)
+    assert len(workers) == 2
+    os.kill(next(iter(workers)), signal.SIGKILL)
+    time.sleep(0.5)
+    assert len(workers_of(server.pid)) == 2
+
+    for _ in range(4):
+        assert converse(PORT, ["10"]) == before
+
+
+@pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="needs SO_REUSEPORT")
+def test_workers_exit_with_server(server) -> None:
+    workers: set[int] = workers_of(server.pid)
+    server.terminate()
+    server.wait()
+    time.sleep(0.5)
+    for pid in workers:
+        status: Path = Path(f"/proc/{pid}/status")
+        # an exited worker may linger as a zombie until init reaps it
+        assert not status.exists() or "zombie" in status.read_text()
+
+
+@pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="needs SO_REUSEPORT")
+def test_server_stops_while_a_worker_restarts(server) -> None:
+    workers: set[int] = workers_of(server.pid)
+    crashed, *others = workers
+    os.kill(crashed, signal.SIGKILL)
+    server.terminate()
+    assert server.wait() == 0
+    time.sleep(0.5)
+    for pid in others:
+        status: Path = Path(f"/proc/{pid}/status")
+        assert not status.exists() or "zombie" in status.read_text()
+
+
+def test_workers_failing_at_startup_stop_the_server() -> None:
+    with socket.socket() as holder:
+        # a listener without SO_REUSEPORT keeps every worker from binding
+        holder.bind(("localhost", 0))
+        holder.listen()
+        port = holder.getsockname()[1]
+        result = subprocess.run(
+            [
+                sys.executable,
+                str(ROOT / "src" / "server" / "main.py"),
+                "--port",
+                str(port),
+                "--workers",
+                "2",
+                str(ROOT / "scripts" / "fibonacci.script"),
+            ],
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+    assert result.returncode != 0
+    assert result.stderr.count("Address already in use") >= 2
+    assert "every worker crashed at startup" in result.stderr
+    assert "restarting in 0.2 s" in result.stdout
+
+
+def test_startup_does_not_import_parser_or_asyncio() -> None:
+    # a fresh artifact is loaded and threads are served without either
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, server.main; "
+            "print(*sorted({'ply', 'asyncio', 'server.parser'} & set(sys.modules)))",
+        ],
+        cwd=ROOT / "src",
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == ""
+
+
+@pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="needs SO_REUSEPORT")
+def test_reload_serves_new_sessions_only(tmp_path) -> None:
+    script = tmp_path / "hello.script"
+    script.write_text('procedure hello\n    input ${x}\n    output "old"\n', "utf-8")
+    port = RELOAD_PORT
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            str(ROOT / "src" / "server" / "main.py"),
+            "--port",
+            str(port),
+            "--workers",
+            "1",
+            "--reload-interval",
+            "0.05",
+            str(script),
+        ],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(port)
+        with socket.create_connection(("localhost", port)) as live:
+            prompt = b""
+            while not prompt.endswith(delimiter):
+                prompt += live.recv(1024)
+
+            script.write_text('procedure hello\n    input ${x}\n    output "new"\n')
+            for _ in range(100):
+                time.sleep(0.05)
+                if b"new" in converse(port, ["x"]):
+                    break
+            assert b"new" in converse(port, ["x"])
+
+            live.sendall(b"x" + delimiter)
+            transcript = b""
+            while exit_signal not in transcript:
+                transcript += live.recv(1024)
+            assert b"old" in transcript
+    finally:
+        process.terminate()
+        process.wait()
+
+
+@pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="needs SO_REUSEPORT")
+def test_directory_serves_selected_scripts(tmp_path) -> None:
+    for name in ("a", "b"):
+        (tmp_path / f"{name}.script").write_text(
+            f'procedure main\n    output "from {name}"\n', "utf-8"
+        )
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            str(ROOT / "src" / "server" / "main.py"),
+            "--port",
+            str(REGISTRY_PORT),
+            "--workers",
+            "1",
+            "--cache-size",
+            "1",
+            str(tmp_path),
+        ],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(REGISTRY_PORT)
+        for name in ("a", "b", "a"):
+            assert f"from {name}".encode() in converse(REGISTRY_PORT, [name])
+        assert b"unknown script 'c'" in converse(REGISTRY_PORT, ["c"])
+    finally:
+        process.terminate()
+        process.wait()
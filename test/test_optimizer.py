@@ -0,0 +1,106 @@
+import pytest
+from server.lexer import Lexer
+from server.parser import Parser
+from server.language import *
+from server.loader import load
+from server.optimizer import optimize
+from server.session import Session
+from server.vm import compile_program
+
+SOURCE = """
+procedure start
+    let ${a} = "前缀" + ((cast 5 to string) + "后缀")
+    let ${b} = ${a} + ("x" + "y")
+    output -(2 * 3) + 1
+    output "a" - 1
+    branch never when 1 > 2
+    branch never when 1 > 2 and ${a} == "z"
+    branch maybe when ${a} == "z" and 1 > 2
+    branch maybe when ${a} == "a" or 1 > 2
+    branch always when "ab" like "^a"
+    branch skipped when ${a} == "c"
+    default skipped
+procedure never
+    default start
+procedure maybe
+procedure always
+    output 1 / 0
+procedure skipped
+procedure orphan
+    default orphan
+"""
+
+
+@pytest.fixture
+def parser() -> Parser:
+    return Parser(Lexer())
+
+
+def test_optimize(parser) -> None:
+    program = parser.parse(SOURCE)
+    with pytest.raises(RuntimeError):
+        optimize(program)
+    program.link()
+    report = optimize(program)
+
+    assert [procedure.name for procedure in program.procedures] == [
+        "start",
+        "maybe",
+        "always",
+    ]
+    assert report.procedures == ["never", "skipped", "orphan"]
+    assert report.branches == [
+        ("start", "never"),
+        ("start", "never"),
+        ("start", "skipped"),
+        ("start", "skipped"),
+    ]
+
+    start = program.procedures[0]
+    let_a, let_b, output_number, output_error = start.statements
+    (literal,) = let_a.expr.words
+    assert literal.value is string_value("前缀5后缀")
+    assert let_b.expr.words[2].value == StringValue("xy")
+    unfolded = parser.parse(SOURCE).procedures[0].statements[2].expr
+    assert output_number.expr.words[0].value == unfolded.get_value({})
+    assert isinstance(output_error.expr.words[0], Literal)
+    assert output_error.expr.words[1] == "-"
+
+    maybe_and, maybe, always = start.branches
+    assert maybe_and.bexpr.words[0].words[1] == "=="
+    assert isinstance(maybe_and.bexpr.words[2], BooleanExpression)
+    assert isinstance(maybe, Branch)
+    assert maybe.bexpr.words[1] == "=="
+    assert isinstance(always, Default)
+    assert always.target is program.procedures[2]
+    assert str(report) == (
+        "folded 14 constant expressions, removed 4 branches and 3 procedures"
+    )
+
+
+def test_load_reports_optimizations(capsys) -> None:
+    load(SOURCE.replace('output "a" - 1', ""))
+    assert capsys.readouterr().out == (
+        "Optimizer folded 14 constant expressions, removed 4 branches "
+        "and 3 procedures\n"
+    )
+
+
+@pytest.mark.parametrize("engine", ["tree", "vm"])
+def test_optimized_program_runs(engine: str) -> None:
+    with pytest.raises(SyntaxError, match="cannot apply '-' to a string"):
+        load(SOURCE)
+
+    program = load(SOURCE.replace('output "a" - 1', ""))
+    code = compile_program(program) if engine == "vm" else None
+    session = Session(program, code)
+    with pytest.raises(ZeroDivisionError):
+        session.start()
+    assert session.get_vartable()["${b}"].value == "前缀5后缀xy"
+
+
+def test_load_without_optimizing(capsys) -> None:
+    program = load(SOURCE.replace('output "a" - 1', ""), optimize=False)
+    assert capsys.readouterr().out == ""
+    assert len(program.procedures) == 6
+    assert len(program.procedures[0].branches) == 7
@@ -0,0 +1,62 @@
+import pickle
+from pathlib import Path
+import pytest
+from server.lexer import Lexer
+from server.parallel import parse_parallel, split_blocks
+from server.parser import Parser
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_split_blocks() -> None:
+    source = (
+        "need ${x}\n"
+        "procedure a\n"
+        '    output "\n'
+        'procedure in a string"\n'
+        "# procedure in a comment\n"
+        "procedure b\n"
+        "    output 1\n"
+        "  procedure c procedure d\n"
+        "procedures e\n"
+    )
+    blocks = split_blocks(source, count=10, block_size=1)
+    assert [source[start:end].split()[:2] for start, end, _ in blocks] == [
+        ["need", "${x}"],
+        ["procedure", "b"],
+        ["procedure", "c"],
+    ]
+    assert [lineno for _, _, lineno in blocks] == [1, 6, 8]
+    assert blocks[0][0] == 0 and blocks[-1][1] == len(source)
+    assert all(end == start for (_, end, _), (start, _, _) in zip(blocks, blocks[1:]))
+    assert len(split_blocks(source, count=10)) == 1
+
+
+@pytest.mark.parametrize("lexer", ["ply", "scanner"])
+def test_parse_parallel_matches_parse(lexer) -> None:
+    source = "".join(
+        (ROOT / "scripts" / f"{name}.script").read_text(encoding="utf-8")
+        for name in ("fibonacci", "sort")
+    )
+    assert len(split_blocks(source, count=8, block_size=100)) > 2
+    program = parse_parallel(source, workers=2, lexer=lexer, block_size=100)
+    assert pickle.dumps(program) == pickle.dumps(Parser(Lexer()).parse(source))
+
+
+@pytest.mark.parametrize(
+    "error, message",
+    [
+        # the end of a block, or the next procedure in the whole source
+        ("    output (\n", "unexpected .* at line 40"),
+        ("    output ) 1\n", "unexpected RPAREN '\\)' at line 39"),
+        ("    let ${x} = @\n", "invalid token at line 39: '@'"),
+    ],
+)
+def test_parse_parallel_reports_absolute_lines(error, message) -> None:
+    source = "".join(f"procedure p{index}\n    output {index}\n" for index in range(30))
+    lines = source.splitlines(keepends=True)
+    source = "".join(lines[:38] + [error] + lines[38:])
+    with pytest.raises(SyntaxError, match=message):
+        Parser(Lexer()).parse(source)
+    with pytest.raises(SyntaxError, match=message):
+        parse_parallel(source, workers=2, block_size=100)
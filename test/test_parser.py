@@ -1,6 +1,7 @@
+from pathlib import Path
 import pytest
 from server.parser import Parser
-from server.lexer import Lexer
+from server.lexer import TABLES_DIR, Lexer
 from server.language import *
 
 
@@ -77,3 +78,61 @@ def test_parse_syntax_error(parser):
     source = " invalid syntax ;"
     with pytest.raises(SyntaxError):
         parser.parse(source)
+
+
+def test_parse_and(parser):
+    source = """
+    procedure p1
+        branch p1 when ${a} == 1 and ${b} == 2 or not ${c} == 3
+    """
+    program = parser.parse(source)
+    bexpr = program.procedures[0].branches[0].bexpr
+    assert bexpr.words[1] == "and"
+    assert bexpr.words[0].words[1] == "=="
+    assert bexpr.words[2].words[1] == "or"
+    assert bexpr.words[2].words[2].words[0] == "not"
+
+
+def test_parse_long_lists(parser) -> None:
+    count = 5000
+    source = (
+        "".join(f"need ${{n{index}}}\n" for index in range(count))
+        + "procedure p0\n"
+        + "".join(f"    input ${{n{index}}}\n" for index in range(count))
+        + "".join(
+            f"    branch p{index} when ${{n0}} == {index}\n" for index in range(3)
+        )
+        + "    default p1\n"
+        + "".join(f"procedure p{index}\n" for index in range(1, count))
+    )
+    program = parser.parse(source)
+    assert [need.var_id for need in program.needs] == [
+        f"${{n{index}}}" for index in range(count)
+    ]
+    assert [procedure.name for procedure in program.procedures] == [
+        f"p{index}" for index in range(count)
+    ]
+    first = program.procedures[0]
+    assert [statement.var_id for statement in first.statements] == [
+        f"${{n{index}}}" for index in range(count)
+    ]
+    assert [type(branch) for branch in first.branches] == [Branch] * 3 + [Default]
+    assert [branch.proc_name for branch in first.branches] == ["p0", "p1", "p2", "p1"]
+    assert program.procedures[1].statements == []
+    assert program.procedures[1].branches == []
+
+
+def test_parse_default_must_be_last(parser) -> None:
+    with pytest.raises(SyntaxError):
+        parser.parse("procedure p\n    default p\n    branch p when 1 == 1\n")
+
+
+def test_shipped_tables_are_current(tmp_path) -> None:
+    lexer = Lexer(optimize=False)
+    lexer.lexer.writetab("lextab", str(tmp_path))
+    assert (tmp_path / "lextab.py").read_text(encoding="utf-8") == (
+        Path(TABLES_DIR) / "lextab.py"
+    ).read_text(encoding="utf-8")
+    # PLY only rebuilds, and here writes, the tables if their signature is stale
+    Parser(Lexer(), write_tables=True, outputdir=str(tmp_path))
+    assert not (tmp_path / "parsetab.py").exists()
@@ -0,0 +1,127 @@
+import socket
+import threading
+import time
+from pathlib import Path
+import pytest
+from config import busy_message, delimiter, exit_signal
+from client.loadgen import Transcript, run_session
+from server.loader import load_file
+from server.main import serve_threads
+from server.metrics import metrics
+from server.pool import WorkerPool, reject
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_pool_rejects_beyond_queue() -> None:
+    release = threading.Event()
+    handled = []
+
+    def handle(number: int) -> None:
+        release.wait()
+        handled.append(number)
+
+    rejected = metrics.get("rejected_connections")
+    pool = WorkerPool(1, 1, handle)
+    # the first runs as soon as the thread takes it, the second waits for it
+    assert pool.submit(1)
+    assert pool.submit(2)
+    assert not pool.submit(3)
+    assert metrics.get("rejected_connections") - rejected == 1
+
+    release.set()
+    for _ in range(100):
+        if len(handled) == 2:
+            break
+        time.sleep(0.01)
+    assert handled == [1, 2]
+    assert pool.submit(4)
+
+
+def test_pool_survives_failing_handler(capsys) -> None:
+    handled = threading.Event()
+
+    def handle(fail: bool) -> None:
+        if fail:
+            raise RuntimeError("broken session")
+        handled.set()
+
+    pool = WorkerPool(1, 1, handle)
+    assert pool.submit(True)
+    assert pool.submit(False)
+    assert handled.wait(1)
+    assert "broken session" in capsys.readouterr().err
+
+
+def test_reject() -> None:
+    server, client = socket.socketpair()
+    reject(server)
+    assert client.recv(1024) == f"{busy_message}\n".encode() + exit_signal
+    assert client.recv(1024) == b""
+
+
+def free_port() -> int:
+    # an ephemeral port, so that no earlier run's lingering sockets hold it
+    with socket.socket() as probe:
+        probe.bind(("localhost", 0))
+        return probe.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def port() -> int:
+    program = load_file(str(ROOT / "scripts" / "sort.script"))
+    port: int = free_port()
+    errors: list[Exception] = []
+
+    def serve() -> None:
+        try:
+            serve_threads(program, "localhost", port, pool_size=1, queue_size=0)
+        except Exception as error:
+            errors.append(error)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    for _ in range(250):
+        if not thread.is_alive():
+            pytest.fail(f"the server failed to start: {errors[0]!r}")
+        try:
+            # taken by the pool's thread, which is free again once it is closed
+            socket.create_connection(("localhost", port)).close()
+            return port
+        except ConnectionRefusedError:
+            time.sleep(0.02)
+    pytest.fail(f"nothing is listening on port {port}")
+
+
+def occupy(port: int) -> socket.socket:
+    # the thread may still be ending the last session, and reject this one
+    for _ in range(100):
+        sock = socket.create_connection(("localhost", port))
+        reply = b""
+        while not reply.endswith(delimiter) and exit_signal not in reply:
+            chunk = sock.recv(1024)
+            if not chunk:
+                break
+            reply += chunk
+        if reply.endswith(delimiter):
+            return sock
+        sock.close()
+        time.sleep(0.01)
+    pytest.fail("the server stayed busy")
+
+
+@pytest.mark.parametrize("protocol", ["framed", "legacy"])
+def test_busy_server_rejects_connections(port: int, protocol: str) -> None:
+    transcript = Transcript.from_file(ROOT / "test" / "test_sort" / "input1.txt")
+    with occupy(port) as busy:
+        with pytest.raises(ConnectionRefusedError, match=busy_message):
+            run_session("localhost", port, transcript, protocol)
+    # the thread is free again once the session ends
+    for _ in range(100):
+        try:
+            run_session("localhost", port, transcript, protocol)
+            break
+        except ConnectionRefusedError:
+            time.sleep(0.01)
+    else:
+        pytest.fail("the server stayed busy")
@@ -0,0 +1,86 @@
+import socket
+import threading
+import pytest
+import config
+from protocol import *
+
+
+def test_frame_roundtrip() -> None:
+    server, client = socket.socketpair()
+    client.sendall(encode_frame(INPUT, "你好") + encode_frame(PROMPT, ""))
+    reader = FrameReader(server)
+    assert reader.read() == (INPUT, "你好")
+    assert reader.read() == (PROMPT, "")
+
+
+def test_frame_split_across_recv() -> None:
+    server, client = socket.socketpair()
+    data = encode_frame(EXIT, "再见！\n" * 3)
+    reader = FrameReader(server, size=8)
+
+    def send_slowly() -> None:
+        for i in range(len(data)):
+            client.sendall(data[i : i + 1])
+
+    thread = threading.Thread(target=send_slowly)
+    thread.start()
+    assert reader.read() == (EXIT, "再见！\n" * 3)
+    thread.join()
+
+
+def test_frame_larger_than_buffer() -> None:
+    server, client = socket.socketpair()
+    text = "x" * 10000
+    client.sendall(encode_frame(INPUT, "a") + encode_frame(INPUT, text))
+    reader = FrameReader(server, size=16)
+    assert reader.read() == (INPUT, "a")
+    assert reader.read() == (INPUT, text)
+
+
+def test_frame_too_large() -> None:
+    server, client = socket.socketpair()
+    client.sendall(INPUT + (config.max_frame_size + 1).to_bytes(4, "big"))
+    with pytest.raises(ConnectionError):
+        FrameReader(server).read()
+
+
+def test_frame_connection_closed() -> None:
+    server, client = socket.socketpair()
+    client.sendall(encode_frame(INPUT, "abc")[:-1])
+    client.close()
+    with pytest.raises(ConnectionError):
+        FrameReader(server).read()
+
+
+def test_upgrade_framed() -> None:
+    server, client = socket.socketpair()
+    client.sendall(encode_upgrade(INPUT, "你好"))
+    assert accept_upgrade(server) == (True, b"")
+    assert FrameReader(server).read() == (INPUT, "你好")
+
+
+def test_upgrade_selects_script() -> None:
+    server, client = socket.socketpair()
+    client.sendall(encode_upgrade(SCRIPT, "10086"))
+    assert accept_upgrade(server) == (True, b"")
+    assert FrameReader(server).read() == (SCRIPT, "10086")
+
+
+@pytest.mark.parametrize(
+    "sent", [b"frame!", config.frame_magic[:10], "你好".encode(), b""]
+)
+def test_upgrade_legacy_input_is_kept(sent) -> None:
+    server, client = socket.socketpair()
+    client.sendall(sent + config.delimiter)
+    framed, excess = accept_upgrade(server)
+    assert not framed
+    client.close()
+    assert excess + server.recv(1024) == sent + config.delimiter
+
+
+def test_upgrade_connection_closed() -> None:
+    server, client = socket.socketpair()
+    client.sendall(config.frame_magic[:10])
+    client.close()
+    with pytest.raises(ConnectionError):
+        accept_upgrade(server)
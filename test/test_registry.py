@@ -0,0 +1,108 @@
+import threading
+from pathlib import Path
+import pytest
+from server.metrics import metrics
+from server.registry import Registry
+from server.session import Session
+
+
+def write_scripts(directory: Path, names: list[str]) -> None:
+    for name in names:
+        (directory / f"{name}.script").write_text(
+            f'procedure main\n    output "{name}"\n', encoding="utf-8"
+        )
+
+
+def run(version) -> list[str]:
+    return Session(*version).start()
+
+
+def counters() -> tuple[int, int, int]:
+    return (
+        metrics.get("script_hits"),
+        metrics.get("script_loads"),
+        metrics.get("script_evictions"),
+    )
+
+
+@pytest.mark.parametrize("engine", ["tree", "vm"])
+def test_registry_evicts_least_recently_used(tmp_path, engine) -> None:
+    write_scripts(tmp_path, ["a", "b", "c"])
+    registry = Registry(str(tmp_path), 2, engine=engine)
+    before = counters()
+
+    assert run(registry.get("a")) == ["a"]
+    assert run(registry.get("b")) == ["b"]
+    first = registry.get("a")
+    assert registry.cached() == ["b", "a"]
+    assert run(registry.get("c")) == ["c"]
+    assert registry.cached() == ["a", "c"]
+    assert registry.get_cached("b") is None
+    assert registry.get("a") is first
+    assert (first[1] is not None) == (engine == "vm")
+
+    hits, loads, evictions = (now - then for now, then in zip(counters(), before))
+    assert (hits, loads, evictions) == (2, 3, 1)
+
+
+@pytest.mark.parametrize("name", ["missing", "", ".hidden", "../a", "sub/a"])
+def test_registry_unknown_script(tmp_path, name) -> None:
+    directory = tmp_path / "scripts"
+    directory.mkdir()
+    write_scripts(tmp_path, ["a"])
+    (directory / "sub").mkdir()
+    write_scripts(directory / "sub", ["a"])
+    write_scripts(directory, [".hidden"])
+    registry = Registry(str(directory), 2)
+    with pytest.raises(KeyError, match="unknown script"):
+        registry.get(name)
+    assert registry.cached() == []
+
+
+def test_registry_broken_script(tmp_path, capsys) -> None:
+    (tmp_path / "broken.script").write_text("procedure\n", encoding="utf-8")
+    registry = Registry(str(tmp_path), 2)
+    with pytest.raises(KeyError, match="script 'broken' cannot be loaded"):
+        registry.get("broken")
+    assert "unexpected end of input" in capsys.readouterr().out
+    assert registry.cached() == []
+
+
+def test_registry_loads_once_for_concurrent_requests(tmp_path) -> None:
+    write_scripts(tmp_path, ["a"])
+    registry = Registry(str(tmp_path), 2)
+    loads = metrics.get("script_loads")
+    versions = []
+    threads = [
+        threading.Thread(target=lambda: versions.append(registry.get("a")))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert metrics.get("script_loads") - loads == 1
+    assert all(version is versions[0] for version in versions)
+
+
+def test_registry_caches_before_releasing_the_load(tmp_path, monkeypatch) -> None:
+    write_scripts(tmp_path, ["a"])
+    registry = Registry(str(tmp_path), 2)
+    loads = metrics.get("script_loads")
+    insert = registry._insert
+    others = []
+    threads = []
+
+    def insert_after_another_get(name, version) -> None:
+        # a thread asking for the script just before it is cached must wait
+        thread = threading.Thread(target=lambda: others.append(registry.get(name)))
+        threads.append(thread)
+        thread.start()
+        thread.join(0.2)
+        insert(name, version)
+
+    monkeypatch.setattr(registry, "_insert", insert_after_another_get)
+    version = registry.get("a")
+    threads[0].join()
+    assert others == [version]
+    assert metrics.get("script_loads") - loads == 1
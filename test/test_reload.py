@@ -0,0 +1,134 @@
+import os
+import time
+from pathlib import Path
+import pytest
+from server.artifact import write_artifact
+from server.language import Program
+from server.metrics import metrics
+from server.reload import Reloader
+from server.session import Session
+from server.vm import Code
+
+SOURCE = """need ${name}
+procedure greet
+    output "hello " + ${name}
+    input ${reply}
+    branch ask when ${reply} == "again"
+    default bye
+procedure ask
+    output "asking"
+    default bye
+procedure bye
+    output "bye"
+"""
+
+
+def run(version: tuple[Program, Code | None], inputs: list[str]) -> list[str]:
+    session = Session(*version)
+    session.start()
+    outputs = session.feed("you")
+    for text in inputs:
+        outputs += session.feed(text)
+    return outputs
+
+
+def write(path: Path, source: str) -> None:
+    # a different size, or else a later modification time, marks the file changed
+    stamp = path.stat().st_mtime_ns + 1_000_000 if path.exists() else None
+    path.write_text(source, encoding="utf-8")
+    if stamp is not None:
+        os.utime(path, ns=(stamp, stamp))
+
+
+@pytest.fixture
+def script(tmp_path) -> Path:
+    path = tmp_path / "greet.script"
+    write(path, SOURCE)
+    return path
+
+
+@pytest.mark.parametrize("engine", ["tree", "vm"])
+def test_reload_parses_only_changed_blocks(script, engine) -> None:
+    reloader = Reloader(str(script), 1, engine=engine)
+    old = reloader.current
+    assert (old[1] is not None) == (engine == "vm")
+    assert not reloader.reload()
+
+    parsed = metrics.get("reparsed_blocks")
+    write(script, SOURCE.replace('"asking"', '"asking again"'))
+    assert reloader.reload()
+    assert metrics.get("reparsed_blocks") - parsed == 1
+    new = reloader.current
+    assert new[0] is not old[0]
+
+    assert run(new, ["again"]) == ["hello you", "asking again", "bye"]
+    # the old version is untouched, so a live session finishes on it
+    assert run(old, ["again"]) == ["hello you", "asking", "bye"]
+    assert run(old, ["no"]) == ["hello you", "bye"]
+
+
+def test_failed_reload_keeps_current_version(script, capsys) -> None:
+    reloader = Reloader(str(script), 1)
+    current = reloader.current
+    write(script, SOURCE.replace("default bye\nprocedure bye", "default bye\n)"))
+    assert not reloader.reload()
+    assert "unexpected RPAREN ')' at line 10" in capsys.readouterr().out
+    write(script, SOURCE.replace("default bye\nprocedure bye", "default nowhere\n"))
+    assert not reloader.reload()
+    assert reloader.current is current
+
+    write(script, SOURCE + "    default greet\n")
+    assert reloader.reload()
+    assert reloader.current[0].procedures[2].branches[-1].proc_name == "greet"
+
+
+def test_watch_picks_up_changes(script) -> None:
+    reloader = Reloader(str(script), 0.01)
+    reloader.watch()
+    current = reloader.current
+    write(script, SOURCE.replace('"bye"', '"see you"'))
+    for _ in range(200):
+        if reloader.current is not current:
+            break
+        time.sleep(0.01)
+    reloader.stop()
+    assert run(reloader.current, ["no"]) == ["hello you", "see you"]
+
+
+def test_reload_survives_any_error_and_retries(script, monkeypatch, capsys) -> None:
+    reloader = Reloader(str(script), 1)
+    load = reloader._load
+    errors = metrics.get("reload_errors")
+
+    def fail(source):
+        raise RecursionError("maximum recursion depth exceeded")
+
+    monkeypatch.setattr(reloader, "_load", fail)
+    write(script, SOURCE.replace('"bye"', '"see you"'))
+    assert not reloader.reload()
+    assert "RecursionError: maximum recursion depth" in capsys.readouterr().out
+    assert metrics.get("reload_errors") - errors == 1
+
+    # the same version is tried again, though the file did not change
+    monkeypatch.setattr(reloader, "_load", load)
+    assert reloader.reload()
+    assert run(reloader.current, ["no"]) == ["hello you", "see you"]
+
+
+def test_reload_starts_from_artifact(script) -> None:
+    write_artifact(str(script))
+    parsed = metrics.get("reparsed_blocks")
+    reloader = Reloader(str(script), 1)
+    assert metrics.get("reparsed_blocks") == parsed
+    assert run(reloader.current, ["again"]) == ["hello you", "asking", "bye"]
+
+
+def test_reload_parses_changed_blocks_in_workers(script) -> None:
+    reloader = Reloader(str(script), 1, parse_workers=2)
+    parsed = metrics.get("reparsed_blocks")
+    write(
+        script, SOURCE.replace('"asking"', '"asking again"').replace('"bye"', '"ciao"')
+    )
+    assert reloader.reload()
+    assert metrics.get("reparsed_blocks") - parsed == 2
+    assert run(reloader.current, ["again"]) == ["hello you", "asking again", "ciao"]
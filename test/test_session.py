@@ -0,0 +1,97 @@
+from pathlib import Path
+import pytest
+from server.loader import load, load_file
+from server.session import Session
+from server.language import Program, Procedure
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def render(session: Session, inputs: list[str]) -> str:
+    """Renders a conversation the way client/main.py prints it."""
+    transcript = ""
+    outputs = session.start()
+    for text in inputs:
+        if session.finished:
+            break
+        transcript += "对方：\n" + "".join(o + "\n" for o in outputs) + "\n输入 > \n"
+        outputs = session.feed(text)
+    transcript += "对方：" + "".join(o + "\n" for o in outputs)
+    transcript += "\n对方已终止通信\n客户端已退出\n"
+    return transcript
+
+
+def test_start_runs_until_first_input() -> None:
+    program = load("""
+        need ${x}
+        procedure p1
+            output "hello"
+        """)
+    session = Session(program)
+    assert session.start() == ["${x} required: "]
+    assert not session.finished
+    assert session.feed("42") == ["hello"]
+    assert session.finished
+    assert session.get_vartable()["${x}"].value == "42"
+
+
+def test_feed_resumes_inside_procedure() -> None:
+    program = load("""
+        procedure p1
+            output "a"
+            input ${x}
+            output "b" + ${x}
+            input ${y}
+            output "c" + ${y}
+        """)
+    session = Session(program)
+    assert session.start() == ["a"]
+    assert session.feed("1") == ["b1"]
+    assert session.feed("2") == ["c2"]
+    assert session.finished
+
+
+def test_feed_errors() -> None:
+    session = Session(load("procedure p1"))
+    with pytest.raises(RuntimeError):
+        session.feed("too early")
+    assert session.start() == []
+    assert session.finished
+    with pytest.raises(RuntimeError):
+        session.feed("too late")
+    with pytest.raises(RuntimeError):
+        session.start()
+
+
+def test_sessions_are_independent() -> None:
+    program = load("""
+        procedure p1
+            input ${x}
+            output ${x}
+        """)
+    first, second = Session(program), Session(program)
+    first.start()
+    second.start()
+    assert second.feed("2") == ["2"]
+    assert first.feed("1") == ["1"]
+
+
+@pytest.mark.parametrize("name", ["sort", "fibonacci"])
+@pytest.mark.parametrize("case", [1, 2])
+def test_golden_transcripts(name: str, case: int) -> None:
+    program = load_file(ROOT / "scripts" / f"{name}.script")
+    with open(
+        ROOT / "test" / f"test_{name}" / f"input{case}.txt", encoding="utf-8"
+    ) as file:
+        inputs = file.read().splitlines()
+    with open(
+        ROOT / "test" / f"test_{name}" / f"expected{case}.txt", encoding="utf-8"
+    ) as file:
+        expected = file.read()
+    assert render(Session(program), inputs).split() == expected.split()
+
+
+def test_program_must_be_linked() -> None:
+    program = Program(needs=[], procedures=[Procedure("p1", [], [])])
+    with pytest.raises(RuntimeError):
+        Session(program)
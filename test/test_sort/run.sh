@@ -4,9 +4,9 @@
 server_script="./src/server/main.py"
 server_port=10002
 script_dir="./scripts"
-script_file="sort.dsl"
+script_file="sort.script"
 
-python $server_script --port $server_port "$script_dir/$script_file" >/dev/null 2>&1 &
+python $server_script --port $server_port "$@" "$script_dir/$script_file" >/dev/null 2>&1 &
 server_pid=$!
 echo "Server($server_pid) started on port $server_port"
 
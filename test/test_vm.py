@@ -0,0 +1,131 @@
+import re
+from pathlib import Path
+import pytest
+from server.lexer import Lexer
+from server.parser import Parser
+from server.loader import load, load_file
+from server.session import Session
+from server.vm import compile_program, disassemble, SELECT, _JUMPS
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SOURCE = """
+need ${名字}
+procedure 问候
+    output "你好，" + ${名字}
+    input ${答复}
+    branch 再见 when ${答复} like "再见" or ${答复} like "拜拜"
+    branch 计算 when ${答复} == "算"
+    default 问候
+
+procedure 计算
+    let ${n} = -(1 + 2) * 4 / 3 % 5
+    let ${s} = cast ${n} to string
+    output ${s} + "," + (cast ((cast "7" to integer) + 1) to string)
+    branch 再见 when not ${n} >= 0 or ${n} == 1
+    default 问候
+
+procedure 再见
+    output "再见！"
+"""
+
+
+def converse(session: Session, inputs: list[str]) -> list[list[str]]:
+    turns = [session.start()]
+    for text in inputs:
+        if session.finished:
+            break
+        turns.append(session.feed(text))
+    return turns
+
+
+@pytest.mark.parametrize(
+    "inputs",
+    [
+        ["小明", "嗯", "再见"],
+        ["小明", "算", "拜拜"],
+        ["小明", "嗯", "算", "嗯", "再见吧"],
+    ],
+)
+def test_matches_tree_walker(inputs: list[str]) -> None:
+    program = load(SOURCE)
+    code = compile_program(program)
+    tree, vm = Session(program), Session(program, code)
+    assert converse(vm, inputs) == converse(tree, inputs)
+    assert vm.finished == tree.finished
+    assert vm.get_vartable() == tree.get_vartable()
+
+
+@pytest.mark.parametrize("name", ["sort", "fibonacci"])
+@pytest.mark.parametrize("case", [1, 2])
+def test_golden_transcripts(name: str, case: int) -> None:
+    program = load_file(ROOT / "scripts" / f"{name}.script")
+    with open(
+        ROOT / "test" / f"test_{name}" / f"input{case}.txt", encoding="utf-8"
+    ) as file:
+        inputs = file.read().splitlines()
+    tree = Session(program)
+    vm = Session(program, compile_program(program))
+    assert converse(vm, inputs) == converse(tree, inputs)
+
+
+def test_jumps_resolve_to_procedures() -> None:
+    code = compile_program(load_file(ROOT / "scripts" / "10086.script"))
+    for offset in range(0, len(code.instructions), 4):
+        opcode, a, b, _ = code.instructions[offset : offset + 4]
+        if opcode in _JUMPS:
+            assert a in code.procedures
+        if opcode == SELECT:
+            _, targets, _ = code.registers[b]
+            assert all(target in code.procedures for target in targets)
+    listing: str = disassemble(code)
+    assert all(f"{name}:" in listing for name in code.procedures.values())
+
+
+def test_runtime_errors_match_tree_walker() -> None:
+    program = load("""
+        procedure p1
+            output "a" + ${unset}
+        """)
+    with pytest.raises(RuntimeError, match="unset"):
+        Session(program, compile_program(program)).start()
+    # the loader rejects this, so build it by hand
+    program = Parser(Lexer()).parse("""
+        procedure p1
+            output "a" - "b"
+        """)
+    program.link()
+    program.compile()
+    with pytest.raises(RuntimeError, match="sub"):
+        Session(program, compile_program(program)).start()
+
+
+CONDITIONS = """
+procedure 开始
+    input ${x}
+    branch 甲 when ${x} == "a" and not ${x} like "b" and ${y} == "1"
+    branch 乙 when not (${x} like "^a" or ${x} == "b") and ${x} != "c"
+    branch 丙 when ${x} == "c" or ${y} == "1"
+    default 开始
+procedure 甲
+    output "甲"
+procedure 乙
+    output "乙"
+procedure 丙
+    output "丙"
+"""
+
+
+@pytest.mark.parametrize("text", ["a", "b", "c", "d"])
+def test_short_circuit_matches_tree_walker(text: str) -> None:
+    program = load(CONDITIONS)
+    tree, vm = Session(program), Session(program, compile_program(program))
+    tree.start()
+    vm.start()
+    try:
+        expected = tree.feed(text)
+    except RuntimeError as error:
+        with pytest.raises(RuntimeError, match=re.escape(str(error))):
+            vm.feed(text)
+    else:
+        assert vm.feed(text) == expected